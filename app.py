@@ -3,24 +3,14 @@ from werkzeug.security import check_password_hash, generate_password_hash
 from datetime import datetime
 import sqlite3
 import os
-import joblib
 import json
-import pandas as pd
-import numpy as np
+from backend.model_registry import registry
 
 # Initialize Flask app
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-this-in-production'
 
-# Load ML model and feature names
-try:
-    model = joblib.load("heart_disease_model.pkl")
-    with open("feature_names.json", "r") as f:
-        feature_names = json.load(f)
-except FileNotFoundError:
-    print("Model files not found! Please ensure heart_disease_model.pkl and feature_names.json exist.")
-    model = None
-    feature_names = []
+# ML model and feature names are loaded lazily through the shared registry
 
 # Initialize database
 def init_db():
@@ -192,10 +182,15 @@ def admin_dashboard():
 @app.route('/api/predict', methods=['POST'])
 @login_required('user')
 def predict():
-    if not model:
+    try:
+        model, feature_names = registry.get()
+    except FileNotFoundError:
+        print("Model files not found! Please ensure heart_disease_model.pkl and feature_names.json exist.")
         return jsonify({'error': 'Model not loaded'}), 500
     
     try:
+        import pandas as pd
+
         data = request.get_json()
         
         # Prepare input data
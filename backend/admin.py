@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify, session
 from werkzeug.security import generate_password_hash
 import sqlite3
+import zipfile
+from backend.jobs import get_queue, QueueFullError
+from backend.ingest import spool_upload
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -447,4 +450,134 @@ def get_system_logs():
             'status': 'error',
             'message': str(e),
             'data': {}
-        }), 500
\ No newline at end of file
+        }), 500
+
+@admin_bp.route('/jobs/metrics', methods=['GET'])
+def get_job_metrics():
+    try:
+        if 'user_id' not in session or session.get('role') != 'admin':
+            return jsonify({
+                'status': 'error', 
+                'message': 'Not authorized',
+                'data': {}
+            }), 401
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Job queue metrics retrieved successfully',
+            'data': get_queue().metrics()
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'data': {}
+        }), 500
+
+@admin_bp.route('/shadow', methods=['GET'])
+def get_shadow_summary():
+    # Shadow/canary comparison: disagreement rate and probability deltas per model
+    try:
+        if 'user_id' not in session or session.get('role') != 'admin':
+            return jsonify({
+                'status': 'error', 
+                'message': 'Not authorized',
+                'data': {}
+            }), 401
+        
+        from backend.shadow import get_shadow
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Shadow scoring summary retrieved successfully',
+            'data': get_shadow().summary(recent=request.args.get('recent', 20, type=int))
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'data': {}
+        }), 500
+
+@admin_bp.route('/ollama/status', methods=['GET'])
+def get_ollama_status():
+    try:
+        if 'user_id' not in session or session.get('role') != 'admin':
+            return jsonify({
+                'status': 'error', 
+                'message': 'Not authorized',
+                'data': {}
+            }), 401
+        
+        from src.utils.ollama_integration_improved import get_breaker
+        from src.utils.explanation_cache import get_explanation_cache
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Ollama circuit breaker status retrieved successfully',
+            'data': {
+                **get_breaker().metrics(),
+                'explanation_cache': get_explanation_cache().stats()
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'data': {}
+        }), 500
+
+@admin_bp.route('/ingest', methods=['POST'])
+def ingest_documents():
+    try:
+        if 'user_id' not in session or session.get('role') != 'admin':
+            return jsonify({
+                'status': 'error', 
+                'message': 'Not authorized',
+                'data': {}
+            }), 401
+        
+        upload = request.files.get('file')
+        if upload is None or not upload.filename.lower().endswith('.zip'):
+            return jsonify({
+                'status': 'error', 
+                'message': 'A .zip file of DOCX forms is required',
+                'data': {}
+            }), 400
+        
+        # Predictions are stored for the given patient, or the admin by default
+        owner_id = request.form.get('user_id', type=int) or session['user_id']
+        
+        # Parsing and scoring run in the job queue; poll /api/user/jobs/<job_id> for the results
+        path = spool_upload(upload.stream)
+        try:
+            job_id = get_queue().submit('ingest', {'path': str(path), 'source': upload.filename, 'user_id': owner_id},
+                                        user_id=session['user_id'])
+        except QueueFullError as e:
+            path.unlink(missing_ok=True)
+            return jsonify({
+                'status': 'error',
+                'message': str(e),
+                'data': {}
+            }), 503
+        
+        return jsonify({
+            'status': 'success',
+            'message': f'Ingestion of {upload.filename} queued',
+            'data': {
+                'job_id': job_id,
+                'status_url': f'/api/user/jobs/{job_id}'
+            }
+        }), 202
+    except zipfile.BadZipFile:
+        return jsonify({
+            'status': 'error',
+            'message': 'Uploaded file is not a valid zip archive',
+            'data': {}
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'data': {}
+        }), 500
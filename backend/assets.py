@@ -0,0 +1,163 @@
+"""
+Vendored front-end assets with content-hashed filenames
+Third-party JS used by the 3D viewer is committed under static/heart3d/vendor/
+as <name>.<sha256[:12]>.<ext>, so it can be cached forever: a new version
+gets a new URL. vendor/manifest.json records the file, its full sha256 and the
+library revision, and the Flask app marks hashed files immutable.
+
+This is a maintainer tool, not something the app runs: it rewrites the tracked
+vendor/ directory and static/heart3d/index.html, and its output is committed.
+
+Each asset is pinned to one exact file (VENDOR_ASSETS): the release, where it is
+published and its sha256. Whatever the source, the tool refuses bytes that do
+not match the pin.
+
+Fetch the pinned file:          python -m backend.assets
+Air-gapped (copy a local file): python -m backend.assets --from /media/usb/three.min.js
+"""
+import argparse
+import hashlib
+import io
+import json
+import re
+import zipfile
+from pathlib import Path
+
+import config
+
+VIEWER_DIR = config.BASE_DIR / "static" / "heart3d"
+VENDOR_DIR = VIEWER_DIR / "vendor"
+MANIFEST_NAME = "manifest.json"
+
+# name -> pinned file: its release, where it is published (`member` when the URL is
+# an archive) and its sha256. three.js is the 129dev build published in the
+# streamlit-stl 0.0.6 wheel on PyPI; every THREE class heart3d.js uses is in it.
+VENDOR_ASSETS = {
+    "three.min.js": {
+        "revision": "129dev",
+        "url": "https://files.pythonhosted.org/packages/5a/cf/73df3dc3b2d2cc02cf59892667dc4c68d1d169a6d15bdac6c9b1d4f64638/"
+               "streamlit_stl-0.0.6-py3-none-any.whl",
+        "member": "streamlit_stl/three_js_scripts/three.min.js",
+        "sha256": "dfe9c38cc9d05578d63fb1e655e696f195c4980a3348fe921766d56f423c5921",
+    },
+}
+
+# three.js builds declare their release as REVISION = "129dev" (or const e="129dev" when minified)
+REVISION_PATTERN = re.compile(rb'(?:REVISION\s*=\s*|const e=)"(\w+)"')
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def hashed_filename(name, data):
+    """three.min.js -> three.min.<sha256[:12]>.js"""
+    stem, dot, ext = name.rpartition(".")
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{dot}{ext}"
+
+
+def check_pin(name, data):
+    """
+    Raise ValueError unless data is the pinned file for `name`
+
+    Returns:
+    --------
+    sha256 : str
+        Hex digest of data
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    pin = VENDOR_ASSETS[name]
+    if digest != pin["sha256"]:
+        raise ValueError(f"{name}: sha256 {digest} does not match the pinned {pin['revision']} build ({pin['sha256']})")
+    return digest
+
+
+def fetch_asset(name):
+    """Download the pinned file for `name` (extracting it when published inside an archive)"""
+    import urllib.request
+
+    pin = VENDOR_ASSETS[name]
+    with urllib.request.urlopen(pin["url"], timeout=30) as response:
+        data = response.read()
+    if pin.get("member"):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            data = archive.read(pin["member"])
+    return data
+
+
+def vendor_asset(name, data, viewer_dir=VIEWER_DIR):
+    """
+    Store an asset under its content hash and point the viewer at it
+
+    Parameters:
+    -----------
+    name : str
+        Logical name, e.g. "three.min.js"
+    data : bytes
+        File contents
+    viewer_dir : Path
+        Directory with the viewer's index.html
+
+    Returns:
+    --------
+    filename : str
+        Hashed filename inside <viewer_dir>/vendor
+    """
+    vendor_dir = Path(viewer_dir) / "vendor"
+    vendor_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = vendor_dir / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    filename = hashed_filename(name, data)
+    (vendor_dir / filename).write_bytes(data)
+    previous = manifest.get(name, {}).get("file")
+    if previous and previous != filename:
+        (vendor_dir / previous).unlink(missing_ok=True)
+    revision = REVISION_PATTERN.search(data[:4096])
+    manifest[name] = {
+        "file": filename,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "revision": revision.group(1).decode() if revision else None,
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2) + "\n")
+
+    # <script src="..." data-vendor="three.min.js"> -> local hashed copy
+    index_path = Path(viewer_dir) / "index.html"
+    html = index_path.read_text()
+    pattern = re.compile(rf'src="[^"]*"(\s+data-vendor="{re.escape(name)}")')
+    html, count = pattern.subn(rf'src="vendor/{filename}"\1', html)
+    if count == 0:
+        raise ValueError(f'No <script data-vendor="{name}"> tag in {index_path}')
+    index_path.write_text(html)
+    return filename
+
+
+def set_cache_headers(response):
+    """after_request hook: hashed static files never change, so cache them for a year"""
+    from flask import request
+
+    if request.path.startswith("/static/") and HASHED_NAME.search(request.path) and response.status_code == 200:
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def init_app(app):
+    app.after_request(set_cache_headers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vendor the 3D viewer's JS dependencies into static/")
+    parser.add_argument("--name", default="three.min.js", choices=sorted(VENDOR_ASSETS), help="asset to vendor")
+    parser.add_argument("--from", dest="source", help="copy this local file instead of downloading")
+    args = parser.parse_args()
+
+    data = Path(args.source).read_bytes() if args.source else fetch_asset(args.name)
+    try:
+        check_pin(args.name, data)
+    except ValueError as e:
+        parser.error(str(e))
+
+    filename = vendor_asset(args.name, data)
+    print(f"Vendored {args.name} -> static/heart3d/vendor/{filename} ({len(data) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -178,6 +178,66 @@ def update_consultation_status():
             'data': {}
         }), 500
 
+@doctor_bp.route('/consultation/outcome', methods=['POST'])
+def record_outcome():
+    # Confirmed real outcome of a prediction; feeds incremental training (src/models/online.py)
+    try:
+        if 'user_id' not in session or session.get('role') != 'doctor':
+            return jsonify({
+                'status': 'error', 
+                'message': 'Not authorized',
+                'data': {}
+            }), 401
+        
+        data = request.get_json() or {}
+        prediction_id = data.get('prediction_id')
+        outcome = data.get('outcome')
+        
+        if not prediction_id or outcome not in (0, 1):
+            return jsonify({
+                'status': 'error', 
+                'message': 'Prediction ID and an outcome of 0 or 1 are required',
+                'data': {}
+            }), 400
+        
+        doctor_id = session['user_id']
+        
+        conn = get_db_connection()
+        prediction = conn.execute('''
+            SELECT p.id FROM predictions p
+            JOIN assignments a ON a.user_id = p.user_id
+            WHERE p.id = ? AND a.doctor_id = ?
+        ''', (prediction_id, doctor_id)).fetchone()
+        
+        if not prediction:
+            conn.close()
+            return jsonify({
+                'status': 'error', 
+                'message': 'Prediction not found for your patients',
+                'data': {}
+            }), 404
+        
+        # Replacing gives the correction a new id, so the online trainer learns from it again
+        conn.execute('INSERT OR REPLACE INTO outcomes (prediction_id, outcome, confirmed_by) VALUES (?, ?, ?)',
+                     (prediction_id, outcome, doctor_id))
+        conn.commit()
+        conn.close()
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Outcome recorded successfully',
+            'data': {
+                'prediction_id': prediction_id,
+                'outcome': outcome
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'data': {}
+        }), 500
+
 @doctor_bp.route('/patients/search', methods=['GET'])
 def search_patients():
     try:
@@ -0,0 +1,354 @@
+"""
+Bulk ingestion of patient DOCX forms
+Streams documents out of a zip file or directory, parses them in a process
+pool, validates them against the feature schema of the served model, scores
+all valid rows with a single predict_proba call and writes the results and per-file errors
+to CSV files or hospital.db. Uploads through POST /api/admin/ingest are
+spooled to config.INGEST_UPLOAD_DIR and run as an 'ingest' job.
+
+Run: python -m backend.ingest clinic_forms.zip --out results.csv
+     python -m backend.ingest testing_data/ --db hospital.db --user-id 1
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import config
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+
+_parser = None
+
+
+def _init_worker():
+    global _parser
+    from src.utils.docx_parser import PatientDataParser
+    _parser = PatientDataParser()
+
+
+def _parse_document(item):
+    """Parse one (name, bytes) document in a worker; returns (name, patient_data, errors)"""
+    if _parser is None:
+        _init_worker()
+    name, data = item
+    patient_data, errors = _parser.parse_docx(io.BytesIO(data))
+    return name, patient_data, errors
+
+
+def iter_documents(source):
+    """
+    Yield (name, bytes) for every .docx in a zip file or directory
+
+    Zip members are read one at a time, so only the documents currently being
+    parsed are held in memory.
+    """
+    path = Path(source) if isinstance(source, (str, os.PathLike)) else None
+    if path is not None and path.is_dir():
+        for docx_path in sorted(path.rglob("*.docx")):
+            yield str(docx_path.relative_to(path)), docx_path.read_bytes()
+        return
+
+    with zipfile.ZipFile(source) as archive:
+        for member in archive.infolist():
+            name = member.filename
+            # Skip folders, macOS metadata and Word lock files
+            if member.is_dir() or not name.lower().endswith(".docx") or "__MACOSX" in name \
+                    or Path(name).name.startswith("~$"):
+                continue
+            with archive.open(member) as f:
+                yield name, f.read()
+
+
+def parse_documents(documents, workers=INGEST_WORKERS, window=None):
+    """
+    Parse documents in a process pool, preserving input order
+
+    At most `window` documents are in flight (default 4 per worker) so large
+    archives are not loaded into memory up front.
+    """
+    if workers <= 1:
+        for item in documents:
+            yield _parse_document(item)
+        return
+
+    window = window or workers * 4
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        for item in documents:
+            pending.append(executor.submit(_parse_document, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def validate_record(patient_data, schema):
+    """Return the list of problems that keep a parsed record from being scored by a model with `schema`"""
+    _, problems = schema.validate(patient_data)
+    return problems
+
+
+def ingest(source, model, schema, workers=INGEST_WORKERS):
+    """
+    Parse, validate and score every document in `source`
+
+    Parameters:
+    -----------
+    source : str, Path or file-like
+        Zip file (path or file object) or directory of .docx files
+    model : fitted estimator
+        Model with predict_proba, e.g. from backend.model_registry
+    schema : FeatureSchema
+        Input columns, dtypes and ranges of that model (LoadedModel.schema)
+    workers : int
+        Parser processes; 1 parses in the calling process
+
+    Returns:
+    --------
+    results : list of dict
+        One row per scored document (file, features, prediction, confidence, risk_score)
+    errors : list of dict
+        One row per rejected document (file, error)
+    timings : dict
+        Seconds spent per stage plus document counts and throughput
+    """
+    import pandas as pd
+
+    timings = {}
+    start = time.perf_counter()
+    parsed = list(parse_documents(iter_documents(source), workers))
+    timings['parse_seconds'] = time.perf_counter() - start
+
+    stage = time.perf_counter()
+    valid, errors = [], []
+    for name, patient_data, parse_errors in parsed:
+        problems = validate_record(patient_data, schema)
+        if problems:
+            # Parser warnings explain missing fields better than "Missing required field: x"
+            errors.append({'file': name, 'error': "; ".join(parse_errors or problems)})
+        else:
+            valid.append((name, {feature: patient_data[feature] for feature in schema.names}))
+    timings['validate_seconds'] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    results = []
+    if valid:
+        X = pd.DataFrame([record for _, record in valid], columns=schema.names)
+        probabilities = model.predict_proba(X)
+        for (name, record), proba in zip(valid, probabilities):
+            results.append({
+                'file': name,
+                **record,
+                'prediction': int(proba.argmax()),
+                'confidence': float(proba.max()),
+                'risk_score': float(proba[1]),
+            })
+    timings['score_seconds'] = time.perf_counter() - stage
+
+    timings['documents'] = len(parsed)
+    timings['scored'] = len(results)
+    timings['rejected'] = len(errors)
+    timings['total_seconds'] = time.perf_counter() - start
+    timings['documents_per_second'] = len(parsed) / timings['total_seconds'] if timings['total_seconds'] else 0.0
+    return results, errors, timings
+
+
+def write_csv(results, errors, path, schema):
+    """Write results (with the columns of `schema`) to `path` and errors to `<stem>_errors.csv` next to it"""
+    path = Path(path)
+    columns = ['file', *schema.names, 'prediction', 'confidence', 'risk_score']
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(results)
+
+    errors_path = path.with_name(f"{path.stem}_errors.csv")
+    with open(errors_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=['file', 'error'])
+        writer.writeheader()
+        writer.writerows(errors)
+    return path, errors_path
+
+
+def _init_ingest_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_errors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            source TEXT,
+            filename TEXT,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_batches (
+            batch_id TEXT PRIMARY KEY, -- one row per written upload, so a retried job writes nothing twice
+            source TEXT,
+            scored INTEGER,
+            rejected INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def written_batch(batch_id, db_path="hospital.db"):
+    """The ingest_batches row for an upload that has already been written, or None"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        _init_ingest_tables(conn)
+        row = conn.execute('SELECT * FROM ingest_batches WHERE batch_id = ?', (batch_id,)).fetchone()
+        return dict(row) if row is not None else None
+    finally:
+        conn.close()
+
+
+def write_db(results, errors, user_id, schema, db_path="hospital.db", source=None, batch_id=None):
+    """
+    Insert results into predictions and errors into ingest_errors
+
+    patient_data holds the columns of `schema`, the model the rows were scored with.
+    Everything is written in one transaction. With a batch_id the transaction
+    also records the batch in ingest_batches, and a batch that is already there
+    is not written again (returns False).
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    _init_ingest_tables(conn)
+    conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    if batch_id is not None:
+        if conn.execute('SELECT 1 FROM ingest_batches WHERE batch_id = ?', (batch_id,)).fetchone():
+            conn.rollback()
+            conn.close()
+            return False
+        conn.execute('INSERT INTO ingest_batches (batch_id, source, scored, rejected) VALUES (?, ?, ?, ?)',
+                     (batch_id, source, len(results), len(errors)))
+    conn.executemany(
+        'INSERT INTO predictions (user_id, patient_data, prediction_result, confidence_score) VALUES (?, ?, ?, ?)',
+        [(user_id, json.dumps({feature: row[feature] for feature in schema.names}),
+          row['prediction'], row['confidence']) for row in results]
+    )
+    conn.executemany(
+        'INSERT INTO ingest_errors (user_id, source, filename, error) VALUES (?, ?, ?, ?)',
+        [(user_id, source, row['file'], row['error']) for row in errors]
+    )
+    conn.commit()
+    conn.close()
+    return True
+
+
+def spool_upload(stream, upload_dir=None):
+    """
+    Save an uploaded zip for an ingest job and return its path
+
+    Raises:
+    -------
+    zipfile.BadZipFile
+        The upload is not a zip archive (nothing is kept)
+    """
+    upload_dir = Path(upload_dir or config.INGEST_UPLOAD_DIR)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    path = upload_dir / f"{uuid.uuid4().hex}.zip"
+    with open(path, "wb") as f:
+        while True:
+            chunk = stream.read(1024 * 1024)
+            if not chunk:
+                break
+            f.write(chunk)
+    if not zipfile.is_zipfile(path):
+        path.unlink()
+        raise zipfile.BadZipFile(f"{path.name} is not a zip archive")
+    return path
+
+
+def run_ingest_job(payload, db_path="hospital.db"):
+    """
+    Job handler for spooled uploads: {'path', 'source', 'user_id'} -> results, errors, timings
+
+    Parses in the job thread: forking a process pool from a threaded web
+    worker is not safe, and the job is off the request path anyway. The upload
+    is removed once its rows are written. The spooled file name identifies the
+    batch, so a retried or reclaimed job never writes the same upload twice.
+    """
+    from backend.model_registry import registry
+
+    path = Path(payload['path'])
+    batch_id = path.stem
+    if not path.exists():
+        # An earlier attempt wrote the batch and removed the upload before it could finish
+        batch = written_batch(batch_id, db_path)
+        if batch is None:
+            raise FileNotFoundError(f"Upload {path.name} is gone and was never written")
+        return {'results': [], 'errors': [], 'already_written': True,
+                'timings': {'documents': batch['scored'] + batch['rejected'], 'scored': batch['scored'],
+                            'rejected': batch['rejected']}}
+
+    # Scoring a whole archive: the batch model, dropped with this job (not the registry's copy)
+    served = registry.get_served()
+    results, errors, timings = ingest(path, served.batch_model(), served.schema, workers=1)
+    stage = time.perf_counter()
+    written = write_db(results, errors, payload['user_id'], served.schema, db_path,
+                       source=payload.get('source'), batch_id=batch_id)
+    timings['write_seconds'] = time.perf_counter() - stage
+    discard_upload(payload)
+    return {'results': results, 'errors': errors, 'timings': timings, 'already_written': not written}
+
+
+def discard_upload(payload):
+    """Remove the spooled upload of an ingest job (after it was written, or once the job is dead)"""
+    Path(payload['path']).unlink(missing_ok=True)
+
+
+def format_timings(timings):
+    return (f"{timings['documents']} documents ({timings['scored']} scored, {timings['rejected']} rejected) "
+            f"in {timings['total_seconds']:.2f}s - {timings['documents_per_second']:.1f} docs/s\n"
+            f"  parse    {timings['parse_seconds']:.3f}s\n"
+            f"  validate {timings['validate_seconds']:.3f}s\n"
+            f"  score    {timings['score_seconds']:.3f}s\n"
+            f"  write    {timings.get('write_seconds', 0.0):.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk DOCX ingestion")
+    parser.add_argument("source", help="zip file or directory of .docx forms")
+    parser.add_argument("--out", help="results CSV (errors go to <name>_errors.csv)")
+    parser.add_argument("--db", help="write to this database instead (e.g. hospital.db)")
+    parser.add_argument("--user-id", type=int, help="owner of the predictions when writing to --db")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="parser processes")
+    args = parser.parse_args()
+
+    if args.db and args.user_id is None:
+        parser.error("--user-id is required with --db")
+
+    from backend.model_registry import registry
+    served = registry.get_served()
+
+    results, errors, timings = ingest(args.source, served.batch_model(), served.schema, args.workers)
+
+    stage = time.perf_counter()
+    if args.db:
+        write_db(results, errors, args.user_id, served.schema, args.db, source=str(args.source))
+        destination = args.db
+    else:
+        out = args.out or f"{Path(args.source).stem}_results.csv"
+        destination = ", ".join(str(p) for p in write_csv(results, errors, out, served.schema))
+    timings['write_seconds'] = time.perf_counter() - stage
+
+    print(format_timings(timings))
+    print(f"Written to {destination}")
+    for error in errors:
+        print(f"  {error['file']}: {error['error']}")
+
+
+if __name__ == "__main__":
+    main()
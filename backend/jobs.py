@@ -0,0 +1,355 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import config
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds JOB_MAX_QUEUED pending jobs."""
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue with a small pool of worker threads.
+
+    Slow work (Ollama explanations, 3D rendering, bulk DOCX ingestion) is submitted as a job and
+    the request returns straight away with the job id. Jobs are claimed with
+    an atomic UPDATE, so several gunicorn workers can share one queue file.
+    Failed jobs are retried with exponential backoff and moved to the 'dead'
+    status (the dead-letter set) once JOB_MAX_ATTEMPTS is reached. A 'running'
+    job whose lease expires (worker crashed) is picked up again, or moved to
+    'dead' when that crash used up its last attempt. While a handler runs its
+    worker renews the lease every lease_seconds / 3, so a long job is not
+    reclaimed, and a worker that did lose its lease cannot overwrite the
+    outcome of the attempt that replaced it (the attempt number is the claim).
+    """
+
+    def __init__(self, db_path=None, workers=None, max_attempts=None,
+                 retry_backoff=None, max_queued=None, lease_seconds=None):
+        self.db_path = db_path or config.JOB_QUEUE_DB
+        self.workers = workers or config.JOB_WORKERS
+        self.max_attempts = max_attempts or config.JOB_MAX_ATTEMPTS
+        self.retry_backoff = retry_backoff if retry_backoff is not None else config.JOB_RETRY_BACKOFF
+        self.max_queued = max_queued or config.JOB_MAX_QUEUED
+        self.lease_seconds = lease_seconds or config.JOB_LEASE_SECONDS
+        self.handlers = {}
+        self.dead_handlers = {}
+        self._wakeup = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                user_id INTEGER,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued', -- 'queued', 'running', 'done', 'dead'
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                available_at REAL NOT NULL,
+                started_at REAL,
+                heartbeat_at REAL, -- lease renewed by the running worker
+                finished_at REAL
+            )
+        ''')
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+        if 'heartbeat_at' not in columns:  # queue files created before leases were renewed
+            conn.execute('ALTER TABLE jobs ADD COLUMN heartbeat_at REAL')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, available_at)')
+        conn.commit()
+        conn.close()
+
+    def register(self, kind, handler, on_dead=None):
+        """
+        Register handler(payload) -> JSON-serializable result for a job kind.
+
+        on_dead(payload), if given, runs once when a job of this kind is moved
+        to 'dead', e.g. to remove files that only its retries needed.
+        """
+        self.handlers[kind] = handler
+        if on_dead is not None:
+            self.dead_handlers[kind] = on_dead
+        return handler
+
+    def _dead_lettered(self, jobs):
+        for job in jobs:
+            on_dead = self.dead_handlers.get(job['kind'])
+            if on_dead is None:
+                continue
+            try:
+                on_dead(json.loads(job['payload']))
+            except Exception as e:
+                print(f"Job {job['id']} dead-letter hook failed: {type(e).__name__}: {e}")
+
+    def submit(self, kind, payload, user_id=None):
+        """Enqueue a job and return its id."""
+        if kind not in self.handlers:
+            raise ValueError(f'Unknown job kind: {kind}')
+
+        conn = self._connect()
+        try:
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                raise QueueFullError(f'Job queue is full ({queued} pending)')
+
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            conn.execute('INSERT INTO jobs (id, kind, user_id, payload, created_at, available_at) VALUES (?, ?, ?, ?, ?, ?)',
+                         (job_id, kind, user_id, json.dumps(payload), now, now))
+            conn.commit()
+        finally:
+            conn.close()
+
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id):
+        """Return the job as a dict (payload/result decoded), or None."""
+        conn = self._connect()
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def _claim(self):
+        now = time.time()
+        conn = self._connect()
+        dead = []  # hooks run only once the transaction that marked them is committed
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            # Expired leases on their last attempt (the job keeps crashing its worker) are dead
+            expired = conn.execute('''
+                SELECT id, kind, payload FROM jobs
+                WHERE status = 'running' AND COALESCE(heartbeat_at, started_at) <= ? AND attempts >= ?
+            ''', (now - self.lease_seconds, self.max_attempts)).fetchall()
+            conn.executemany("UPDATE jobs SET status = 'dead', error = COALESCE(error, 'Lease expired'), finished_at = ? "
+                             "WHERE id = ?", [(now, job['id']) for job in expired])
+            row = conn.execute('''
+                SELECT id FROM jobs
+                WHERE (status = 'queued' AND available_at <= ?)
+                   OR (status = 'running' AND COALESCE(heartbeat_at, started_at) <= ? AND attempts < ?)
+                ORDER BY available_at
+                LIMIT 1
+            ''', (now, now - self.lease_seconds, self.max_attempts)).fetchone()
+            if row is None:
+                conn.commit()
+                dead = expired
+                return None
+            conn.execute("UPDATE jobs SET status = 'running', started_at = ?, heartbeat_at = ?, attempts = attempts + 1 "
+                         "WHERE id = ?", (now, now, row['id']))
+            conn.commit()
+            dead = expired
+            job = conn.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone()
+            return dict(job)
+        finally:
+            conn.close()
+            self._dead_lettered(dead)
+
+    def _renew(self, job):
+        """Extend the lease of a claimed job; False once another attempt owns it"""
+        conn = self._connect()
+        try:
+            renewed = conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running' AND attempts = ?",
+                                   (time.time(), job['id'], job['attempts'])).rowcount
+            conn.commit()
+            return renewed == 1
+        finally:
+            conn.close()
+
+    def _heartbeat(self, job, done):
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if not self._renew(job):
+                    return
+            except sqlite3.Error as e:
+                print(f"Job queue heartbeat error: {type(e).__name__}: {e}")
+
+    def _finish(self, job, result_json=None, error=None):
+        """Record the outcome of an attempt; False if the lease was lost to another attempt"""
+        now = time.time()
+        # Only the attempt that holds the claim may finish the job
+        owner = " AND status = 'running' AND attempts = ?"
+        conn = self._connect()
+        if error is None:
+            cursor = conn.execute("UPDATE jobs SET status = 'done', result = ?, error = NULL, finished_at = ? "
+                                  "WHERE id = ?" + owner, (result_json, now, job['id'], job['attempts']))
+        elif job['attempts'] >= self.max_attempts:
+            cursor = conn.execute("UPDATE jobs SET status = 'dead', error = ?, finished_at = ? WHERE id = ?" + owner,
+                                  (error, now, job['id'], job['attempts']))
+        else:
+            retry_at = now + self.retry_backoff * (2 ** (job['attempts'] - 1))
+            cursor = conn.execute("UPDATE jobs SET status = 'queued', error = ?, available_at = ? WHERE id = ?" + owner,
+                                  (error, retry_at, job['id'], job['attempts']))
+        conn.commit()
+        conn.close()
+        if cursor.rowcount != 1:
+            return False
+        if error is not None and job['attempts'] >= self.max_attempts:
+            self._dead_lettered([job])
+        return True
+
+    def run_once(self):
+        """Claim and run a single job; returns False when nothing was ready."""
+        job = self._claim()
+        if job is None:
+            return False
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), name=f"job-heartbeat-{job['id'][:8]}",
+                                     daemon=True)
+        heartbeat.start()
+        try:
+            handler = self.handlers[job['kind']]
+            # Serialized here so a result that is not JSON counts as a failed attempt
+            result_json = json.dumps(handler(json.loads(job['payload'])))
+        except Exception as e:
+            outcome = {'error': f'{type(e).__name__}: {e}'}
+        else:
+            outcome = {'result_json': result_json}
+        finally:
+            done.set()
+            heartbeat.join()
+        if not self._finish(job, **outcome):
+            print(f"Job {job['id']} attempt {job['attempts']} lost its lease; outcome discarded")
+        return True
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                worked = self.run_once()
+            except Exception as e:
+                # Never let one bad job or a locked database end the worker thread
+                print(f"Job queue error: {type(e).__name__}: {e}")
+                worked = False
+            if not worked:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=1.0)
+
+    def start(self):
+        """Start the worker threads in this process (again, after a fork)."""
+        with self._lock:
+            if self._pid == os.getpid() and self._threads:
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._worker, name=f'job-worker-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def metrics(self):
+        """Queue depth by status plus wait/run time of recently finished jobs."""
+        conn = self._connect()
+        counts = dict(conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+        oldest = conn.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        recent = conn.execute('''
+            SELECT started_at - created_at AS wait, finished_at - started_at AS run
+            FROM jobs
+            WHERE status = 'done'
+            ORDER BY finished_at DESC
+            LIMIT 500
+        ''').fetchall()
+        conn.close()
+
+        waits = sorted(r['wait'] for r in recent)
+        runs = sorted(r['run'] for r in recent)
+
+        def percentile(values, pct):
+            if not values:
+                return None
+            return values[min(len(values) - 1, int(len(values) * pct))]
+
+        return {
+            'depth': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'done': counts.get('done', 0),
+            'dead': counts.get('dead', 0),
+            'workers': self.workers,
+            'oldest_queued_seconds': time.time() - oldest if oldest else 0.0,
+            'wait_seconds': {'p50': percentile(waits, 0.5), 'p95': percentile(waits, 0.95)},
+            'run_seconds': {'p50': percentile(runs, 0.5), 'p95': percentile(runs, 0.95)},
+        }
+
+
+def _explanation_job(payload):
+    from src.utils.ollama_integration_improved import OllamaClinicalAssistant
+    from src.utils.explanation_cache import get_explanation_cache
+
+    assistant = OllamaClinicalAssistant(cache=get_explanation_cache())
+    return {
+        'explanation': assistant.generate_explanation(
+            payload['patient_data'], payload['risk_score'], payload['prediction']
+        )
+    }
+
+
+def _visualization_job(payload):
+    from src.utils.visualization_3d_fixed import get_heart_params
+    from src.utils.heart3d_component import viewer_embed_html
+
+    # The viewer page is static; the job only produces its parameters
+    params = get_heart_params(payload['risk_score'], payload['patient_data'])
+    return {'params': params, 'html': viewer_embed_html(params)}
+
+
+def _ingest_job(payload):
+    from backend.ingest import run_ingest_job
+
+    return run_ingest_job(payload)
+
+
+def _ingest_dead(payload):
+    from backend.ingest import discard_upload
+
+    discard_upload(payload)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Process-wide queue, created on first use (never in a pre-fork master)."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                queue = JobQueue()
+                queue.register('explanation', _explanation_job)
+                queue.register('visualization', _visualization_job)
+                queue.register('ingest', _ingest_job, on_dead=_ingest_dead)
+                _queue = queue
+    return _queue
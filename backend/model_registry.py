@@ -0,0 +1,161 @@
+import threading
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the prediction model and its feature metadata.
+
+    Loading happens once (lazily, or eagerly through warm()) and is guarded by a
+    lock so threaded workers never unpickle the forest twice. The prediction
+    stack (joblib, pandas, sklearn) is only imported on first load. When the app is
+    preloaded before forking, every worker inherits the same warm copy.
+
+    The model comes from the promoted version of the model store
+    (src/models/model_store.py), verified against its manifest; model_hash
+    identifies the version being served. Each lookup stats the store's
+    `current` pointer and loads the new version once it has moved, so a
+    promotion is picked up without a restart (SIGHUP still reloads eagerly).
+    The served version is one LoadedModel reference, replaced in a single
+    assignment: a request thread sees the old version or the new one, never
+    the model of one with the feature names of the other.
+
+    Other models promoted to a store channel (current.<name>) are served side by
+    side through get_served(name), each with the feature schema it was trained on,
+    and are reloaded the same way when their pointer moves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.served = None  # LoadedModel of the default model
+        self._pointer = None  # stat of `current` when `served` was loaded
+        self._channels = {}  # channel name -> (pointer stat, LoadedModel)
+        self.ready = False
+
+    # Read-only views of the served version
+    @property
+    def model(self):
+        return self.served.model if self.served else None
+
+    @property
+    def feature_names(self):
+        return self.served.feature_names if self.served else None
+
+    @property
+    def feature_importances(self):
+        return self.served.feature_importances if self.served else None
+
+    @property
+    def metrics(self):
+        return self.served.metrics if self.served else None
+
+    @property
+    def model_hash(self):
+        return self.served.hash if self.served else None
+
+    @staticmethod
+    def _store():
+        # Imported here so processes that never predict (admin-only workers,
+        # init_db from the CLI) don't pay for joblib/sklearn at startup
+        from src.models.model_store import get_store
+
+        return get_store()
+
+    @staticmethod
+    def _pointer_stamp(store, channel=None):
+        try:
+            stat = store.pointer_path(channel).stat()
+        except FileNotFoundError:
+            return None
+        # promote() os.replace()s the pointer, so a new inode marks a move even
+        # when two promotions land within the filesystem's mtime resolution
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _load(self, store):
+        pointer = self._pointer_stamp(store)
+        loaded = store.load()
+        self._channels = {}
+        self._pointer = pointer
+        self.served = loaded
+        return loaded
+
+    def get(self):
+        """Return (model, feature_names) of one version, loading it on first use."""
+        served = self.get_served()
+        return served.model, served.feature_names
+
+    def get_served(self, name=None):
+        """
+        Return the LoadedModel (model, schema, hash, metrics) serving a request
+
+        Parameters:
+        -----------
+        name : str, optional
+            Store channel to serve; None (or the default model's own name) is the default model
+
+        Raises:
+        -------
+        UnknownModelError
+            Nothing has been promoted to that channel
+        """
+        store = self._store()
+        served = self.served
+        if served is None or self._pointer_stamp(store) != self._pointer:
+            with self._lock:
+                if self.served is None:
+                    self._load(store)
+                elif self._pointer_stamp(store) != self._pointer:
+                    try:
+                        self._load(store)
+                    except Exception as e:
+                        # Keep serving the old version; try again when the pointer next moves
+                        self._pointer = self._pointer_stamp(store)
+                        print(f"Model reload failed, keeping {self.served.hash}: {e}")
+                served = self.served
+        if name is None or name == served.name:
+            return served
+
+        pointer = self._pointer_stamp(store, name)
+        cached = self._channels.get(name)
+        if cached is None or cached[0] != pointer:
+            with self._lock:
+                cached = self._channels.get(name)
+                if cached is None or cached[0] != pointer:
+                    cached = (pointer, store.load(channel=name))
+                    self._channels[name] = cached
+        return cached[1]
+
+    def served_models(self):
+        """Summary of the default model and every promoted channel"""
+        default = self.get_served()
+        models = [default]
+        for channel in self._store().channels():
+            if channel != default.name:
+                models.append(self.get_served(channel))
+        return [{
+            'name': served.name,
+            'hash': served.hash,
+            'version': served.manifest.get('version'),
+            'default': served is default,
+            'schema': served.schema.name,
+            'features': served.schema.names,
+            'metrics': served.metrics,
+        } for served in models]
+
+    def warm(self):
+        """Load the model and run one dummy prediction so the first request is fast."""
+        import pandas as pd
+
+        model, feature_names = self.get()
+        sample = pd.DataFrame([[0] * len(feature_names)], columns=feature_names)
+        model.predict_proba(sample)
+        self.ready = True
+        return self
+
+    def reload(self):
+        """Load the currently promoted version; the old one keeps serving if this fails."""
+        with self._lock:
+            self._load(self._store())
+        return self.warm()
+
+
+registry = ModelRegistry()
@@ -0,0 +1,121 @@
+import gzip
+import json
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+import config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional speedup
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'application/javascript',
+    'text/javascript',
+}
+
+
+def _numpy_default(obj):
+    """Convert NumPy scalars/arrays (e.g. predict_proba output) to plain Python."""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class CompactJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that always emits compact output and understands NumPy values.
+    Uses orjson when it is installed and falls back to the standard library.
+    """
+
+    compact = True
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs.get('indent'):
+            try:
+                return orjson.dumps(
+                    obj,
+                    default=_numpy_default,
+                    option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+                ).decode('utf-8')
+            except TypeError:
+                # Fall through to the stdlib encoder for types orjson rejects
+                pass
+        kwargs.setdefault('default', self._default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    @staticmethod
+    def _default(obj):
+        try:
+            return _numpy_default(obj)
+        except TypeError:
+            return DefaultJSONProvider.default(obj)
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    candidates = ['gzip']
+    if brotli is not None:
+        candidates.insert(0, 'br')
+    best = None
+    best_quality = 0
+    for encoding in candidates:
+        quality = accepted[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_response(response):
+    """Negotiate br/gzip for bodies above config.COMPRESSION_MIN_SIZE (streams are left alone)."""
+    if (response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    body = response.get_data()
+    if len(body) < config.COMPRESSION_MIN_SIZE:
+        return response
+
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=config.COMPRESSION_LEVEL)
+    else:
+        compressed = gzip.compress(body, compresslevel=config.COMPRESSION_LEVEL, mtime=0)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    response.headers['Content-Length'] = len(compressed)
+    return response
+
+
+def init_app(app):
+    """Install the compact JSON provider and the compression hook on the app."""
+    app.json_provider_class = CompactJSONProvider
+    app.json = CompactJSONProvider(app)
+    app.after_request(compress_response)
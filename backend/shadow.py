@@ -0,0 +1,327 @@
+"""
+Shadow and canary model serving
+The predict routes answer from one primary model. Other models promoted to a
+store channel (see src/models/model_store.py) can run next to it:
+
+- Shadows (SHADOW_MODELS) score the same payload after the response has been
+  computed. The route only does a put_nowait of the payload on a bounded
+  in-memory queue. A single background thread scores them in batches and writes the
+  primary/shadow probabilities, their delta and whether the predicted classes
+  disagree to the shadow_results table. When the queue is full the sample is
+  dropped (and counted) rather than slowing the request.
+- A canary (CANARY_MODEL) answers CANARY_PERCENT of the traffic as the
+  primary. Routing hashes the user id, so a user keeps seeing the same model.
+  For canary requests the default model is scored as a shadow, and for the
+  rest the canary is. So every request is compared both ways.
+
+A request that names a model explicitly (the 'model' field) gets that model and
+is neither routed nor shadowed. SHADOW_SAMPLE_PERCENT limits how many requests
+are shadowed when shadow scoring competes with the web threads for CPU.
+"""
+import hashlib
+import queue
+import random
+import sqlite3
+import threading
+import time
+
+import config
+
+BATCH_SIZE = 256  # payloads scored per predict_proba call and written per transaction
+BATCH_WAIT = 0.5  # seconds the scorer waits to fill a batch
+CANARY_RETRY = 30.0  # seconds before an unavailable canary is looked up again
+
+
+class ShadowScorer:
+    """
+    Canary routing plus asynchronous shadow scoring for the predict routes
+
+    Parameters:
+    -----------
+    registry : ModelRegistry, optional
+        Where the models come from (default backend.model_registry.registry)
+    db_path : str, optional
+        Database for shadow_results (default config.SHADOW_DB_PATH)
+    shadows : list of str, optional
+        Store channels scored off the request path (default config.SHADOW_MODELS)
+    canary : str, optional
+        Store channel serving a share of the traffic (default config.CANARY_MODEL)
+    canary_percent : float, optional
+        Share of users routed to the canary, 0-100 (default config.CANARY_PERCENT)
+    sample_percent : float, optional
+        Share of requests that are shadowed, 0-100 (default config.SHADOW_SAMPLE_PERCENT)
+    max_queued : int, optional
+        Pending payloads before new ones are dropped (default config.SHADOW_MAX_QUEUED)
+    """
+
+    def __init__(self, registry=None, db_path=None, shadows=None, canary=None, canary_percent=None,
+                 sample_percent=None, max_queued=None):
+        if registry is None:
+            from backend.model_registry import registry
+        self.registry = registry
+        self.db_path = db_path or config.SHADOW_DB_PATH
+        self.shadows = list(config.SHADOW_MODELS if shadows is None else shadows)
+        self.canary = config.CANARY_MODEL if canary is None else canary
+        self.canary_percent = config.CANARY_PERCENT if canary_percent is None else canary_percent
+        self.sample_percent = config.SHADOW_SAMPLE_PERCENT if sample_percent is None else sample_percent
+        self._queue = queue.Queue(maxsize=max_queued or config.SHADOW_MAX_QUEUED)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._canary_error = None
+        self._canary_retry_at = 0.0
+        self.dropped = 0
+        self._db_ready = False
+
+    def _connect(self):
+        # The table is created on first use, so processes without shadows never touch the database
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._db_ready:
+            self._init_db(conn)
+            self._db_ready = True
+        return conn
+
+    def _init_db(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS shadow_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                primary_model TEXT,
+                primary_hash TEXT,
+                primary_probability REAL,
+                shadow_model TEXT,
+                shadow_hash TEXT,
+                shadow_probability REAL, -- NULL when the shadow could not score the payload
+                delta REAL, -- shadow_probability - primary_probability
+                disagree INTEGER, -- 1 when the predicted classes differ
+                error TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_shadow_results_model ON shadow_results (shadow_model, created_at)')
+        conn.commit()
+
+    # Request path ----------------------------------------------------------
+
+    def in_canary(self, key=None):
+        """Whether a request (keyed by user id; random without one) goes to the canary"""
+        if not self.canary or self.canary_percent <= 0:
+            return False
+        if key is None:
+            return random.random() * 100 < self.canary_percent
+        bucket = int(hashlib.sha1(str(key).encode()).hexdigest()[:8], 16) % 10000
+        return bucket < self.canary_percent * 100
+
+    def _canary_available(self):
+        if self._canary_error is not None and time.monotonic() < self._canary_retry_at:
+            return False
+        try:
+            self.registry.get_served(self.canary)
+        except (LookupError, FileNotFoundError) as e:
+            # Missing canary: keep serving the default model, say so once and look
+            # again every CANARY_RETRY seconds in case the channel gets promoted
+            if self._canary_error is None:
+                print(f"Canary model '{self.canary}' unavailable, routing all traffic to the default model: {e}")
+            self._canary_error = str(e)
+            self._canary_retry_at = time.monotonic() + CANARY_RETRY
+            return False
+        if self._canary_error is not None:
+            print(f"Canary model '{self.canary}' available again, routing {self.canary_percent}% of traffic to it")
+            self._canary_error = None
+        return True
+
+    def route(self, requested=None, key=None):
+        """
+        Pick the primary model and the shadows for one request
+
+        Returns:
+        --------
+        name : str or None
+            Channel to answer from (None = the default model)
+        shadows : list
+            Channels to score off the request path (None in the list = the default model)
+        """
+        if requested:
+            return requested, []
+        name, shadows = None, list(self.shadows)
+        if self.canary and self.canary_percent > 0 and self._canary_available():
+            if self.in_canary(key):
+                name, shadows = self.canary, [None] + shadows
+            else:
+                shadows.append(self.canary)
+        shadows = [shadow for i, shadow in enumerate(shadows) if shadow != name and shadow not in shadows[:i]]
+        if shadows and self.sample_percent < 100 and random.random() * 100 >= self.sample_percent:
+            shadows = []
+        return name, shadows
+
+    def submit(self, payload, served, probability, shadows):
+        """Queue a scored payload for its shadows; never blocks (returns False if dropped)"""
+        if not shadows:
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait((time.time(), dict(payload), served.name, served.hash, float(probability),
+                                    tuple(shadows)))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    # Background scoring ----------------------------------------------------
+
+    def score(self, items):
+        """
+        shadow_results rows for a batch of queued payloads
+
+        Each shadow scores all its payloads with one predict_proba call, which costs
+        about the same as scoring a single row. That keeps the scoring thread's share
+        of the CPU (and of the GIL) small next to the request threads.
+        """
+        import pandas as pd
+
+        by_shadow = {}
+        for item in items:
+            for name in item[5]:
+                by_shadow.setdefault(name, []).append(item)
+
+        rows = []
+
+        def failed(item, name, model_hash, error):
+            created_at, _, primary_name, primary_hash, primary_probability, _ = item
+            rows.append((created_at, primary_name, primary_hash, primary_probability,
+                         name, model_hash, None, None, None, error))
+
+        for name, group in by_shadow.items():
+            try:
+                served = self.registry.get_served(name)
+            except Exception as e:
+                for item in group:
+                    failed(item, name, None, f"{type(e).__name__}: {e}")
+                continue
+            scored, vectors = [], []
+            for item in group:
+                if item[3] == served.hash:
+                    continue
+                values, errors = served.schema.validate(item[1])
+                if errors:
+                    failed(item, served.name, served.hash, "schema: " + "; ".join(errors))
+                else:
+                    scored.append(item)
+                    vectors.append(values)
+            if not scored:
+                continue
+            try:
+                probabilities = served.model.predict_proba(pd.DataFrame(vectors, columns=served.schema.names))[:, 1]
+            except Exception as e:
+                for item in scored:
+                    failed(item, served.name, served.hash, f"{type(e).__name__}: {e}")
+                continue
+            for item, probability in zip(scored, probabilities):
+                created_at, _, primary_name, primary_hash, primary_probability, _ = item
+                probability = float(probability)
+                rows.append((created_at, primary_name, primary_hash, primary_probability,
+                             served.name, served.hash, probability, probability - primary_probability,
+                             int((probability >= 0.5) != (primary_probability >= 0.5)), None))
+        return rows
+
+    def _write(self, rows):
+        if not rows:
+            return
+        conn = self._connect()
+        conn.executemany('''
+            INSERT INTO shadow_results (created_at, primary_model, primary_hash, primary_probability,
+                                        shadow_model, shadow_hash, shadow_probability, delta, disagree, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+        conn.close()
+
+    def _worker(self):
+        while True:
+            # Collect for up to BATCH_WAIT seconds so shadows score batches, not single rows
+            items = [self._queue.get()]
+            deadline = time.monotonic() + BATCH_WAIT
+            while len(items) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(self.score(items))
+            except Exception as e:
+                print(f"Shadow scoring error: {e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def start(self):
+        """Start the scoring thread in this process (again, after a fork)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name='shadow-scorer', daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Block until every queued payload has been scored and written"""
+        self._queue.join()
+
+    # Reporting -------------------------------------------------------------
+
+    def summary(self, recent=20):
+        """Per-shadow agreement statistics plus the most recent disagreements"""
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        models = conn.execute('''
+            SELECT shadow_model, primary_model,
+                   COUNT(*) AS scored,
+                   SUM(error IS NOT NULL) AS errors,
+                   SUM(disagree) AS disagreements,
+                   AVG(ABS(delta)) AS mean_abs_delta,
+                   MAX(ABS(delta)) AS max_abs_delta,
+                   AVG(delta) AS mean_delta
+            FROM shadow_results
+            GROUP BY shadow_model, primary_model
+            ORDER BY shadow_model, primary_model
+        ''').fetchall()
+        disagreements = conn.execute('''
+            SELECT created_at, primary_model, primary_probability, shadow_model, shadow_probability, delta
+            FROM shadow_results
+            WHERE disagree = 1
+            ORDER BY id DESC
+            LIMIT ?
+        ''', (recent,)).fetchall()
+        conn.close()
+
+        comparisons = []
+        for row in models:
+            row = dict(row)
+            compared = row['scored'] - row['errors']
+            row['disagreement_rate'] = row['disagreements'] / compared if compared else None
+            comparisons.append(row)
+        return {
+            'shadows': self.shadows,
+            'canary': self.canary,
+            'canary_percent': self.canary_percent,
+            'sample_percent': self.sample_percent,
+            'queue_depth': self._queue.qsize(),
+            'dropped': self.dropped,
+            'comparisons': comparisons,
+            'recent_disagreements': [dict(row) for row in disagreements],
+        }
+
+
+_shadow = None
+_shadow_lock = threading.Lock()
+
+
+def get_shadow():
+    """Process-wide scorer, created on first use (its thread starts on the first shadowed request)"""
+    global _shadow
+    if _shadow is None:
+        with _shadow_lock:
+            if _shadow is None:
+                _shadow = ShadowScorer()
+    return _shadow
@@ -1,37 +1,18 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, Response, stream_with_context
 import sqlite3
-import joblib
 import json
-import pandas as pd
-import numpy as np
+from backend.model_registry import registry
+from src.utils.risk_bands import risk_level
+from backend.jobs import get_queue, QueueFullError
 
 user_bp = Blueprint('user', __name__)
 
-# Model and feature names will be loaded when needed
-model = None
-feature_names = None
-
-
-def load_model_if_needed():
-    global model, feature_names
-    if model is None or feature_names is None:
-        try:
-            import joblib
-            # Try loading from parent directory first
-            model = joblib.load("../heart_disease_model.pkl")
-            with open("../feature_names.json", "r") as f:
-                feature_names = json.load(f)
-        except FileNotFoundError:
-            try:
-                # Try loading from root directory
-                model = joblib.load("heart_disease_model.pkl")
-                with open("feature_names.json", "r") as f:
-                    feature_names = json.load(f)
-            except FileNotFoundError:
-                print("Model files not found! Please ensure heart_disease_model.pkl and feature_names.json exist.")
-                model = None
-                feature_names = []
-    return model, feature_names
+def load_model_if_needed(name=None):
+    try:
+        return registry.get_served(name)
+    except FileNotFoundError:
+        print("Model files not found! Please ensure heart_disease_model.pkl and feature_names.json exist.")
+        return None
 
 def get_db_connection():
     conn = sqlite3.connect('hospital.db')
@@ -99,53 +80,53 @@ def predict():
                 'data': {}
             }), 401
         
-        # Load model if needed
-        current_model, current_feature_names = load_model_if_needed()
+        from backend.shadow import get_shadow
+        from src.models.feature_schema import SchemaValidationError
+        from src.models.model_store import UnknownModelError
+
+        data = request.get_json() or {}
+        # Optional slow extras run in the background job queue
+        want_explanation = bool(data.pop('explain', False))
+        want_visualization = bool(data.pop('visualize', False))
+        
+        # Load the requested model (default: the promoted one, or the canary for its share of users)
+        shadow = get_shadow()
+        name, shadows = shadow.route(data.pop('model', None), session['user_id'])
+        try:
+            served = load_model_if_needed(name)
+        except UnknownModelError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e),
+                'data': {}
+            }), 404
         
-        if not current_model:
+        if not served:
             return jsonify({
                 'status': 'error', 
                 'message': 'Model not loaded',
                 'data': {}
             }), 500
+        current_model = served.model
         
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['age', 'sex', 'cp', 'trestbps', 'chol', 'fbs', 'restecg', 'thalach', 'exang', 'oldpeak', 'slope', 'ca', 'thal']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'status': 'error', 
-                    'message': f'Missing required field: {field}',
-                    'data': {}
-                }), 400
-        
-        # Prepare input data
-        input_data = pd.DataFrame({
-            'age': [data['age']],
-            'sex': [data['sex']],
-            'cp': [data['cp']],
-            'trestbps': [data['trestbps']],
-            'chol': [data['chol']],
-            'fbs': [data['fbs']],
-            'restecg': [data['restecg']],
-            'thalach': [data['thalach']],
-            'exang': [data['exang']],
-            'oldpeak': [data['oldpeak']],
-            'slope': [data['slope']],
-            'ca': [data['ca']],
-            'thal': [data['thal']]
-        })
-        
-        # Ensure correct column order
-        input_data = input_data[current_feature_names]
+        # Validate and vectorize against the model's feature schema
+        try:
+            input_data = served.schema.frame([data])
+        except SchemaValidationError as e:
+            return jsonify({
+                'status': 'error',
+                'message': e.errors[0],
+                'data': {'errors': e.errors}
+            }), 400
         
         # Make prediction
         prediction = current_model.predict(input_data)[0]
         prediction_proba = current_model.predict_proba(input_data)[0]
         confidence = float(max(prediction_proba))
         
+        # Shadow models score the same payload off the request path
+        shadow.submit(data, served, prediction_proba[1], shadows)
+        
         # Save prediction to database
         conn = get_db_connection()
         patient_data_str = json.dumps(data)
@@ -154,6 +135,21 @@ def predict():
         conn.commit()
         conn.close()
         
+        # Queue explanation / 3D rendering; poll /api/user/jobs/<job_id> for results
+        jobs = {}
+        job_payload = {
+            'patient_data': {field: data[field] for field in served.schema.names},
+            'risk_score': float(prediction_proba[1]),
+            'prediction': int(prediction)
+        }
+        try:
+            if want_explanation:
+                jobs['explanation'] = get_queue().submit('explanation', job_payload, user_id=session['user_id'])
+            if want_visualization:
+                jobs['visualization'] = get_queue().submit('visualization', job_payload, user_id=session['user_id'])
+        except QueueFullError as e:
+            jobs['error'] = str(e)
+        
         return jsonify({
             'status': 'success',
             'message': 'Prediction completed successfully',
@@ -164,7 +160,9 @@ def predict():
                     'no_disease': float(prediction_proba[0]),
                     'has_disease': float(prediction_proba[1])
                 },
-                'risk_level': 'High' if prediction_proba[1] > 0.7 else 'Medium' if prediction_proba[1] > 0.3 else 'Low'
+                'risk_level': risk_level(prediction_proba[1]).title(),
+                'model': {'name': served.name, 'version': served.manifest.get('version'), 'hash': served.hash},
+                'jobs': jobs
             }
         })
     except Exception as e:
@@ -174,6 +172,91 @@ def predict():
             'data': {}
         }), 500
 
+@user_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    try:
+        if 'user_id' not in session:
+            return jsonify({
+                'status': 'error', 
+                'message': 'Not authenticated',
+                'data': {}
+            }), 401
+        
+        job = get_queue().get(job_id)
+        if not job or (job['user_id'] != session['user_id'] and session.get('role') != 'admin'):
+            return jsonify({
+                'status': 'error', 
+                'message': 'Job not found',
+                'data': {}
+            }), 404
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Job retrieved successfully',
+            'data': {
+                'id': job['id'],
+                'kind': job['kind'],
+                'status': job['status'],
+                'attempts': job['attempts'],
+                'result': job['result'],
+                'error': job['error'],
+                'created_at': job['created_at'],
+                'finished_at': job['finished_at']
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'data': {}
+        }), 500
+
+@user_bp.route('/predictions/<int:prediction_id>/explanation/stream', methods=['GET'])
+def stream_explanation(prediction_id):
+    try:
+        if 'user_id' not in session:
+            return jsonify({
+                'status': 'error', 
+                'message': 'Not authenticated',
+                'data': {}
+            }), 401
+        
+        conn = get_db_connection()
+        prediction = conn.execute('SELECT * FROM predictions WHERE id = ? AND user_id = ?',
+                                  (prediction_id, session['user_id'])).fetchone()
+        conn.close()
+        
+        if not prediction:
+            return jsonify({
+                'status': 'error', 
+                'message': 'Prediction not found',
+                'data': {}
+            }), 404
+        
+        from src.utils.ollama_integration_improved import OllamaClinicalAssistant
+        from src.utils.explanation_cache import get_explanation_cache
+        
+        patient_data = json.loads(prediction['patient_data'])
+        result = int(prediction['prediction_result'])
+        confidence = float(prediction['confidence_score'])
+        risk_score = confidence if result == 1 else 1 - confidence
+        tokens = OllamaClinicalAssistant(cache=get_explanation_cache()).stream_explanation(patient_data, risk_score, result)
+        
+        # Server-sent events: one JSON-encoded text chunk per event
+        def events():
+            for token in tokens:
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        
+        return Response(stream_with_context(events()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'data': {}
+        }), 500
+
 @user_bp.route('/predictions/history', methods=['GET'])
 def get_prediction_history():
     try:
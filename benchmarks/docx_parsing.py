@@ -0,0 +1,158 @@
+"""
+DOCX parsing benchmark over testing_data/*.docx
+Reports documents per second for the full parse_docx call and for the field
+extraction step alone, comparing the precompiled patterns with the original
+per-call regex scan. Results must be identical for both.
+
+Text extraction is compared separately (python-docx object model vs the
+streaming word/document.xml reader), on the sample forms and on a large
+generated form, with time and peak traced memory.
+
+Run: python -m benchmarks.docx_parsing [--repeat 20] [--large-paragraphs 5000]
+"""
+import argparse
+import io
+import re
+import time
+import tracemalloc
+from pathlib import Path
+
+from docx import Document
+
+from src.utils.docx_parser import PatientDataParser, extract_docx_text
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+TESTING_DATA = PROJECT_ROOT / "testing_data"
+
+
+class LegacyPatientDataParser(PatientDataParser):
+    """The original scan: python-docx text, three f-string patterns per keyword searched on every call"""
+
+    def _read_text(self, docx_file):
+        return self._extract_text(Document(docx_file))
+
+    def _extract_field(self, text, field, keywords):
+        for keyword in keywords:
+            patterns = [
+                rf'{keyword}\s*[:=]\s*(\d+\.?\d*)',
+                rf'{keyword}\s+(\d+\.?\d*)',
+                rf'(\d+\.?\d*)\s+{keyword}',
+            ]
+            for pattern in patterns:
+                match = re.search(pattern, text, re.IGNORECASE)
+                if match:
+                    return self._convert_value(field, float(match.group(1)))
+        # Numeric patterns missed: the categorical rules are unchanged
+        return super()._extract_field(text, field, [])
+
+
+def load_documents(directory=TESTING_DATA):
+    return {path.name: path.read_bytes() for path in sorted(Path(directory).glob("*.docx"))}
+
+
+def _docs_per_second(func, items, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            func(item)
+    return repeat * len(items) / (time.perf_counter() - start)
+
+
+def run_benchmark(repeat=20, directory=TESTING_DATA):
+    documents = load_documents(directory)
+    if not documents:
+        raise FileNotFoundError(f"No .docx files in {directory}")
+
+    parsers = {'before': LegacyPatientDataParser(), 'after': PatientDataParser()}
+    results = {name: [parser.parse_docx(io.BytesIO(data)) for data in documents.values()]
+               for name, parser in parsers.items()}
+    if results['before'] != results['after']:
+        raise RuntimeError("Precompiled parser output differs from the original scan")
+
+    # Field extraction only, on the already extracted document text
+    texts = [PatientDataParser()._extract_text(_document(data)).lower() for data in documents.values()]
+
+    report = {'documents': len(documents)}
+    for name, parser in parsers.items():
+        def extract_all(text, parser=parser):
+            for field, keywords in parser.field_mappings.items():
+                parser._extract_field(text, field, keywords)
+
+        report[name] = {
+            'parse_docs_per_second': _docs_per_second(
+                lambda data, parser=parser: parser.parse_docx(io.BytesIO(data)), list(documents.values()), repeat),
+            'extract_docs_per_second': _docs_per_second(extract_all, texts, repeat * 10),
+        }
+    return report
+
+
+def _document(data):
+    return Document(io.BytesIO(data))
+
+
+def make_large_form(paragraphs=5000, table_rows=200):
+    """A long patient record: many narrative paragraphs plus a results table"""
+    doc = Document()
+    doc.add_paragraph("Age: 58")
+    for i in range(paragraphs):
+        doc.add_paragraph(f"Visit note {i}: patient reports stable symptoms, Resting BP: {120 + i % 40}")
+    table = doc.add_table(rows=table_rows, cols=3)
+    for i, row in enumerate(table.rows):
+        row.cells[0].text = f"Lab {i}"
+        row.cells[1].text = "Cholesterol"
+        row.cells[2].text = str(180 + i % 80)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _measure(func, data, repeat):
+    tracemalloc.start()
+    func(io.BytesIO(data))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(io.BytesIO(data))
+    return {'seconds': (time.perf_counter() - start) / repeat, 'peak_mb': peak / 1e6}
+
+
+def run_extraction_benchmark(documents, large_paragraphs=5000, repeat=5):
+    """Time and peak memory of python-docx vs streaming text extraction"""
+    extractors = {
+        'python-docx': lambda f: PatientDataParser()._extract_text(Document(f)),
+        'streaming': extract_docx_text,
+    }
+    samples = {'sample form': next(iter(documents.values())),
+               f'large form ({large_paragraphs} paragraphs)': make_large_form(large_paragraphs)}
+    report = {}
+    for label, data in samples.items():
+        if extract_docx_text(io.BytesIO(data)) != extractors['python-docx'](io.BytesIO(data)):
+            raise RuntimeError(f"Streaming text differs from python-docx for the {label}")
+        report[label] = {name: _measure(func, data, repeat) for name, func in extractors.items()}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DOCX parsing benchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the testing_data documents")
+    parser.add_argument("--dir", default=str(TESTING_DATA), help="directory with .docx files")
+    parser.add_argument("--large-paragraphs", type=int, default=5000, help="size of the generated large form")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.repeat, args.dir)
+    print(f"Documents: {report['documents']}")
+    print(f"{'':<8}{'parse_docx docs/s':>20}{'field extraction docs/s':>26}")
+    for name in ('before', 'after'):
+        print(f"{name:<8}{report[name]['parse_docs_per_second']:>20.1f}{report[name]['extract_docs_per_second']:>26.1f}")
+
+    print()
+    extraction = run_extraction_benchmark(load_documents(args.dir), args.large_paragraphs)
+    print(f"{'Text extraction':<46}{'ms/doc':>10}{'peak MB':>10}")
+    for label, results in extraction.items():
+        for name, result in results.items():
+            print(f"{label + ' / ' + name:<46}{result['seconds'] * 1000:>10.2f}{result['peak_mb']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
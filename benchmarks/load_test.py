@@ -0,0 +1,403 @@
+"""
+End-to-end HTTP load test of the Flask application
+Serves main_app.app from a threaded werkzeug server inside this process,
+against a throwaway hospital.db and model store, and drives it over real HTTP
+from concurrent clients. Nothing outside the process is involved: the model is
+trained from the pipeline config into the temporary store (or --model-store
+points at an existing one) and Ollama is never called.
+
+Seeding: init_db() plus --users patients, --doctors doctors, one assignment
+per patient (round robin) and --messages chat messages spread over the
+assigned pairs. Seeded accounts share one password hash, so seeding stays fast.
+Every login still pays the full check_password_hash cost.
+
+Each client logs in as its own patient (and as the admin for admin listing),
+then loops until --duration runs out. Each iteration picks one operation,
+weighted by --mix:
+
+    login          POST /api/auth/login
+    predict        POST /api/user/predict        (writes to predictions)
+    chat_poll      GET  /api/chat/messages/<doctor>
+    conversations  GET  /api/chat/conversations
+    admin_users    GET  /api/admin/users
+
+The report has per-route throughput, error counts, p50/p95/p99/max latency
+and a latency histogram. Clients and server share one interpreter (and its
+GIL), so compare runs made with the same --clients on the same host.
+
+Run: python -m benchmarks.load_test [--clients 16] [--duration 30] [--users 200 --doctors 20 --messages 5000]
+                                    [--mix predict=2,chat_poll=6] [--think-ms 0] [--json]
+"""
+import argparse
+import bisect
+import csv
+import http.cookiejar
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PASSWORD = "loadtest123"
+ADMIN = ("admin", "admin123")  # seeded by init_db
+ROUTES = {
+    "login": "POST /api/auth/login",
+    "predict": "POST /api/user/predict",
+    "chat_poll": "GET /api/chat/messages/<id>",
+    "conversations": "GET /api/chat/conversations",
+    "admin_users": "GET /api/admin/users",
+}
+DEFAULT_MIX = {"login": 1, "predict": 2, "chat_poll": 6, "conversations": 2, "admin_users": 1}
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def parse_mix(text):
+    """'predict=2,chat_poll=6' -> {'predict': 2.0, 'chat_poll': 6.0} (operations not named get weight 0)"""
+    mix = {}
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in ROUTES:
+            raise ValueError(f"Unknown operation '{name}', expected one of {', '.join(ROUTES)}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("The traffic mix needs at least one operation with a positive weight")
+    return mix
+
+
+def train_model(store_dir, trees=None):
+    """Fit the default pipeline config into store_dir and promote it"""
+    from src.models.pipeline import TrainingPipeline, load_config
+
+    import config
+
+    cfg = load_config(config.TRAINING_CONFIG_PATH)
+    if trees:
+        cfg["model"]["params"]["n_estimators"] = trees
+    cfg["export"]["plot_importances"] = False
+    TrainingPipeline(cfg, cache_dir=Path(store_dir) / "cache", store_dir=store_dir, publish=True,
+                     verbose=False).run()
+
+
+def seed_database(users=200, doctors=20, messages=5000, seed=0):
+    """
+    Create hospital.db in the working directory and fill it
+
+    Returns:
+    --------
+    patients : list of (user_id, username, doctor_user_id)
+    """
+    from werkzeug.security import generate_password_hash
+
+    from main_app import init_db
+
+    init_db()
+    rng = random.Random(seed)
+    password_hash = generate_password_hash(PASSWORD)
+    conn = sqlite3.connect("hospital.db")
+    doctor_ids = []
+    for j in range(doctors):
+        cursor = conn.execute("INSERT INTO users (username, password_hash, role, email) VALUES (?, ?, 'doctor', ?)",
+                              (f"loaddoctor{j}", password_hash, f"loaddoctor{j}@hospital.com"))
+        doctor_ids.append(cursor.lastrowid)
+        conn.execute("INSERT INTO doctors (user_id, specialization) VALUES (?, 'Cardiology')", (cursor.lastrowid,))
+    patients = []
+    for i in range(users):
+        cursor = conn.execute("INSERT INTO users (username, password_hash, role, email) VALUES (?, ?, 'user', ?)",
+                              (f"loaduser{i}", password_hash, f"loaduser{i}@hospital.com"))
+        doctor_id = doctor_ids[i % len(doctor_ids)]
+        conn.execute("INSERT INTO assignments (user_id, doctor_id) VALUES (?, ?)", (cursor.lastrowid, doctor_id))
+        patients.append((cursor.lastrowid, f"loaduser{i}", doctor_id))
+    chats = []
+    for k in range(messages if patients else 0):
+        user_id, _, doctor_id = rng.choice(patients)
+        sender, receiver = (user_id, doctor_id) if rng.random() < 0.5 else (doctor_id, user_id)
+        chats.append((sender, receiver, f"Load test message {k}", rng.choice(("sent", "delivered", "read"))))
+    conn.executemany("INSERT INTO chats (sender_id, receiver_id, message, status) VALUES (?, ?, ?, ?)", chats)
+    conn.commit()
+    conn.close()
+    return patients
+
+
+def load_payloads(limit=None):
+    """
+    Patient records from the UCI dataset, as the predict routes receive them
+
+    Rows outside config.FEATURE_RANGES (five have ca=4) are left out: the
+    routes reject them with 400, which would show up as errors.
+    """
+    import config
+
+    with open(config.DATASET_PATH, newline="", encoding="utf-8-sig") as f:
+        rows = [{name: float(row[name]) for name in config.FEATURE_NAMES} for row in csv.DictReader(f)]
+    rows = [row for row in rows
+            if all(low <= row[name] <= high for name, (low, high) in config.FEATURE_RANGES.items() if name in row)]
+    return rows[:limit] if limit else rows
+
+
+class RouteStats:
+    """Latencies and status codes of one route (per client; merged at the end)"""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+
+    def add(self, seconds, status):
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def merge(self, other):
+        self.latencies.extend(other.latencies)
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+    def summary(self, elapsed):
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+
+        def percentile(q):
+            return latencies[min(count - 1, int(q / 100 * count))] * 1000 if count else None
+
+        histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        for seconds in latencies:
+            histogram[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, seconds * 1000)] += 1
+        return {
+            "requests": count,
+            "errors": sum(n for status, n in self.statuses.items() if not 200 <= status < 300),
+            "statuses": {str(status): n for status, n in sorted(self.statuses.items())},
+            "throughput_rps": count / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "p99_ms": percentile(99),
+            "max_ms": latencies[-1] * 1000 if count else None,
+            "histogram": histogram,
+        }
+
+
+class Client:
+    """One simulated browser: a patient session, plus an admin session for admin listing"""
+
+    def __init__(self, base_url, patient, payloads, mix, think=0.0, seed=0):
+        self.base_url = base_url
+        self.user_id, self.username, self.doctor_id = patient
+        self.payloads = payloads
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.think = think
+        self.rng = random.Random(seed)
+        self.stats = {name: RouteStats() for name in ROUTES}
+        self.deadline = 0.0
+        self.patient = self._session()
+        self.admin = self._session() if mix.get("admin_users") else None
+
+    @staticmethod
+    def _session():
+        return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def _request(self, opener, method, path, body=None):
+        """(seconds, status); HTTP errors are results too, connection failures are status 0"""
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json", "Accept-Encoding": "gzip"})
+        start = time.perf_counter()
+        try:
+            with opener.open(request, timeout=60) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        except (urllib.error.URLError, OSError):
+            status = 0
+        return time.perf_counter() - start, status
+
+    def login(self, opener=None, credentials=None):
+        username, password = credentials or (self.username, PASSWORD)
+        return self._request(opener or self.patient, "POST", "/api/auth/login",
+                             {"username": username, "password": password})
+
+    def run_operation(self, name):
+        if name == "login":
+            return self.login()
+        if name == "predict":
+            return self._request(self.patient, "POST", "/api/user/predict", self.rng.choice(self.payloads))
+        if name == "chat_poll":
+            return self._request(self.patient, "GET", f"/api/chat/messages/{self.doctor_id}")
+        if name == "conversations":
+            return self._request(self.patient, "GET", "/api/chat/conversations")
+        return self._request(self.admin, "GET", "/api/admin/users")
+
+    def run(self, ready, start):
+        # Sessions are opened before the clock starts; those logins are not measured
+        self.login()
+        if self.admin is not None:
+            self.login(self.admin, ADMIN)
+        ready.wait()
+        start.wait()
+        while time.perf_counter() < self.deadline:
+            name = self.rng.choices(self.operations, self.weights)[0]
+            self.stats[name].add(*self.run_operation(name))
+            if self.think:
+                time.sleep(self.rng.uniform(0, 2 * self.think))
+
+
+def _serve(app):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, name="load-test-server", daemon=True)
+    thread.start()
+    return server
+
+
+def run_load_test(clients=16, duration=30.0, users=200, doctors=20, messages=5000, mix=None, think_ms=0.0,
+                  model_store=None, trees=None, seed=0):
+    """
+    Seed a throwaway database, serve the app and drive it with concurrent clients
+
+    Parameters:
+    -----------
+    clients : int
+        Concurrent client threads (each logged in as its own patient, wrapping around when clients > users)
+    duration : float
+        Seconds of measured traffic
+    users, doctors, messages : int
+        Seeded patients, doctors and chat messages
+    mix : dict, optional
+        Operation -> weight (default DEFAULT_MIX)
+    think_ms : float
+        Mean pause between a client's requests (0 = closed loop at full speed)
+    model_store : str, optional
+        Existing model store to serve from (default: train one into the temporary directory)
+    trees : int, optional
+        n_estimators for the trained forest (default: the pipeline config's)
+
+    Returns:
+    --------
+    report : dict
+        Run parameters, elapsed seconds, per-route results and their total
+    """
+    import config
+    from src.models import model_store as store_module
+    from src.models.model_store import ModelStore
+
+    from backend.model_registry import registry
+    from main_app import app
+
+    mix = dict(DEFAULT_MIX if mix is None else mix)
+    # Resolved before the chdir below, so a relative --model-store means the caller's directory
+    model_store = Path(model_store).resolve() if model_store else None
+    previous_cwd, previous_store = os.getcwd(), store_module._store
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            # Every route opens 'hospital.db' relative to the working directory
+            os.chdir(workdir)
+            store_dir = model_store or Path(workdir) / "models"
+            if not model_store:
+                train_model(store_dir, trees)
+            store_module._store = ModelStore(store_dir)
+            registry.reload()
+            served = {"name": registry.served.name, "hash": registry.served.hash}
+
+            patients = seed_database(max(users, 1), max(doctors, 1), messages, seed)
+            payloads = load_payloads()
+            server = _serve(app)
+            try:
+                base_url = f"http://127.0.0.1:{server.server_port}"
+                pool = [Client(base_url, patients[i % len(patients)], payloads, mix, think_ms / 1000, seed + i)
+                        for i in range(clients)]
+                ready, start = threading.Barrier(clients + 1), threading.Event()
+                threads = [threading.Thread(target=c.run, args=(ready, start), daemon=True) for c in pool]
+                for thread in threads:
+                    thread.start()
+                ready.wait()
+                started = time.perf_counter()
+                for c in pool:
+                    c.deadline = started + duration
+                start.set()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - started
+            finally:
+                server.shutdown()
+        finally:
+            os.chdir(previous_cwd)
+            store_module._store = previous_store
+
+    routes, total = {}, RouteStats()
+    for name, route in ROUTES.items():
+        merged = RouteStats()
+        for c in pool:
+            merged.merge(c.stats[name])
+        total.merge(merged)
+        if merged.latencies:
+            routes[route] = merged.summary(elapsed)
+    return {
+        "clients": clients,
+        "duration_seconds": duration,
+        "elapsed_seconds": elapsed,
+        "seeded": {"users": users, "doctors": doctors, "messages": messages},
+        "mix": mix,
+        "think_ms": think_ms,
+        "model": served,
+        "histogram_buckets_ms": list(HISTOGRAM_BUCKETS_MS),
+        "routes": routes,
+        "total": total.summary(elapsed),
+    }
+
+
+def _print_report(report):
+    print(f"{report['clients']} clients for {report['elapsed_seconds']:.1f}s against "
+          f"{report['seeded']['users']} patients, {report['seeded']['doctors']} doctors, "
+          f"{report['seeded']['messages']} messages")
+    print(f"{'route':32s} {'requests':>9s} {'errors':>7s} {'req/s':>8s} {'p50 ms':>8s} {'p95 ms':>8s} "
+          f"{'p99 ms':>8s} {'max ms':>8s}")
+    for route, r in list(report["routes"].items()) + [("total", report["total"])]:
+        print(f"{route:32s} {r['requests']:9d} {r['errors']:7d} {r['throughput_rps']:8.1f} {r['p50_ms']:8.1f} "
+              f"{r['p95_ms']:8.1f} {r['p99_ms']:8.1f} {r['max_ms']:8.1f}")
+
+    edges = report["histogram_buckets_ms"]
+    labels = [f"<= {edge} ms" for edge in edges] + [f"> {edges[-1]} ms"]
+    for route, r in report["routes"].items():
+        print(f"\n{route}")
+        peak = max(r["histogram"]) or 1
+        for label, count in zip(labels, r["histogram"]):
+            if count:
+                print(f"  {label:>11s} {count:8d} {'#' * max(1, round(40 * count / peak))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of measured traffic")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--doctors", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX),
+                        help="operation weights, e.g. login=1,predict=2,chat_poll=6,conversations=2,admin_users=1")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a client's requests")
+    parser.add_argument("--model-store", help="serve this model store instead of training one")
+    parser.add_argument("--trees", type=int, help="n_estimators of the trained forest")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args()
+
+    report = run_load_test(args.clients, args.duration, args.users, args.doctors, args.messages, args.mix,
+                           args.think_ms, args.model_store, args.trees, args.seed)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Per-worker memory benchmark for model loading
+Starts N independent worker processes per loading mode, loads the model and
+predicts once in each, then reads /proc/self/smaps_rollup while all N are
+alive. RSS counts shared pages in every worker. PSS splits them between the
+workers that share them, so the PSS total is the real host footprint. USS is
+what each worker holds privately.
+
+Modes:
+    baseline     interpreter + numpy only (floor for comparison)
+    pickle       joblib.load of the pickled model (each worker unpickles its own copy)
+    joblib-mmap  joblib.load(mmap_mode="r"); sklearn's Tree still copies its arrays
+    arrays       MappedForest over the read-only .npy layout (np.load(mmap_mode="r"))
+
+Linux only (/proc).
+Run: python -m benchmarks.model_memory [--workers 4] [--synthetic-rows 50000 --trees 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MODES = ("baseline", "pickle", "joblib-mmap", "arrays")
+
+WORKER_SNIPPET = """
+import json, sys, warnings
+warnings.simplefilter("ignore")
+mode, directory, n_features = sys.argv[1], sys.argv[2], int(sys.argv[3])
+import numpy as np
+X = np.zeros((1, n_features))
+if mode == "pickle":
+    import joblib
+    model = joblib.load(directory + "/model.pkl")
+elif mode == "joblib-mmap":
+    import joblib
+    model = joblib.load(directory + "/model.pkl", mmap_mode="r")
+elif mode == "arrays":
+    from src.models.forest_arrays import load_forest_arrays
+    model = load_forest_arrays(directory)
+if mode != "baseline":
+    model.predict_proba(X)
+print("ready", flush=True)
+sys.stdin.readline()
+memory = {}
+with open("/proc/self/smaps_rollup") as f:
+    for line in f:
+        parts = line.split()
+        if len(parts) == 3 and parts[2] == "kB":
+            memory[parts[0].rstrip(":")] = int(parts[1])
+print(json.dumps(memory), flush=True)
+sys.stdin.readline()
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def build_artifacts(directory, synthetic_rows=0, trees=200):
+    """Write model.pkl and the forest array layout; returns the number of features"""
+    import joblib
+    from src.models.forest_arrays import export_forest_arrays
+
+    if synthetic_rows:
+        from sklearn.datasets import make_classification
+        from sklearn.ensemble import RandomForestClassifier
+
+        X, y = make_classification(n_samples=synthetic_rows, n_features=13, n_informative=8, random_state=42)
+        model = RandomForestClassifier(n_estimators=trees, random_state=42, n_jobs=-1).fit(X, y)
+    else:
+        from src.models.model_store import get_store
+
+        loaded = get_store().load(mmap=False)
+        # The raw forest: calibration is a lookup on its output, not part of the loading cost
+        model = loaded.model.model if loaded.calibration is not None else loaded.model
+    joblib.dump(model, Path(directory) / "model.pkl")
+    export_forest_arrays(model, directory)
+    return int(model.n_features_in_)
+
+
+def measure_mode(mode, directory, n_features, workers):
+    """Start `workers` processes in one mode and return their smaps_rollup readings (kB)"""
+    procs = [subprocess.Popen([sys.executable, "-c", WORKER_SNIPPET, mode, str(directory), str(n_features)],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=_env(),
+                              cwd=PROJECT_ROOT)
+             for _ in range(workers)]
+    try:
+        for proc in procs:
+            if proc.stdout.readline().strip() != "ready":
+                raise RuntimeError(f"{mode} worker failed to load the model")
+        # Everyone is loaded before anyone measures, so PSS reflects the sharing
+        readings = []
+        for proc in procs:
+            proc.stdin.write("\n")
+            proc.stdin.flush()
+            readings.append(json.loads(proc.stdout.readline()))
+        return readings
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+
+
+def run_benchmark(workers=4, synthetic_rows=0, trees=200, modes=MODES):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        n_features = build_artifacts(directory, synthetic_rows, trees)
+        sizes = {p.name: p.stat().st_size for p in Path(directory).iterdir()}
+        for mode in modes:
+            readings = measure_mode(mode, directory, n_features, workers)
+            results[mode] = {
+                "rss_mb": sum(r["Rss"] for r in readings) / len(readings) / 1024,
+                "pss_mb": sum(r["Pss"] for r in readings) / len(readings) / 1024,
+                "uss_mb": sum(r["Private_Clean"] + r["Private_Dirty"] for r in readings) / len(readings) / 1024,
+                "total_pss_mb": sum(r["Pss"] for r in readings) / 1024,
+            }
+    return {
+        "workers": workers,
+        "model": f"synthetic {synthetic_rows} rows, {trees} trees" if synthetic_rows else "promoted model",
+        "pickle_mb": sizes["model.pkl"] / 1024 / 1024,
+        "arrays_mb": sum(size for name, size in sizes.items() if name.startswith("forest.")) / 1024 / 1024,
+        "modes": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS/PSS per worker for each model loading mode")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--synthetic-rows", type=int, default=0, help="train a larger forest on synthetic data")
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.workers, args.synthetic_rows, args.trees)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['model']}: pickle {report['pickle_mb']:.1f} MB, arrays {report['arrays_mb']:.1f} MB, "
+          f"{report['workers']} workers")
+    print(f"{'mode':12s} {'RSS/worker':>11s} {'PSS/worker':>11s} {'USS/worker':>11s} {'total PSS':>10s}")
+    for mode, r in report["modes"].items():
+        print(f"{mode:12s} {r['rss_mb']:9.1f}MB {r['pss_mb']:9.1f}MB {r['uss_mb']:9.1f}MB {r['total_pss_mb']:8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Batch explanation benchmark against a local mock Ollama server
+Compares the serial generate_explanation loop with the concurrent
+generate_explanations_batch API. The mock answers /api/generate after a
+fixed latency, so the numbers show fan-out gains rather than model speed.
+
+Run: python -m benchmarks.ollama_batch [--patients 40] [--latency 0.2] [--concurrency 1 4 8]
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.utils.ollama_integration_improved import OllamaClinicalAssistant
+
+
+class MockOllama(BaseHTTPRequestHandler):
+    """Answers /api/generate after `latency` seconds (`hang` seconds for ages in `slow_ages`)"""
+    protocol_version = "HTTP/1.1"
+    latency = 0.2
+    hang = 0.0
+    slow_ages = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json({"models": [{"name": "llama3"}]})
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        age = int(re.search(r"Age: (\d+)", request["prompt"]).group(1))
+        time.sleep(self.hang if age in self.slow_ages else self.latency)
+        self._send_json({"response": f"Explanation for a {age}-year-old patient. Disclaimer included.", "done": True})
+
+
+def start_mock_ollama(latency=0.2, hang=0.0, slow_ages=()):
+    """Start a MockOllama server in a daemon thread; returns (server, base_url)"""
+    handler = type("ConfiguredMockOllama", (MockOllama,), {
+        "latency": latency, "hang": hang, "slow_ages": set(slow_ages),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def make_cases(n):
+    """n synthetic patients with distinct ages so responses can be matched"""
+    return [
+        ({'age': 30 + i, 'sex': i % 2, 'cp': i % 4, 'trestbps': 120 + i % 50, 'chol': 180 + i % 90,
+          'fbs': 0, 'restecg': i % 3, 'thalach': 170 - i % 60, 'exang': i % 2, 'oldpeak': (i % 30) / 10,
+          'slope': i % 3, 'ca': i % 4, 'thal': i % 4}, 0.2 + (i % 8) / 10, i % 2)
+        for i in range(n)
+    ]
+
+
+def run_benchmark(patients=40, latency=0.2, concurrency_levels=(1, 4, 8)):
+    server, base_url = start_mock_ollama(latency=latency)
+    try:
+        assistant = OllamaClinicalAssistant(base_url=base_url)
+        cases = make_cases(patients)
+
+        start = time.perf_counter()
+        serial = [assistant.generate_explanation(*case) for case in cases]
+        results = {'serial': {'seconds': time.perf_counter() - start}}
+
+        for concurrency in concurrency_levels:
+            start = time.perf_counter()
+            batch = assistant.generate_explanations_batch(cases, concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+            if batch != serial:
+                raise RuntimeError(f"Batch results differ from the serial loop at concurrency {concurrency}")
+            results[f'concurrency_{concurrency}'] = {'seconds': elapsed}
+
+        for result in results.values():
+            result['patients_per_second'] = patients / result['seconds']
+        return results
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch explanation benchmark")
+    parser.add_argument("--patients", type=int, default=40, help="number of patients per run")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock Ollama latency per request (s)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="concurrency levels to try")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.patients, args.latency, args.concurrency)
+    serial = results['serial']['seconds']
+    print(f"{'Mode':<16}{'Seconds':>10}{'Patients/s':>12}{'Speedup':>10}")
+    for mode, result in results.items():
+        print(f"{mode:<16}{result['seconds']:>10.2f}{result['patients_per_second']:>12.1f}"
+              f"{serial / result['seconds']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
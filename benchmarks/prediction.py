@@ -0,0 +1,233 @@
+"""
+Latency and throughput benchmark for the prediction hot path
+Times predict_proba for each scoring path at batch sizes from a single row
+(what the predict routes do) up to 100k rows (batch scoring):
+
+    dataframe   random forest pipeline fed a pandas DataFrame (the routes' schema.frame path)
+    numpy       the same pipeline fed a float64 array
+    compiled    MappedForest over the exported .npy layout (src/models/forest_arrays.py), as the
+                store serves it: the numpy traversal at every batch size, no pickle fallback
+    logistic    logistic regression fed a float64 array
+
+The models are fitted from the pipeline configs (configured params, no search)
+on the UCI training split, so every run scores the same trees. Rows are drawn
+from the test split with replacement. Each case is called until --max-seconds
+or --max-calls is reached (at least --min-calls). It reports p50/p95/p99 latency
+per call and rows/sec at the median.
+
+Results are written as JSON. With --baseline the run is compared to an earlier
+result and the process exits with status 1 when a case's p50 got slower than
+the baseline by more than --threshold. Record the baseline on the machine that
+runs the comparison, because numbers from different hosts are not comparable.
+
+Run: python -m benchmarks.prediction [--batch-sizes 1 100 10000] [--paths numpy compiled]
+                                     [--output results.json] [--save-baseline] [--baseline [PATH]]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = PROJECT_ROOT / "benchmarks" / "baselines" / "prediction.json"
+PATHS = ("dataframe", "numpy", "compiled", "logistic")
+BATCH_SIZES = (1, 10, 100, 1000, 10000, 100000)
+FOREST_CONFIG = PROJECT_ROOT / "src" / "models" / "configs" / "random_forest.json"
+LOGISTIC_CONFIG = PROJECT_ROOT / "src" / "models" / "configs" / "logistic_regression.json"
+PERCENTILES = (50, 95, 99)
+
+
+def _fit_from_config(path, directory):
+    """(fitted model, split) for a pipeline config, with its configured params"""
+    from src.models.pipeline import TrainingPipeline, load_config
+
+    cfg = load_config(path)
+    pipeline = TrainingPipeline(cfg, cache_dir=Path(directory) / "cache", store_dir=Path(directory) / "models",
+                                publish=False, verbose=False)
+    data_path = Path(cfg["data"]["path"])
+    split = pipeline.split(pipeline.load(data_path if data_path.is_absolute() else PROJECT_ROOT / data_path))
+    return pipeline.fit(split, dict(cfg["model"].get("params", {}))), split
+
+
+def build_scorers(directory, paths=PATHS):
+    """
+    One callable per scoring path, each taking a float64 matrix in schema order
+
+    Returns:
+    --------
+    scorers : dict
+        path -> predict_proba callable
+    X_pool : ndarray
+        Test split rows to draw batches from
+    models : dict
+        Description of the fitted models (recorded in the results)
+    """
+    import pandas as pd
+
+    forest, split = _fit_from_config(FOREST_CONFIG, directory)
+    columns = list(split["X_test"].columns)
+    scorers, models = {}, {"random_forest": f"{forest.steps[-1][1].n_estimators} trees"}
+    if "dataframe" in paths:
+        scorers["dataframe"] = lambda X: forest.predict_proba(pd.DataFrame(X, columns=columns))
+    if "numpy" in paths:
+        # sklearn warns that the array has no feature names; that is the point here
+        scorers["numpy"] = lambda X: forest.predict_proba(X)
+    if "compiled" in paths:
+        from src.models.forest_arrays import export_forest_arrays, load_forest_arrays
+
+        export_forest_arrays(forest, directory)
+        compiled = load_forest_arrays(directory, fallback_path=None)
+        scorers["compiled"] = compiled.predict_proba
+        models["compiled"] = f"max depth {compiled.max_depth}"
+    if "logistic" in paths:
+        logistic, _ = _fit_from_config(LOGISTIC_CONFIG, directory)
+        scorers["logistic"] = logistic.predict_proba
+        models["logistic_regression"] = f"{logistic.n_features_in_} features"
+    return scorers, split["X_test"].to_numpy(dtype=np.float64), models
+
+
+def time_case(score, X, min_calls=5, max_calls=1000, max_seconds=2.0):
+    """
+    Call score(X) repeatedly and summarize the per-call latency
+
+    Returns:
+    --------
+    result : dict
+        calls, p50_ms/p95_ms/p99_ms, mean_ms and rows_per_sec (at p50)
+    """
+    score(X)  # warm-up: first-call allocations and lazy imports
+    timings = []
+    deadline = time.perf_counter() + max_seconds
+    while len(timings) < max_calls and (len(timings) < min_calls or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        score(X)
+        timings.append(time.perf_counter() - start)
+    timings = np.asarray(timings)
+    result = {"calls": len(timings)}
+    for q in PERCENTILES:
+        result[f"p{q}_ms"] = float(np.percentile(timings, q) * 1000)
+    result["mean_ms"] = float(timings.mean() * 1000)
+    result["rows_per_sec"] = float(len(X) / np.percentile(timings, 50))
+    return result
+
+
+def run_benchmark(batch_sizes=BATCH_SIZES, paths=PATHS, min_calls=5, max_calls=1000, max_seconds=2.0, seed=0):
+    """Time every (path, batch size) case; returns the JSON-serializable report"""
+    import warnings
+
+    import sklearn
+
+    rng = np.random.RandomState(seed)
+    cases = {}
+    with tempfile.TemporaryDirectory() as directory, warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        scorers, X_pool, models = build_scorers(directory, paths)
+        for batch_size in batch_sizes:
+            X = X_pool[rng.randint(len(X_pool), size=batch_size)]
+            for path in paths:
+                cases[f"{path}/{batch_size}"] = {
+                    "path": path,
+                    "batch_size": batch_size,
+                    **time_case(scorers[path], X, min_calls, max_calls, max_seconds),
+                }
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sklearn": sklearn.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "models": models,
+        "cases": cases,
+    }
+
+
+def compare(current, baseline, threshold=0.2):
+    """
+    Cases whose p50 latency regressed against the baseline
+
+    Parameters:
+    -----------
+    current, baseline : dict
+        Reports from run_benchmark (only cases present in both are compared)
+    threshold : float
+        Allowed slowdown, as a fraction of the baseline p50 (0.2 = 20%)
+
+    Returns:
+    --------
+    comparisons : list of dict
+        case, baseline_ms, current_ms, change (fraction) and regressed, for each shared case
+    """
+    comparisons = []
+    for case, result in current["cases"].items():
+        before = baseline.get("cases", {}).get(case)
+        if before is None:
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1
+        comparisons.append({"case": case, "baseline_ms": before["p50_ms"], "current_ms": result["p50_ms"],
+                            "change": change, "regressed": change > threshold})
+    return comparisons
+
+
+def _write_json(path, data):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=list(PATHS))
+    parser.add_argument("--min-calls", type=int, default=5, help="timed calls per case, at least")
+    parser.add_argument("--max-calls", type=int, default=1000, help="timed calls per case, at most")
+    parser.add_argument("--max-seconds", type=float, default=2.0, help="time budget per case")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help=f"also write the results to {BASELINE_PATH}")
+    parser.add_argument("--baseline", nargs="?", const=str(BASELINE_PATH),
+                        help="compare against this results file (default: the saved baseline)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p50 slowdown before failing")
+    args = parser.parse_args()
+    if args.baseline and not Path(args.baseline).exists():
+        # Checked before the run: baselines are per host, so none is committed
+        parser.error(f"no baseline at {args.baseline}; record one on this machine with --save-baseline first")
+
+    report = run_benchmark(args.batch_sizes, args.paths, args.min_calls, args.max_calls, args.max_seconds)
+    if args.output:
+        _write_json(args.output, report)
+    if args.save_baseline:
+        _write_json(BASELINE_PATH, report)
+
+    print(f"{'case':18s} {'calls':>6s} {'p50 ms':>10s} {'p95 ms':>10s} {'p99 ms':>10s} {'rows/sec':>12s}")
+    for case, r in report["cases"].items():
+        print(f"{case:18s} {r['calls']:6d} {r['p50_ms']:10.3f} {r['p95_ms']:10.3f} {r['p99_ms']:10.3f} "
+              f"{r['rows_per_sec']:12,.0f}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        comparisons = compare(report, baseline, args.threshold)
+        regressions = [c for c in comparisons if c["regressed"]]
+        print(f"\nAgainst {args.baseline} ({baseline.get('created_at', 'unknown date')}), "
+              f"threshold +{args.threshold:.0%} on p50:")
+        for c in comparisons:
+            flag = "REGRESSED" if c["regressed"] else ""
+            print(f"{c['case']:18s} {c['baseline_ms']:10.3f} -> {c['current_ms']:10.3f} ms {c['change']:+8.1%} {flag}")
+        if regressions:
+            print(f"{len(regressions)} of {len(comparisons)} cases regressed")
+            sys.exit(1)
+        print(f"No regressions in {len(comparisons)} cases")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Startup benchmark for the Flask application
+Measures how long a cold process takes to import main_app and serve its
+first auth and chat requests, and which heavy modules got pulled in.
+
+Run: python -m benchmarks.startup [--runs 5] [--top 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that belong to the prediction stack and should load lazily
+HEAVY_MODULES = ['pandas', 'numpy', 'sklearn', 'joblib', 'scipy']
+
+COLD_START_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+from main_app import app, init_db
+imported = time.perf_counter()
+# Seeding hashes three default passwords; keep it out of the timed path
+init_db()
+seeded = time.perf_counter()
+client = app.test_client()
+client.post('/api/auth/login', json={'username': 'nobody', 'password': 'wrong-password'})
+client.get('/api/chat/conversations')
+served = time.perf_counter()
+print(json.dumps({
+    'import_seconds': imported - start,
+    'init_db_seconds': seeded - imported,
+    'total_seconds': (imported - start) + (served - seeded),
+    'heavy_modules': [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def _env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get('PYTHONPATH')]))
+    return env
+
+
+def measure_cold_start():
+    """Run one cold start in a fresh interpreter against a throwaway hospital.db."""
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run(
+            [sys.executable, '-c', COLD_START_SNIPPET],
+            cwd=workdir, env=_env(), capture_output=True, text=True, check=True
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_importtime(module='main_app'):
+    """Return [(cumulative_us, self_us, name), ...] from python -X importtime."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT, env=_env(), capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='number of cold starts to time')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest imports to list')
+    args = parser.parse_args()
+
+    runs = [measure_cold_start() for _ in range(args.runs)]
+    import_times = [r['import_seconds'] for r in runs]
+    total_times = [r['total_seconds'] for r in runs]
+
+    print("=" * 60)
+    print("COLD START (import main_app + first auth/chat request, excl. init_db)")
+    print("=" * 60)
+    print(f"Runs:            {args.runs}")
+    print(f"Import (median): {statistics.median(import_times) * 1000:.1f} ms")
+    print(f"Total  (median): {statistics.median(total_times) * 1000:.1f} ms")
+    print(f"Total  (max):    {max(total_times) * 1000:.1f} ms")
+    print(f"init_db (median): {statistics.median(r['init_db_seconds'] for r in runs) * 1000:.1f} ms")
+    print(f"Heavy modules:   {', '.join(runs[-1]['heavy_modules']) or 'none'}")
+
+    rows = sorted(measure_importtime(), reverse=True)
+    print("\n" + "=" * 60)
+    print(f"SLOWEST IMPORTS (cumulative, top {args.top})")
+    print("=" * 60)
+    for cumulative_us, self_us, name in rows[:args.top]:
+        print(f"{cumulative_us / 1000:9.1f} ms  {self_us / 1000:8.1f} ms self  {name}")
+
+
+if __name__ == '__main__':
+    main()
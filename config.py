@@ -25,6 +25,28 @@ MODEL_METRICS_PATH = DATA_DIR / "model_metrics.json"
 # Data Configuration
 DATASET_PATH = DATA_DIR / "heart-disease-UCI.csv"
 
+# Training pipeline (python -m src.models.pipeline)
+TRAINING_CONFIG_PATH = SRC_DIR / "models" / "configs" / "random_forest.json"
+TRAINING_CACHE_DIR = Path(os.getenv("TRAINING_CACHE_DIR", str(MODEL_DIR / "cache")))
+# Content-addressed model versions: models/<hash>/ plus the promoted models/current
+MODEL_STORE_DIR = Path(os.getenv("MODEL_STORE_DIR", str(MODEL_DIR)))
+# Serve forests from their memory-mapped array layout (shared page cache across workers)
+MODEL_MMAP = os.getenv("MODEL_MMAP", "True").lower() == "true"
+
+# Incremental training from confirmed outcomes (python -m src.models.online)
+ONLINE_DB_PATH = os.getenv("ONLINE_DB_PATH", "hospital.db")
+ONLINE_CHECKPOINT_DIR = Path(os.getenv("ONLINE_CHECKPOINT_DIR", str(MODEL_DIR / "online")))
+ONLINE_BATCH_SIZE = int(os.getenv("ONLINE_BATCH_SIZE", "64"))
+ONLINE_CHANNEL = os.getenv("ONLINE_CHANNEL", "online_sgd")  # store channel the candidate is promoted to
+
+# Shadow and canary serving (backend/shadow.py); model names are store channels
+SHADOW_MODELS = [name.strip() for name in os.getenv("SHADOW_MODELS", "").split(",") if name.strip()]
+CANARY_MODEL = os.getenv("CANARY_MODEL") or None
+CANARY_PERCENT = float(os.getenv("CANARY_PERCENT", "0"))  # share of users answered by the canary, 0-100
+SHADOW_SAMPLE_PERCENT = float(os.getenv("SHADOW_SAMPLE_PERCENT", "100"))  # share of requests shadowed
+SHADOW_MAX_QUEUED = int(os.getenv("SHADOW_MAX_QUEUED", "1000"))
+SHADOW_DB_PATH = os.getenv("SHADOW_DB_PATH", "hospital.db")
+
 # Logging Configuration
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -34,6 +56,27 @@ API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "8501"))
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
 
+# Response compression (gzip, or brotli when installed)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))  # bytes
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+
+# Production server (see gunicorn.conf.py / run_production.py)
+WEB_BIND = os.getenv("WEB_BIND", "0.0.0.0:5000")
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1)))
+WEB_THREADS = int(os.getenv("WEB_THREADS", "4"))
+WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", "60"))  # seconds
+WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))  # seconds
+
+# Background job queue (slow paths: Ollama explanations, 3D rendering)
+JOB_QUEUE_DB = os.getenv("JOB_QUEUE_DB", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # threads per process
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "2.0"))  # seconds, doubled per attempt
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+# Admin DOCX uploads wait here until their ingest job has run
+INGEST_UPLOAD_DIR = Path(os.getenv("INGEST_UPLOAD_DIR", "uploads/ingest"))
+
 # Security Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
 
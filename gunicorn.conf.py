@@ -0,0 +1,34 @@
+"""
+Gunicorn configuration for the Medical Dashboard Application
+Run with: gunicorn -c gunicorn.conf.py wsgi:app  (or python run_production.py)
+"""
+import gc
+
+import config as app_config
+
+bind = app_config.WEB_BIND
+workers = app_config.WEB_WORKERS
+threads = app_config.WEB_THREADS
+worker_class = "gthread"
+timeout = app_config.WEB_TIMEOUT
+graceful_timeout = app_config.WEB_GRACEFUL_TIMEOUT
+
+# Import wsgi.py (and so load the model) once in the master before forking
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Move the preloaded objects out of the collector's reach so garbage
+    # collection in the workers does not write to (and un-share) their pages
+    gc.freeze()
+
+
+def on_reload(server):
+    # SIGHUP: reload the model in the master, then gunicorn forks fresh
+    # workers from it and gracefully retires the old ones
+    from backend.model_registry import registry
+    try:
+        registry.reload()
+        server.log.info("Model registry reloaded, serving model %s", registry.model_hash)
+    except Exception as e:
+        server.log.error("Model reload failed, keeping previous model: %s", e)
@@ -4,6 +4,9 @@ from backend.user import user_bp
 from backend.doctor import doctor_bp
 from backend.admin import admin_bp
 from backend.chat import chat_bp
+from backend import responses, assets
+from backend.model_registry import registry
+from src.utils.risk_bands import risk_level
 import sqlite3
 import os
 
@@ -11,6 +14,11 @@ import os
 app = Flask(__name__, template_folder='templates', static_folder='static')
 app.secret_key = 'your-secret-key-change-this-in-production'
 
+# Compact JSON encoding and gzip/brotli negotiation for all responses
+responses.init_app(app)
+# Long-lived cache headers for content-hashed vendored assets
+assets.init_app(app)
+
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(user_bp, url_prefix='/api/user')
@@ -48,6 +56,19 @@ def init_db():
         )
     ''')
     
+    # Confirmed real outcomes of predictions (learned from by src/models/online.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS outcomes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            prediction_id INTEGER UNIQUE NOT NULL,
+            outcome INTEGER NOT NULL, -- 0 = no heart disease, 1 = heart disease
+            confirmed_by INTEGER,
+            confirmed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (prediction_id) REFERENCES predictions (id),
+            FOREIGN KEY (confirmed_by) REFERENCES users (id)
+        )
+    ''')
+    
     # Doctors table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS doctors (
@@ -168,49 +189,71 @@ def api_error_handler(error):
     return str(error), error.code
 
 
+# Health probes for the production launcher / load balancer
+@app.route('/healthz/live')
+def liveness():
+    return jsonify({'status': 'success', 'message': 'alive', 'data': {}})
+
+@app.route('/healthz/ready')
+def readiness():
+    # Only ready once the model has been loaded and warmed in this process
+    if not registry.ready:
+        return jsonify({
+            'status': 'error',
+            'message': 'Model not warm yet',
+            'data': {'ready': False}
+        }), 503
+    return jsonify({
+        'status': 'success',
+        'message': 'ready',
+        'data': {'ready': True}
+    })
+
+
 # Preserve original functionality from app.py
 @app.route('/predict', methods=['POST'])
 def predict():
     # This is the original prediction route
     # We'll maintain this for backward compatibility
     try:
-        import joblib
         import json
-        import pandas as pd
         
-        # Load the original model
-        model = joblib.load("heart_disease_model.pkl")
-        with open("feature_names.json", "r") as f:
-            feature_names = json.load(f)
+        from backend.shadow import get_shadow
+        from src.models.feature_schema import SchemaValidationError
+        from src.models.model_store import UnknownModelError
         
         # Get data from request
-        data = request.json
+        data = dict(request.json or {})
         
-        # Prepare input data
-        input_data = pd.DataFrame({
-            'age': [data['age']],
-            'sex': [data['sex']],
-            'cp': [data['cp']],
-            'trestbps': [data['trestbps']],
-            'chol': [data['chol']],
-            'fbs': [data['fbs']],
-            'restecg': [data['restecg']],
-            'thalach': [data['thalach']],
-            'exang': [data['exang']],
-            'oldpeak': [data['oldpeak']],
-            'slope': [data['slope']],
-            'ca': [data['ca']],
-            'thal': [data['thal']]
-        })
-        
-        # Ensure correct column order
-        input_data = input_data[feature_names]
+        # Requested model (default: the promoted one, or the canary for its share of users),
+        # validated against its feature schema
+        shadow = get_shadow()
+        name, shadows = shadow.route(data.pop('model', None), session.get('user_id'))
+        try:
+            served = registry.get_served(name)
+            input_data = served.schema.frame([data])
+        except UnknownModelError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e),
+                'data': {}
+            }), 404
+        except SchemaValidationError as e:
+            return jsonify({
+                'status': 'error',
+                'message': e.errors[0],
+                'data': {'errors': e.errors}
+            }), 400
+        model = served.model
         
         # Make prediction
         prediction = model.predict(input_data)[0]
         prediction_proba = model.predict_proba(input_data)[0]
         confidence = float(max(prediction_proba))
         
+        # Shadow models score the same payload off the request path
+        shadow.submit(data, served, prediction_proba[1], shadows)
+        
         return jsonify({
             'status': 'success',
             'message': 'Prediction completed successfully',
@@ -220,7 +263,8 @@ def predict():
                 'probabilities': {
                     'no_disease': float(prediction_proba[0]),
                     'has_disease': float(prediction_proba[1])
-                }
+                },
+                'model': {'name': served.name, 'version': served.manifest.get('version'), 'hash': served.hash}
             }
         })
     except Exception as e:
@@ -231,17 +275,30 @@ def predict():
         }), 500
 
 
+def _features_response(name):
+    # Feature names (and full schema) of the served model; ?model= picks a channel
+    from src.models.model_store import UnknownModelError
+
+    try:
+        served = registry.get_served(name)
+    except UnknownModelError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'data': {}
+        }), 404
+    return jsonify({
+        'status': 'success',
+        'message': 'Feature names retrieved successfully',
+        'data': {'features': served.schema.names, 'schema': served.schema.to_dict(), 'model': served.name}
+    })
+
+
 @app.route('/features')
 def get_features():
     # Return feature names for the frontend
     try:
-        with open("feature_names.json", "r") as f:
-            feature_names = json.load(f)
-        return jsonify({
-            'status': 'success',
-            'message': 'Feature names retrieved successfully',
-            'data': {'features': feature_names}
-        })
+        return _features_response(request.args.get('model'))
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -256,9 +313,7 @@ import json
 def api_predict():
     # API version of the predict route with proper authentication
     try:
-        import joblib
         import json
-        import pandas as pd
         
         # Check if user is authenticated
         if 'user_id' not in session:
@@ -268,39 +323,42 @@ def api_predict():
                 'data': {}
             }), 401
         
-        # Load the original model
-        model = joblib.load("heart_disease_model.pkl")
-        with open("feature_names.json", "r") as f:
-            feature_names = json.load(f)
+        from backend.shadow import get_shadow
+        from src.models.feature_schema import SchemaValidationError
+        from src.models.model_store import UnknownModelError
         
         # Get data from request
-        data = request.json
-        
-        # Prepare input data
-        input_data = pd.DataFrame({
-            'age': [data['age']],
-            'sex': [data['sex']],
-            'cp': [data['cp']],
-            'trestbps': [data['trestbps']],
-            'chol': [data['chol']],
-            'fbs': [data['fbs']],
-            'restecg': [data['restecg']],
-            'thalach': [data['thalach']],
-            'exang': [data['exang']],
-            'oldpeak': [data['oldpeak']],
-            'slope': [data['slope']],
-            'ca': [data['ca']],
-            'thal': [data['thal']]
-        })
+        data = dict(request.json or {})
         
-        # Ensure correct column order
-        input_data = input_data[feature_names]
+        # Requested model (default: the promoted one, or the canary for its share of users),
+        # validated against its feature schema
+        shadow = get_shadow()
+        name, shadows = shadow.route(data.pop('model', None), session.get('user_id'))
+        try:
+            served = registry.get_served(name)
+            input_data = served.schema.frame([data])
+        except UnknownModelError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e),
+                'data': {}
+            }), 404
+        except SchemaValidationError as e:
+            return jsonify({
+                'status': 'error',
+                'message': e.errors[0],
+                'data': {'errors': e.errors}
+            }), 400
+        model = served.model
         
         # Make prediction
         prediction = model.predict(input_data)[0]
         prediction_proba = model.predict_proba(input_data)[0]
         confidence = float(max(prediction_proba))
         
+        # Shadow models score the same payload off the request path
+        shadow.submit(data, served, prediction_proba[1], shadows)
+        
         # Save prediction to database
         import sqlite3
         conn = sqlite3.connect('hospital.db')
@@ -320,7 +378,8 @@ def api_predict():
                     'no_disease': float(prediction_proba[0]),
                     'has_disease': float(prediction_proba[1])
                 },
-                'risk_level': 'High' if prediction_proba[1] > 0.7 else 'Medium' if prediction_proba[1] > 0.3 else 'Low'
+                'risk_level': risk_level(prediction_proba[1]).title(),
+                'model': {'name': served.name, 'version': served.manifest.get('version'), 'hash': served.hash}
             }
         })
     except Exception as e:
@@ -335,12 +394,23 @@ def api_predict():
 def api_get_features():
     # API version of the features route
     try:
-        with open("feature_names.json", "r") as f:
-            feature_names = json.load(f)
+        return _features_response(request.args.get('model'))
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'data': {}
+        }), 500
+
+
+@app.route('/api/models')
+def api_list_models():
+    # Models that can be requested with the 'model' field of the predict routes
+    try:
         return jsonify({
             'status': 'success',
-            'message': 'Feature names retrieved successfully',
-            'data': {'features': feature_names}
+            'message': 'Models retrieved successfully',
+            'data': {'models': registry.served_models()}
         })
     except Exception as e:
         return jsonify({
@@ -7,20 +7,21 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src', 'utils'))
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import json
 import plotly.graph_objects as go
 import matplotlib.pyplot as plt
-import streamlit.components.v1 as components
 
 # Load the utility functions directly
 import sys
 import os
 sys.path.insert(0, './src/utils')
 
-from visualization_3d_fixed import create_realistic_3d_heart_html, get_risk_level
+from visualization_3d_fixed import get_heart_params, get_risk_level
+from heart3d_component import heart3d_viewer
 from ollama_integration_improved import OllamaClinicalAssistant
+from explanation_cache import get_explanation_cache
 from docx_parser import PatientDataParser
+from parse_cache import get_parse_cache
+from models.model_store import load_current
 
 # Page configuration
 st.set_page_config(
@@ -38,28 +39,21 @@ st.markdown("""
 This application uses a leak-free machine learning pipeline to predict heart disease risk based on patient medical attributes.
 """)
 
-# Load model and metadata
-@st.cache_resource
+# Load model and metadata (the store caches by version, so a rerun only rereads the pointer)
 def load_model():
-    """Load the trained model and metadata"""
+    """Load the promoted model version and its metadata"""
     try:
-        pipeline = joblib.load("heart_disease_model.pkl")
-        with open("feature_names.json", "r") as f:
-            feature_names = json.load(f)
-        with open("feature_importances.json", "r") as f:
-            feature_importances = json.load(f)
-        with open("model_metrics.json", "r") as f:
-            metrics = json.load(f)
-        return pipeline, feature_names, feature_importances, metrics
+        loaded = load_current()
+        return loaded.model, loaded.feature_names, loaded.feature_importances, loaded.metrics
     except FileNotFoundError as e:
-        st.error(f"⚠️ Model files not found! Please ensure model files are in the root directory.")
+        st.error(f"⚠️ Model files not found! Please run 'python -m src.models.pipeline' first.")
         st.stop()
 
 pipeline, feature_names, feature_importances, metrics = load_model()
 
 # Initialize Ollama assistant
 try:
-    ollama_assistant = OllamaClinicalAssistant()
+    ollama_assistant = OllamaClinicalAssistant(cache=get_explanation_cache())
 except:
     st.warning("⚠️ Ollama integration not available. Clinical explanations will be limited.")
     ollama_assistant = None
@@ -150,7 +144,8 @@ with tab1:
     parsed_data = None
     if uploaded_file is not None:
         with st.spinner("Parsing document..."):
-            parsed_data, errors = parser.parse_docx(uploaded_file)
+            # Identical bytes (reruns, re-uploads) come back from the parse cache
+            parsed_data, errors = get_parse_cache().parse(uploaded_file.getvalue())
             if parsed_data and len(parsed_data) > 0:
                 st.success(f"✅ Successfully extracted {len(parsed_data)} fields from document!")
                 if errors:
@@ -290,11 +285,8 @@ with tab1:
         # Calculate risk level
         risk_level = get_risk_level(risk_score)
         
-        # Create realistic 3D visualization HTML
-        html_content = create_realistic_3d_heart_html(risk_score, patient_data)
-        
-        # Display the HTML component
-        components.html(html_content, height=600, scrolling=False)
+        # Static Three.js viewer; only the parameters are sent on each prediction
+        heart3d_viewer(get_heart_params(risk_score, patient_data))
         
         st.info(f"""
         **Visualization Guide:**
@@ -311,11 +303,14 @@ with tab1:
         st.header("💡 Clinical Explanation")
         
         if ollama_assistant:
-            with st.spinner("Generating clinical explanation..."):
-                explanation = ollama_assistant.generate_explanation(
-                    patient_data, risk_score, prediction, feature_importances
-                )
-                st.markdown(explanation)
+            # Render tokens as they stream in instead of waiting for the full text
+            explanation_placeholder = st.empty()
+            explanation = ""
+            for token in ollama_assistant.stream_explanation(
+                patient_data, risk_score, prediction, feature_importances
+            ):
+                explanation += token
+                explanation_placeholder.markdown(explanation)
         else:
             st.info("Ollama integration not available. Please set up Ollama for clinical explanations.")
         
@@ -8,7 +8,6 @@ This script runs the premium role-based medical web application with:
 """
 
 import sys
-import os
 from pathlib import Path
 
 # Add the project root to the Python path
@@ -47,21 +46,12 @@ def check_dependencies():
     return True
 
 def check_model_files():
-    """Check if required model files exist."""
-    required_files = [
-        'heart_disease_model.pkl',
-        'feature_names.json'
-    ]
-    
-    missing_files = []
-    
-    for file in required_files:
-        if not os.path.exists(file):
-            missing_files.append(file)
-    
-    if missing_files:
-        print(f"Missing required model files: {', '.join(missing_files)}")
-        print("Please ensure the model files are in the project root directory.")
+    """Check that a model version is promoted (or legacy model files can be imported)."""
+    from src.models.model_store import get_store
+
+    if not get_store().available():
+        print("No model found in the model store and no legacy model files.")
+        print("Please run: python -m src.models.pipeline")
         return False
     
     return True
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Production launcher for the Medical Dashboard Application
+Runs the Flask app under gunicorn with N pre-forked workers that share the
+preloaded model. Worker/thread counts come from config.py (WEB_WORKERS,
+WEB_THREADS) or the matching environment variables.
+
+Send SIGHUP to the master process to reload the model without downtime.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+import config
+from run_medical_app import check_dependencies, check_model_files
+
+
+def main():
+    """Start gunicorn with gunicorn.conf.py."""
+    print("🏥 Starting Medical Dashboard Application (production)...")
+    print("=" * 50)
+
+    if not check_dependencies():
+        sys.exit(1)
+
+    if not check_model_files():
+        sys.exit(1)
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        print("Missing required package: gunicorn")
+        print("Please install it using: pip install -r requirements.txt")
+        sys.exit(1)
+
+    print(f"🌐 Binding {config.WEB_BIND} with {config.WEB_WORKERS} workers x {config.WEB_THREADS} threads")
+    print("Readiness probe: /healthz/ready")
+    print("=" * 50)
+
+    os.chdir(project_root)
+    os.execvp(sys.executable, [
+        sys.executable, "-m", "gunicorn",
+        "-c", str(project_root / "gunicorn.conf.py"),
+        "wsgi:app",
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,15 @@
 Heart Disease Prediction Web App
 Run with: streamlit run app.py
 """
+import sys
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import json
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.models.model_store import load_current
 
 # Page configuration
 st.set_page_config(
@@ -22,17 +26,14 @@ This application uses a machine learning model to predict the presence of heart
 **Please enter the patient's information below to get a prediction.**
 """)
 
-# Load model and feature names
-@st.cache_resource
+# Load model and feature names (the store caches by version, so a rerun only rereads the pointer)
 def load_model():
-    """Load the trained model"""
+    """Load the promoted model version"""
     try:
-        model = joblib.load("heart_disease_model.pkl")
-        with open("feature_names.json", "r") as f:
-            feature_names = json.load(f)
-        return model, feature_names
+        loaded = load_current()
+        return loaded.model, loaded.feature_names
     except FileNotFoundError:
-        st.error("⚠️ Model file not found! Please run 'python train_and_save_model.py' first.")
+        st.error("⚠️ Model file not found! Please run 'python -m src.models.pipeline' first.")
         st.stop()
 
 model, feature_names = load_model()
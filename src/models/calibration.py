@@ -0,0 +1,152 @@
+"""
+Probability calibration as a monotone lookup table
+Forest probabilities are vote shares, not observed rates: a 0.7 from the
+random forest is not a 70% chance of heart disease. The pipeline's calibrate
+stage fits a monotone map from raw to calibrated probability on out-of-fold
+predictions of the training split:
+
+    isotonic   IsotonicRegression; its knots are the table as they are
+    sigmoid    Platt scaling; the fitted sigmoid sampled on a fixed grid
+
+Both are exported as calibration.json, {"method", "x": [...], "y": [...]} with
+x and y non-decreasing. Serving applies it with one np.searchsorted plus a
+linear interpolation between neighbouring knots (the same interpolation
+IsotonicRegression.predict uses), so no sklearn calibrator is in the hot path.
+CalibratedModel wraps any model with predict_proba so every caller gets
+calibrated probabilities, and predictions thresholded on them.
+"""
+import json
+
+import numpy as np
+
+CALIBRATION_FILE = "calibration.json"
+METHODS = ("isotonic", "sigmoid")
+SIGMOID_GRID_SIZE = 257  # knots sampled from a Platt fit
+_EPSILON = 1e-6
+
+
+class CalibrationTable:
+    """
+    Piecewise-linear monotone map from raw to calibrated probability
+
+    Parameters:
+    -----------
+    x : array-like
+        Raw probability knots, increasing
+    y : array-like
+        Calibrated probability at each knot, non-decreasing
+    method : str
+        How the table was fitted ("isotonic" or "sigmoid")
+    """
+
+    def __init__(self, x, y, method="isotonic"):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        if self.x.ndim != 1 or self.x.shape != self.y.shape or len(self.x) < 2:
+            raise ValueError("Calibration table needs matching 1-D x and y with at least two knots")
+        if np.any(np.diff(self.x) <= 0) or np.any(np.diff(self.y) < 0):
+            raise ValueError("Calibration table must be increasing in x and non-decreasing in y")
+        self.method = method
+
+    def __call__(self, probabilities):
+        """Calibrated probabilities (vectorized; inputs outside the knots are clipped)"""
+        p = np.clip(np.asarray(probabilities, dtype=np.float64), self.x[0], self.x[-1])
+        right = np.clip(np.searchsorted(self.x, p, side="right"), 1, len(self.x) - 1)
+        x0, x1 = self.x[right - 1], self.x[right]
+        y0, y1 = self.y[right - 1], self.y[right]
+        return y0 + (p - x0) / (x1 - x0) * (y1 - y0)
+
+    def to_dict(self):
+        return {"method": self.method, "x": self.x.tolist(), "y": self.y.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["x"], data["y"], method=data.get("method", "isotonic"))
+
+    def save(self, path, **extra):
+        with open(path, "w") as f:
+            json.dump({**self.to_dict(), **extra}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+def fit_calibration(y_true, raw_probabilities, method="isotonic"):
+    """
+    Fit a calibration table on (label, raw probability) pairs
+
+    Parameters:
+    -----------
+    y_true : array-like
+        0/1 labels
+    raw_probabilities : array-like
+        Uncalibrated probabilities of class 1 for the same rows, out-of-fold
+    method : str
+        "isotonic" or "sigmoid" (Platt scaling)
+
+    Returns:
+    --------
+    table : CalibrationTable
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    raw = np.asarray(raw_probabilities, dtype=np.float64)
+    if method == "isotonic":
+        from sklearn.isotonic import IsotonicRegression
+
+        iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(raw, y_true)
+        x, y = iso.X_thresholds_, iso.y_thresholds_
+        # Anchor the ends so the table covers all of [0, 1]
+        if x[0] > 0.0:
+            x, y = np.concatenate([[0.0], x]), np.concatenate([[y[0]], y])
+        if x[-1] < 1.0:
+            x, y = np.concatenate([x, [1.0]]), np.concatenate([y, [y[-1]]])
+        return CalibrationTable(x, y, method)
+    if method == "sigmoid":
+        from sklearn.linear_model import LogisticRegression
+
+        logit = lambda p: np.log(np.clip(p, _EPSILON, 1 - _EPSILON) / np.clip(1 - p, _EPSILON, 1))
+        platt = LogisticRegression(C=1e6).fit(logit(raw).reshape(-1, 1), y_true)
+        x = np.linspace(0.0, 1.0, SIGMOID_GRID_SIZE)
+        y = platt.predict_proba(logit(x).reshape(-1, 1))[:, 1]
+        return CalibrationTable(x, np.maximum.accumulate(y), method)
+    raise ValueError(f"Unknown calibration method '{method}', expected one of {', '.join(METHODS)}")
+
+
+def expected_calibration_error(y_true, probabilities, bins=10):
+    """Mean |observed rate - mean probability| over equal-width bins, weighted by bin size"""
+    y_true = np.asarray(y_true, dtype=np.float64)
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    bin_ids = np.minimum((probabilities * bins).astype(int), bins - 1)
+    error = 0.0
+    for b in np.unique(bin_ids):
+        in_bin = bin_ids == b
+        error += in_bin.mean() * abs(y_true[in_bin].mean() - probabilities[in_bin].mean())
+    return float(error)
+
+
+class CalibratedModel:
+    """
+    A fitted model whose predict_proba goes through a CalibrationTable
+
+    Other attributes (feature_names_in_, n_features_in_, steps, ...) are read
+    from the wrapped model.
+    """
+
+    def __init__(self, model, table, threshold=0.5):
+        self.model = model
+        self.table = table
+        self.threshold = threshold
+
+    def predict_proba(self, X):
+        positive = self.table(self.model.predict_proba(X)[:, 1])
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] >= self.threshold).astype(int)
+
+    def __getattr__(self, name):
+        if name in ("model", "table", "threshold"):
+            raise AttributeError(name)
+        return getattr(self.model, name)
@@ -0,0 +1,159 @@
+"""
+Feature schemas
+A schema declares a model's input columns: their order, dtype and valid range.
+Every model version in the store carries one (feature_schema.json), and the
+predict endpoints validate and vectorize request payloads against the schema
+of the model they call. So a model trained on different columns can be
+served next to the UCI one without code changes.
+
+Built-in schemas live in src/models/schemas/<name>.json:
+
+    {"name": "uci_13", "target": "target",
+     "features": [{"name": "age", "dtype": "int", "min": 1, "max": 120, "description": "..."}, ...]}
+"""
+import json
+import math
+from pathlib import Path
+
+SCHEMA_DIR = Path(__file__).resolve().parent / "schemas"
+SCHEMA_FILE = "feature_schema.json"
+DTYPES = ("int", "float")
+
+
+class SchemaValidationError(ValueError):
+    """Payload does not match the schema; errors lists every problem found"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+class FeatureSchema:
+    """
+    Ordered input columns of a model, with dtypes and valid ranges
+
+    Parameters:
+    -----------
+    name : str
+        Schema identifier
+    features : list of dict
+        {"name", "dtype" ("int" or "float"), "min", "max", "description"}; min/max may be None
+    target : str, optional
+        Label column in the training data
+    description : str, optional
+    """
+
+    def __init__(self, name, features, target=None, description=None):
+        for feature in features:
+            if feature.get("dtype", "float") not in DTYPES:
+                raise ValueError(f"Feature '{feature['name']}' has unknown dtype {feature['dtype']!r}")
+        self.name = name
+        self.features = [dict(feature) for feature in features]
+        self.target = target
+        self.description = description
+
+    @property
+    def names(self):
+        return [feature["name"] for feature in self.features]
+
+    @property
+    def ranges(self):
+        return {feature["name"]: (feature.get("min"), feature.get("max")) for feature in self.features}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data["features"], target=data.get("target"), description=data.get("description"))
+
+    def to_dict(self):
+        data = {"name": self.name, "target": self.target, "features": self.features}
+        if self.description:
+            data["description"] = self.description
+        return data
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def validate(self, record):
+        """
+        Check one payload
+
+        Returns:
+        --------
+        values : list of float
+            Feature values in schema order (only meaningful when errors is empty)
+        errors : list of str
+        """
+        values, errors = [], []
+        for feature in self.features:
+            name = feature["name"]
+            raw = record.get(name)
+            if raw is None or raw == "":
+                errors.append(f"Missing required field: {name}")
+                values.append(math.nan)
+                continue
+            try:
+                value = float(raw)
+            except (TypeError, ValueError):
+                errors.append(f"{name} must be a number, got {raw!r}")
+                values.append(math.nan)
+                continue
+            if isinstance(raw, bool) or not math.isfinite(value):
+                errors.append(f"{name} must be a finite number, got {raw!r}")
+            elif feature.get("dtype") == "int" and not value.is_integer():
+                errors.append(f"{name} must be an integer, got {raw!r}")
+            else:
+                low, high = feature.get("min"), feature.get("max")
+                if (low is not None and value < low) or (high is not None and value > high):
+                    errors.append(f"{name}={raw} is outside the valid range [{low}, {high}]")
+            values.append(value)
+        return values, errors
+
+    def vectorize(self, records):
+        """
+        Validate payloads and stack them into a float64 matrix in schema order
+
+        Raises:
+        -------
+        SchemaValidationError
+            With every error, prefixed by the record index when there are several records
+        """
+        import numpy as np
+
+        rows, errors = [], []
+        for i, record in enumerate(records):
+            values, record_errors = self.validate(record)
+            prefix = f"record {i}: " if len(records) > 1 else ""
+            errors.extend(prefix + error for error in record_errors)
+            rows.append(values)
+        if errors:
+            raise SchemaValidationError(errors)
+        return np.asarray(rows, dtype=np.float64).reshape(len(rows), len(self.features))
+
+    def frame(self, records):
+        """vectorize() as a DataFrame with the schema's column names (what fitted pipelines expect)"""
+        import pandas as pd
+
+        return pd.DataFrame(self.vectorize(records), columns=self.names)
+
+
+def builtin_schema(name):
+    """Schema shipped in src/models/schemas/<name>.json"""
+    path = SCHEMA_DIR / f"{name}.json"
+    if not path.exists():
+        raise ValueError(f"Unknown feature schema '{name}'")
+    return FeatureSchema.load(path)
+
+
+def schema_for_feature_names(feature_names):
+    """Best schema for a model that only recorded its column names (pre-schema versions)"""
+    uci = builtin_schema("uci_13")
+    if list(feature_names) == uci.names:
+        return uci
+    return FeatureSchema("inferred", [{"name": name, "dtype": "float", "min": None, "max": None}
+                                      for name in feature_names])
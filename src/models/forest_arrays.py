@@ -0,0 +1,215 @@
+"""
+Read-only, memory-mappable RandomForest layout
+A fitted forest (optionally behind a StandardScaler in a Pipeline) is flattened
+into plain, uncompressed .npy arrays next to the pickle:
+
+    forest.nodes.npy        int64   (n_nodes, 3)          left child, right child, feature (< 0 at leaves)
+    forest.thresholds.npy   float64 (n_nodes,)            split threshold
+    forest.proba.npy        float64 (n_nodes, n_classes)  class probabilities at the node
+    forest.json             tree roots, depth, classes, feature names, scaler mean/scale
+
+np.load(mmap_mode="r") maps them straight from the page cache, so every worker
+on a host shares one physical copy, and MappedForest predicts from them with
+numpy alone (no sklearn import, no unpickling). joblib.load(mmap_mode="r") on
+the pickle is not enough: sklearn's Tree copies its node arrays into private
+memory when it is unpickled.
+
+The numpy traversal wins for the small batches the routes score, but per row it
+is several times slower than sklearn's compiled trees. Given the pickle
+(fallback_path, which the served models never get; see LoadedModel.batch_model),
+batches above `fallback_rows` are scored by the sklearn forest, loaded on first
+use and kept for the life of the MappedForest.
+"""
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+
+NODES_FILE = "forest.nodes.npy"
+THRESHOLDS_FILE = "forest.thresholds.npy"
+PROBA_FILE = "forest.proba.npy"
+META_FILE = "forest.json"
+FOREST_FILES = (NODES_FILE, THRESHOLDS_FILE, PROBA_FILE, META_FILE)
+# Rows at which the pickled forest overtakes the numpy traversal (benchmarks/prediction.py)
+FALLBACK_ROWS = 128
+
+
+def _split_pipeline(model):
+    """(scaler or None, forest) for a bare forest or a [scaler, forest] Pipeline; None if unsupported"""
+    steps = getattr(model, "steps", None)
+    scaler, forest = None, model
+    if steps is not None:
+        if len(steps) > 2 or (len(steps) == 2 and type(steps[0][1]).__name__ != "StandardScaler"):
+            return None
+        scaler = steps[0][1] if len(steps) == 2 else None
+        forest = steps[-1][1]
+    if type(forest).__name__ != "RandomForestClassifier":
+        return None
+    return scaler, forest
+
+
+def supports(model):
+    return _split_pipeline(model) is not None
+
+
+def export_forest_arrays(model, directory):
+    """
+    Write the memory-mappable layout of a fitted forest
+
+    Parameters:
+    -----------
+    model : RandomForestClassifier or Pipeline([StandardScaler, RandomForestClassifier])
+        Fitted model
+    directory : Path
+        Output directory
+
+    Returns:
+    --------
+    files : dict
+        File name -> path of the written files
+    """
+    parts = _split_pipeline(model)
+    if parts is None:
+        raise ValueError(f"Cannot flatten {type(model).__name__}; expected a RandomForestClassifier")
+    scaler, forest = parts
+    directory = Path(directory)
+
+    nodes, thresholds, proba, roots = [], [], [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        left = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        leaf = left < 0
+        # Same normalization as DecisionTreeClassifier.predict_proba
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        nodes.append(np.column_stack([
+            np.where(leaf, -1, left + offset),
+            np.where(leaf, -1, right + offset),
+            np.where(leaf, -1, tree.feature.astype(np.int64)),
+        ]))
+        thresholds.append(tree.threshold.astype(np.float64))
+        proba.append(value / normalizer)
+        roots.append(offset)
+        offset += tree.node_count
+
+    files = {
+        NODES_FILE: directory / NODES_FILE,
+        THRESHOLDS_FILE: directory / THRESHOLDS_FILE,
+        PROBA_FILE: directory / PROBA_FILE,
+        META_FILE: directory / META_FILE,
+    }
+    np.save(files[NODES_FILE], np.ascontiguousarray(np.concatenate(nodes)))
+    np.save(files[THRESHOLDS_FILE], np.concatenate(thresholds))
+    np.save(files[PROBA_FILE], np.ascontiguousarray(np.concatenate(proba)))
+
+    n_features = forest.n_features_in_
+    meta = {
+        "roots": roots,
+        "max_depth": int(max(estimator.tree_.max_depth for estimator in forest.estimators_)),
+        "classes": forest.classes_.tolist(),
+        "n_features": int(n_features),
+        "feature_names": list(getattr(model, "feature_names_in_", [])) or None,
+        "scaler": None,
+    }
+    if scaler is not None:
+        meta["scaler"] = {
+            "mean": scaler.mean_.tolist() if scaler.with_mean else [0.0] * n_features,
+            "scale": scaler.scale_.tolist() if scaler.with_std else [1.0] * n_features,
+        }
+    with open(files[META_FILE], "w") as f:
+        json.dump(meta, f)
+    return files
+
+
+class MappedForest:
+    """
+    Forest predictor over the arrays written by export_forest_arrays
+
+    Matches the fitted model's predict_proba/predict: same scaling, float32
+    split comparisons and per-tree probability averaging as sklearn.
+
+    Parameters:
+    -----------
+    directory : Path
+        Directory with the exported arrays
+    mmap_mode : str or None
+        np.load mode for the arrays (None reads them into memory)
+    fallback_path : Path, optional
+        The pickled model the arrays were exported from; batches of more than
+        fallback_rows rows are scored by it instead
+    fallback_rows : int
+        Largest batch scored by the numpy traversal
+    """
+
+    def __init__(self, directory, mmap_mode="r", fallback_path=None, fallback_rows=FALLBACK_ROWS):
+        directory = Path(directory)
+        self.fallback_path = Path(fallback_path) if fallback_path is not None else None
+        self.fallback_rows = fallback_rows
+        self._fallback = None
+        self._fallback_lock = threading.Lock()
+        with open(directory / META_FILE, "r") as f:
+            meta = json.load(f)
+        nodes = np.load(directory / NODES_FILE, mmap_mode=mmap_mode)
+        self.left, self.right, self.feature = nodes[:, 0], nodes[:, 1], nodes[:, 2]
+        self.threshold = np.load(directory / THRESHOLDS_FILE, mmap_mode=mmap_mode)
+        self.proba = np.load(directory / PROBA_FILE, mmap_mode=mmap_mode)
+        self.roots = np.asarray(meta["roots"], dtype=np.int64)
+        self.max_depth = meta["max_depth"]
+        self.classes_ = np.asarray(meta["classes"])
+        self.n_features_in_ = meta["n_features"]
+        self.feature_names = meta["feature_names"]
+        if meta["feature_names"]:
+            self.feature_names_in_ = np.asarray(meta["feature_names"], dtype=object)
+        scaler = meta["scaler"]
+        self.mean = np.asarray(scaler["mean"]) if scaler else None
+        self.scale = np.asarray(scaler["scale"]) if scaler else None
+
+    def _as_array(self, X):
+        if hasattr(X, "columns") and self.feature_names:
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features_in_}")
+        return X
+
+    def _fallback_model(self):
+        with self._fallback_lock:
+            if self._fallback is None:
+                # Imported here so small-batch workers never load sklearn
+                import joblib
+                self._fallback = joblib.load(self.fallback_path)
+            return self._fallback
+
+    def predict_proba(self, X):
+        if self.fallback_path is not None and np.ndim(X) == 2 and len(X) > self.fallback_rows:
+            return self._fallback_model().predict_proba(X)
+        X = self._as_array(X)
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = X.astype(np.float32)
+
+        rows = np.arange(len(X))[:, np.newaxis]
+        node = np.repeat(self.roots[np.newaxis, :], len(X), axis=0)
+        for _ in range(self.max_depth):
+            feature = self.feature[node]
+            leaf = feature < 0
+            if leaf.all():
+                break
+            go_left = X[rows, np.where(leaf, 0, feature)] <= self.threshold[node]
+            node = np.where(leaf, node, np.where(go_left, self.left[node], self.right[node]))
+        return self.proba[node].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def load_forest_arrays(directory, mmap_mode="r", fallback_path=None, fallback_rows=FALLBACK_ROWS):
+    """MappedForest over a directory with the exported arrays (mmap_mode=None reads them into memory)"""
+    return MappedForest(directory, mmap_mode=mmap_mode, fallback_path=fallback_path, fallback_rows=fallback_rows)
@@ -0,0 +1,421 @@
+"""
+Content-addressed model artifact store
+
+    models/
+        <hash>/                    immutable, one per distinct set of artifact files
+            heart_disease_model.pkl
+            feature_names.json
+            feature_importances.json
+            model_metrics.json
+            feature_schema.json    input columns, dtypes and ranges (feature_schema.py)
+            calibration.json       optional probability lookup table (calibration.py)
+            manifest.json          {"hash", "created_at", "files": {name: {"sha256", "size"}}, ...}
+        current                    text file holding the promoted <hash> (the default model)
+        current.<channel>          extra models served side by side, e.g. current.heart_risk_extended
+
+A version directory is assembled under a temporary name and renamed into place.
+`current` is swapped with os.replace, so a reader sees either the old model or
+the new one, never a half-written pickle or files from two trainings. Loaders
+verify every file against the manifest and cache the loaded model by hash. All
+apps (Flask, Streamlit, streamlit_app/) therefore serve the promoted version and
+only reload when `current` moves; the Flask registry stats the pointer on every
+lookup (backend/model_registry.py).
+
+Random forests are also stored as read-only .npy arrays (forest_arrays.py).
+With config.MODEL_MMAP they are served from a memory map instead of the pickle,
+so all worker processes on a host share one page-cache copy of the trees.
+Batch callers score through LoadedModel.batch_model(), which loads the pickle
+for large batches and lets it go with the job.
+
+When nothing has been promoted yet, the legacy flat files (config.MODEL_PATH
+and friends, or the copies in the repo root) are imported as the first version.
+
+    python -m src.models.model_store list
+    python -m src.models.model_store promote <hash> [--channel heart_risk_extended]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import config
+
+try:
+    from .calibration import CALIBRATION_FILE, CalibratedModel, CalibrationTable
+    from .feature_schema import SCHEMA_FILE, FeatureSchema, schema_for_feature_names
+    from .forest_arrays import FOREST_FILES, export_forest_arrays, load_forest_arrays, supports
+except ImportError:  # run from inside src/models
+    from calibration import CALIBRATION_FILE, CalibratedModel, CalibrationTable
+    from feature_schema import SCHEMA_FILE, FeatureSchema, schema_for_feature_names
+    from forest_arrays import FOREST_FILES, export_forest_arrays, load_forest_arrays, supports
+
+MANIFEST_NAME = "manifest.json"
+POINTER_NAME = "current"
+CHANNEL_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+HASH_LENGTH = 16
+MAX_LOADED = 4  # loaded versions kept in memory per store
+
+MODEL_FILE = config.MODEL_PATH.name
+FEATURE_NAMES_FILE = config.FEATURE_NAMES_PATH.name
+FEATURE_IMPORTANCES_FILE = config.FEATURE_IMPORTANCES_PATH.name
+MODEL_METRICS_FILE = config.MODEL_METRICS_PATH.name
+REQUIRED_FILES = (MODEL_FILE, FEATURE_NAMES_FILE)
+
+# Flat files written by the old training scripts, in lookup order
+LEGACY_PATHS = {
+    MODEL_FILE: (config.MODEL_PATH, config.BASE_DIR / MODEL_FILE),
+    FEATURE_NAMES_FILE: (config.FEATURE_NAMES_PATH, config.BASE_DIR / FEATURE_NAMES_FILE),
+    FEATURE_IMPORTANCES_FILE: (config.FEATURE_IMPORTANCES_PATH, config.BASE_DIR / FEATURE_IMPORTANCES_FILE),
+    MODEL_METRICS_FILE: (config.MODEL_METRICS_PATH, config.BASE_DIR / MODEL_METRICS_FILE),
+}
+
+
+class ArtifactIntegrityError(Exception):
+    """A stored file is missing or does not match its manifest checksum"""
+
+
+class UnknownModelError(LookupError):
+    """No version has been promoted to the requested channel"""
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def content_hash(file_digests):
+    """Version hash from {name: sha256}; independent of timestamps and metadata"""
+    h = hashlib.sha256()
+    for name in sorted(file_digests):
+        h.update(f"{name}\0{file_digests[name]}\n".encode())
+    return h.hexdigest()[:HASH_LENGTH]
+
+
+class LoadedModel:
+    """A verified store version, loaded into memory"""
+
+    def __init__(self, hash, model, feature_names, feature_importances, metrics, manifest, schema, mmap=False,
+                 calibration=None, directory=None):
+        self.hash = hash
+        self.mmap = mmap
+        self.directory = directory
+        self.name = manifest.get("name")
+        self.model = model  # wrapped in CalibratedModel when the version has a calibration table
+        self.calibration = calibration
+        self.schema = schema
+        self.feature_names = feature_names
+        self.feature_importances = feature_importances
+        self.metrics = metrics
+        self.manifest = manifest
+
+    def batch_model(self):
+        """
+        A model for scoring large batches (bulk ingestion, batch jobs)
+
+        For a version served from its memory-mapped arrays this is a new
+        MappedForest that hands batches above FALLBACK_ROWS rows to the pickle.
+        The pickle is loaded on the first such batch and freed with the returned
+        model, so hold it for the job, not in a process-wide registry.
+        Otherwise it is the served model itself.
+        """
+        if not self.mmap or self.directory is None or not all(name in self.manifest["files"] for name in FOREST_FILES):
+            return self.model
+        model = load_forest_arrays(self.directory, fallback_path=self.directory / MODEL_FILE)
+        if self.calibration is not None:
+            model = CalibratedModel(model, self.calibration)
+        return model
+
+
+class ModelStore:
+    """
+    Versioned, content-addressed model artifacts with an atomic `current` pointer
+
+    Parameters:
+    -----------
+    root : Path, optional
+        Store directory (default config.MODEL_STORE_DIR)
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or config.MODEL_STORE_DIR)
+        self._lock = threading.Lock()
+        self._loaded = {}  # (hash, mmap) -> LoadedModel, oldest first
+
+    def pointer_path(self, channel=None):
+        if channel is None:
+            return self.root / POINTER_NAME
+        if not CHANNEL_NAME.match(channel):
+            raise ValueError(f"Invalid channel name {channel!r}")
+        return self.root / f"{POINTER_NAME}.{channel}"
+
+    def path(self, model_hash):
+        return self.root / model_hash
+
+    def put(self, files, metadata=None):
+        """
+        Add a version to the store (a no-op if the same files are already stored)
+
+        Parameters:
+        -----------
+        files : dict
+            Artifact name -> source path; must include the model and feature names
+        metadata : dict, optional
+            Extra JSON-serializable fields for the manifest (name, version, metrics, ...)
+
+        Returns:
+        --------
+        model_hash : str
+        """
+        missing = [name for name in REQUIRED_FILES if name not in files]
+        if missing:
+            raise ValueError(f"Missing required artifacts: {', '.join(missing)}")
+        digests = {name: file_sha256(source) for name, source in files.items()}
+        model_hash = content_hash(digests)
+        final = self.path(model_hash)
+        if (final / MANIFEST_NAME).exists():
+            return model_hash
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f".tmp-{model_hash}-{uuid.uuid4().hex[:8]}"
+        staging.mkdir()
+        try:
+            for name, source in files.items():
+                shutil.copyfile(source, staging / name)
+            manifest = dict(metadata or {})
+            manifest.update({
+                "hash": model_hash,
+                "created_at": datetime.now().isoformat(),
+                "files": {name: {"sha256": digests[name], "size": (staging / name).stat().st_size}
+                          for name in sorted(files)},
+            })
+            with open(staging / MANIFEST_NAME, "w") as f:
+                json.dump(manifest, f, indent=2)
+            try:
+                os.rename(staging, final)
+            except OSError:
+                # Another process stored the same content first
+                if not (final / MANIFEST_NAME).exists():
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return model_hash
+
+    def manifest(self, model_hash):
+        path = self.path(model_hash) / MANIFEST_NAME
+        if not path.exists():
+            raise FileNotFoundError(f"No model version {model_hash} in {self.root}")
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def verify(self, model_hash):
+        """Check every file of a version against its manifest; returns the manifest"""
+        manifest = self.manifest(model_hash)
+        for name, entry in manifest["files"].items():
+            path = self.path(model_hash) / name
+            if not path.exists():
+                raise ArtifactIntegrityError(f"{model_hash}/{name} is missing")
+            if file_sha256(path) != entry["sha256"]:
+                raise ArtifactIntegrityError(f"{model_hash}/{name} does not match its manifest checksum")
+        return manifest
+
+    def promote(self, model_hash, channel=None):
+        """Atomically point `current` (or `current.<channel>`) at a verified version"""
+        pointer = self.pointer_path(channel)
+        self.verify(model_hash)
+        tmp = self.root / f".{POINTER_NAME}.{uuid.uuid4().hex[:8]}"
+        with open(tmp, "w") as f:
+            f.write(model_hash + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, pointer)
+        return model_hash
+
+    def current_hash(self, channel=None):
+        try:
+            return self.pointer_path(channel).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def channels(self):
+        """{channel: hash} for every current.<channel> pointer (not the default `current`)"""
+        channels = {}
+        if self.root.exists():
+            for path in sorted(self.root.glob(f"{POINTER_NAME}.*")):
+                channel = path.name[len(POINTER_NAME) + 1:]
+                if CHANNEL_NAME.match(channel):
+                    channels[channel] = path.read_text().strip()
+        return channels
+
+    def versions(self):
+        """Manifests of all stored versions, oldest first"""
+        manifests = []
+        if self.root.exists():
+            for path in self.root.glob(f"*/{MANIFEST_NAME}"):
+                with open(path, "r") as f:
+                    manifests.append(json.load(f))
+        return sorted(manifests, key=lambda m: m["created_at"])
+
+    def import_legacy(self):
+        """Store and promote the flat files from the old training scripts; None if there are none"""
+        files = {}
+        for name, candidates in LEGACY_PATHS.items():
+            for candidate in candidates:
+                if candidate.exists():
+                    files[name] = candidate
+                    break
+        if any(name not in files for name in REQUIRED_FILES):
+            return None
+
+        import joblib
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.root, prefix=".import-") as staging:
+            model = joblib.load(files[MODEL_FILE])
+            if supports(model):
+                files.update(export_forest_arrays(model, staging))
+            model_hash = self.put(files, {"name": "legacy", "source": "imported flat files"})
+        return self.promote(model_hash)
+
+    def available(self):
+        """True if load() would find a model (promoted, or legacy files to import)"""
+        if self.current_hash():
+            return True
+        return all(any(path.exists() for path in LEGACY_PATHS[name]) for name in REQUIRED_FILES)
+
+    def load(self, model_hash=None, mmap=None, channel=None):
+        """
+        Load a version (default: the one promoted to `current` or to the channel), verifying it first
+
+        Forests stored with their array layout are served as a read-only
+        memory-mapped MappedForest unless mmap (default config.MODEL_MMAP) is off.
+
+        Repeated calls for the same hash return the cached LoadedModel, so calling
+        this on every request only costs a read of the pointer.
+
+        Returns:
+        --------
+        loaded : LoadedModel
+        """
+        model_hash = model_hash or self.current_hash(channel)
+        if model_hash is None and channel is not None:
+            raise UnknownModelError(f"No model promoted to channel '{channel}'")
+        mmap = config.MODEL_MMAP if mmap is None else mmap
+        loaded = self._loaded.get((model_hash, mmap))
+        if loaded is not None:
+            return loaded
+
+        with self._lock:
+            if model_hash is None:
+                model_hash = self.import_legacy()
+                if model_hash is None:
+                    raise FileNotFoundError(f"No promoted model in {self.root} and no legacy model files")
+            loaded = self._loaded.get((model_hash, mmap))
+            if loaded is not None:
+                return loaded
+
+            manifest = self.verify(model_hash)
+            directory = self.path(model_hash)
+            if mmap and all(name in manifest["files"] for name in FOREST_FILES):
+                model = load_forest_arrays(directory)
+            else:
+                # Imported here so importing the store stays cheap for processes that never predict
+                import joblib
+                model = joblib.load(directory / MODEL_FILE)
+            calibration = None
+            if CALIBRATION_FILE in manifest["files"]:
+                calibration = CalibrationTable.load(directory / CALIBRATION_FILE)
+                model = CalibratedModel(model, calibration)
+            feature_names = _read_json(directory / FEATURE_NAMES_FILE)
+            if (directory / SCHEMA_FILE).exists():
+                schema = FeatureSchema.load(directory / SCHEMA_FILE)
+            else:
+                schema = schema_for_feature_names(feature_names)
+            loaded = LoadedModel(
+                hash=model_hash,
+                model=model,
+                feature_names=feature_names,
+                feature_importances=_read_json(directory / FEATURE_IMPORTANCES_FILE),
+                metrics=_read_json(directory / MODEL_METRICS_FILE),
+                manifest=manifest,
+                schema=schema,
+                mmap=mmap,
+                calibration=calibration,
+                directory=directory,
+            )
+            self._loaded[(model_hash, mmap)] = loaded
+            while len(self._loaded) > MAX_LOADED:
+                self._loaded.pop(next(iter(self._loaded)))
+            return loaded
+
+
+def _read_json(path):
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+_store = None
+
+
+def get_store():
+    """Process-wide store at config.MODEL_STORE_DIR"""
+    global _store
+    if _store is None:
+        _store = ModelStore()
+    return _store
+
+
+def load_current():
+    """The promoted model, loaded once per version"""
+    return get_store().load()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and promote stored model versions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="list stored versions")
+    promote = sub.add_parser("promote", help="make a stored version current")
+    promote.add_argument("hash")
+    promote.add_argument("--channel", help="promote to current.<channel> instead of current")
+    sub.add_parser("verify", help="check the current version's checksums")
+    sub.add_parser("import-legacy", help="store and promote the flat model files")
+    args = parser.parse_args()
+
+    store = get_store()
+    if args.command == "list":
+        current = store.current_hash()
+        channels = store.channels()
+        for manifest in store.versions():
+            marker = "*" if manifest["hash"] == current else " "
+            served = [channel for channel, model_hash in channels.items() if model_hash == manifest["hash"]]
+            roc_auc = (manifest.get("metrics") or {}).get("roc_auc")
+            print(f"{marker} {manifest['hash']}  {manifest['created_at'][:19]}  {manifest.get('name', '-'):20s}"
+                  f"  {manifest.get('version', '-')}" + (f"  roc_auc={roc_auc:.4f}" if roc_auc is not None else "")
+                  + (f"  [{', '.join(served)}]" if served else ""))
+    elif args.command == "promote":
+        store.promote(args.hash, channel=args.channel)
+        print(f"{store.pointer_path(args.channel).name} -> {args.hash}")
+    elif args.command == "verify":
+        current = store.current_hash()
+        if current is None:
+            parser.error("no promoted version")
+        store.verify(current)
+        print(f"{current}: OK")
+    else:
+        model_hash = store.import_legacy()
+        print(f"current -> {model_hash}" if model_hash else "No legacy model files found")
+
+
+if __name__ == "__main__":
+    main()
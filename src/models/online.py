@@ -0,0 +1,331 @@
+"""
+Incremental training from confirmed outcomes
+Doctors confirm a patient's real outcome after a consultation (POST
+/api/doctor/consultation/outcome). The outcome goes into the `outcomes` table of
+hospital.db next to the prediction it belongs to. This module learns from those
+rows without a full retrain. It uses estimators with partial_fit: a
+StandardScaler whose mean/variance are updated per batch, and an SGDClassifier
+with log loss (so it has predict_proba).
+
+    checkpoint -> read confirmed outcomes after the cursor in mini-batches
+               -> scaler.partial_fit + model.partial_fit per batch
+               -> checkpoint (state + cursor) after every batch
+               -> evaluate on the fixed holdout -> publish a candidate
+
+The first run bootstraps from the training split of the CSV (the same split as
+the pipeline configs), so the model never starts from nothing. Every later run
+continues from the checkpoint and only sees outcomes it has not learned from
+yet. An interrupted run loses at most one batch.
+
+The candidate goes into the model store and is promoted to the
+config.ONLINE_CHANNEL channel, never to current. It is served for shadow
+evaluation and is only made the default model by an explicit promote.
+
+    python -m src.models.online                    # consume new outcomes, publish a candidate
+    python -m src.models.online --max-batches 10 --no-publish
+    python -m src.models.online --reset            # forget the checkpoint and bootstrap again
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score, log_loss, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+import config
+
+try:
+    from .feature_schema import SCHEMA_FILE, builtin_schema
+    from .model_store import ModelStore
+except ImportError:  # run from inside src/models
+    from feature_schema import SCHEMA_FILE, builtin_schema
+    from model_store import ModelStore
+
+CHECKPOINT_FILE = "checkpoint.joblib"
+CLASSES = np.array([0, 1])
+RANDOM_STATE = 42
+HOLDOUT_SIZE = 0.2  # same split as src/models/configs/random_forest.json
+
+# Confirmed outcomes, newest confirmation last. Re-confirming a prediction replaces
+# the row, so the correction gets a new id and is learned from again.
+OUTCOMES_QUERY = '''
+    SELECT o.id, p.patient_data, o.outcome
+    FROM outcomes o
+    JOIN predictions p ON p.id = o.prediction_id
+    WHERE o.id > ?
+    ORDER BY o.id
+    LIMIT ?
+'''
+
+
+def new_state(schema_name):
+    return {
+        "scaler": StandardScaler(),
+        "model": SGDClassifier(loss="log_loss", alpha=1e-4, random_state=RANDOM_STATE),
+        "schema": schema_name,
+        "cursor": 0,  # last outcomes.id learned from
+        "n_samples": 0,
+        "n_batches": 0,
+        "skipped": 0,
+        "updated_at": None,
+    }
+
+
+def partial_fit(state, X, y):
+    """Update the scaler statistics, then take one SGD pass over the standardized batch"""
+    state["scaler"].partial_fit(X)
+    state["model"].partial_fit(state["scaler"].transform(X), y, classes=CLASSES)
+    state["n_samples"] += len(y)
+    state["n_batches"] += 1
+    state["updated_at"] = datetime.now().isoformat()
+    return state
+
+
+def as_pipeline(state):
+    """The fitted scaler and model as one predict_proba-able Pipeline (what the apps load)"""
+    return Pipeline([("scaler", state["scaler"]), ("model", state["model"])])
+
+
+class OnlineTrainer:
+    """
+    Learn from confirmed outcomes in mini-batches, checkpointing after each batch
+
+    Parameters:
+    -----------
+    db_path : str or Path, optional
+        Database with predictions and outcomes (default config.ONLINE_DB_PATH)
+    checkpoint_dir : Path, optional
+        Where the checkpoint is kept (default config.ONLINE_CHECKPOINT_DIR)
+    store_dir : Path, optional
+        Model store root (default config.MODEL_STORE_DIR)
+    schema : str
+        Built-in feature schema of the model
+    data_path : Path, optional
+        CSV for the bootstrap fit and the holdout (default config.DATASET_PATH)
+    batch_size : int, optional
+        Rows per partial_fit (default config.ONLINE_BATCH_SIZE)
+    channel : str, optional
+        Store channel the candidate is promoted to (default config.ONLINE_CHANNEL)
+    verbose : bool
+        Print progress
+    """
+
+    def __init__(self, db_path=None, checkpoint_dir=None, store_dir=None, schema="uci_13", data_path=None,
+                 batch_size=None, channel=None, verbose=True):
+        self.db_path = db_path or config.ONLINE_DB_PATH
+        self.checkpoint_path = Path(checkpoint_dir or config.ONLINE_CHECKPOINT_DIR) / CHECKPOINT_FILE
+        self.store = ModelStore(store_dir)
+        self.schema = builtin_schema(schema)
+        self.data_path = Path(data_path or config.DATASET_PATH)
+        self.batch_size = batch_size or config.ONLINE_BATCH_SIZE
+        self.channel = channel or config.ONLINE_CHANNEL
+        self.verbose = verbose
+        self._holdout = None
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    # Checkpoint ------------------------------------------------------------
+
+    def load_checkpoint(self):
+        """Saved state, or a fresh state bootstrapped from the CSV"""
+        if self.checkpoint_path.exists():
+            state = joblib.load(self.checkpoint_path)
+            if state["schema"] != self.schema.name:
+                raise ValueError(f"Checkpoint was trained on schema '{state['schema']}', not '{self.schema.name}'")
+            self.log(f"[online] resuming at outcome {state['cursor']} ({state['n_samples']} samples seen)")
+            return state
+        return self.bootstrap()
+
+    def save_checkpoint(self, state):
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.checkpoint_path.with_suffix(f".tmp{os.getpid()}")
+        joblib.dump(state, tmp)
+        os.replace(tmp, self.checkpoint_path)
+
+    def reset(self):
+        self.checkpoint_path.unlink(missing_ok=True)
+
+    # Data ------------------------------------------------------------------
+
+    def _split(self):
+        df = pd.read_csv(self.data_path)
+        X, y = df[self.schema.names], df[self.schema.target]
+        return train_test_split(X, y, test_size=HOLDOUT_SIZE, stratify=y, random_state=RANDOM_STATE)
+
+    def holdout(self):
+        if self._holdout is None:
+            _, X_test, _, y_test = self._split()
+            self._holdout = (X_test, y_test)
+        return self._holdout
+
+    def bootstrap(self):
+        """Initial state: shuffled mini-batch passes over the training split of the CSV"""
+        X_train, X_test, y_train, y_test = self._split()
+        self._holdout = (X_test, y_test)
+        state = new_state(self.schema.name)
+        order = np.random.RandomState(RANDOM_STATE).permutation(len(X_train))
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            partial_fit(state, X_train.iloc[rows], y_train.iloc[rows].to_numpy())
+        self.log(f"[online] bootstrapped from {self.data_path.name} ({state['n_samples']} rows)")
+        self.save_checkpoint(state)
+        return state
+
+    def batches(self, cursor):
+        """
+        Yield (last_id, X, y, skipped) mini-batches of confirmed outcomes after cursor
+
+        Rows whose patient data does not match the schema (or whose outcome is not
+        0/1) are skipped but still advance the cursor.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            while True:
+                try:
+                    rows = conn.execute(OUTCOMES_QUERY, (cursor, self.batch_size)).fetchall()
+                except sqlite3.OperationalError as e:
+                    if "no such table" not in str(e):
+                        raise
+                    rows = []  # database predates the outcomes table
+                if not rows:
+                    return
+                records, labels, skipped = [], [], 0
+                for _, patient_data, outcome in rows:
+                    values, errors = self.schema.validate(json.loads(patient_data or "{}"))
+                    if errors or outcome not in (0, 1):
+                        skipped += 1
+                        continue
+                    records.append(values)
+                    labels.append(outcome)
+                cursor = rows[-1][0]
+                X = pd.DataFrame(records, columns=self.schema.names, dtype=np.float64)
+                yield cursor, X, np.asarray(labels, dtype=int), skipped
+        finally:
+            conn.close()
+
+    # Run -------------------------------------------------------------------
+
+    def run(self, max_batches=None, publish=True):
+        """
+        Consume new outcomes and optionally publish the updated model
+
+        Returns:
+        --------
+        summary : dict
+            rows learned from, batches, skipped rows, cursor, holdout metrics and
+            the candidate's hash/channel when published
+        """
+        state = self.load_checkpoint()
+        learned = batches = skipped = 0
+        for cursor, X, y, n_skipped in self.batches(state["cursor"]):
+            if len(y):
+                partial_fit(state, X, y)
+            state["cursor"] = cursor
+            state["skipped"] += n_skipped
+            self.save_checkpoint(state)
+            learned += len(y)
+            skipped += n_skipped
+            batches += 1
+            if max_batches and batches >= max_batches:
+                break
+        self.log(f"[online] learned from {learned} outcomes in {batches} batches ({skipped} skipped), "
+                 f"cursor {state['cursor']}")
+
+        metrics = self.evaluate(state)
+        summary = {
+            "learned": learned,
+            "batches": batches,
+            "skipped": skipped,
+            "cursor": state["cursor"],
+            "n_samples": state["n_samples"],
+            "metrics": metrics,
+            "hash": None,
+            "channel": None,
+        }
+        if publish:
+            summary["hash"] = self.publish(state, metrics)
+            summary["channel"] = self.channel
+        return summary
+
+    def evaluate(self, state):
+        X_test, y_test = self.holdout()
+        y_prob = as_pipeline(state).predict_proba(X_test)[:, 1]
+        y_pred = (y_prob >= 0.5).astype(int)
+        metrics = {
+            "roc_auc": float(roc_auc_score(y_test, y_prob)),
+            "test_accuracy": float(accuracy_score(y_test, y_pred)),
+            "f1": float(f1_score(y_test, y_pred, zero_division=0)),
+            "log_loss": float(log_loss(y_test, y_prob, labels=CLASSES)),
+            "n_features": len(self.schema.names),
+            "n_train_samples": int(state["n_samples"]),
+            "n_test_samples": int(len(y_test)),
+        }
+        for name in ("roc_auc", "test_accuracy", "log_loss"):
+            self.log(f"   {name:15s}: {metrics[name]:.4f}")
+        return metrics
+
+    def publish(self, state, metrics):
+        """Store the current state as a candidate version and promote it to the online channel"""
+        model = as_pipeline(state)
+        coef = np.abs(state["model"].coef_[0])
+        importances = coef / coef.sum() if coef.sum() else coef
+        version = f"{datetime.now():%Y%m%d-%H%M%S}-online{state['cursor']}"
+
+        self.store.root.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.store.root, prefix=".online-") as staging:
+            staging = Path(staging)
+            joblib.dump(model, staging / config.MODEL_PATH.name)
+            _write_json(staging / config.FEATURE_NAMES_PATH.name, self.schema.names)
+            _write_json(staging / config.FEATURE_IMPORTANCES_PATH.name, {
+                "feature_names": self.schema.names,
+                "importances": importances.tolist(),
+                "sorted_indices": np.argsort(importances)[::-1].tolist(),
+            })
+            _write_json(staging / config.MODEL_METRICS_PATH.name, metrics)
+            self.schema.save(staging / SCHEMA_FILE)
+            files = {path.name: path for path in staging.iterdir()}
+            model_hash = self.store.put(files, {"name": self.channel, "version": version, "metrics": metrics,
+                                                "source": "online", "outcome_cursor": state["cursor"],
+                                                "n_samples": state["n_samples"]})
+        self.store.promote(model_hash, channel=self.channel)
+        self.log(f"[online] candidate {model_hash} promoted to channel {self.channel}")
+        return model_hash
+
+
+def _write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Learn from confirmed outcomes and publish a candidate model")
+    parser.add_argument("--db", help=f"database with predictions and outcomes (default {config.ONLINE_DB_PATH})")
+    parser.add_argument("--batch-size", type=int, help=f"rows per partial_fit (default {config.ONLINE_BATCH_SIZE})")
+    parser.add_argument("--max-batches", type=int, help="stop after this many batches")
+    parser.add_argument("--no-publish", action="store_true", help="only update the checkpoint")
+    parser.add_argument("--reset", action="store_true", help="discard the checkpoint and bootstrap again")
+    parser.add_argument("--store-dir", help=f"model store (default {config.MODEL_STORE_DIR})")
+    parser.add_argument("--checkpoint-dir", help=f"checkpoint directory (default {config.ONLINE_CHECKPOINT_DIR})")
+    args = parser.parse_args()
+
+    trainer = OnlineTrainer(db_path=args.db, checkpoint_dir=args.checkpoint_dir, store_dir=args.store_dir,
+                            batch_size=args.batch_size)
+    if args.reset:
+        trainer.reset()
+    trainer.run(max_batches=args.max_batches, publish=not args.no_publish)
+
+
+if __name__ == "__main__":
+    main()
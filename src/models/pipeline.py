@@ -0,0 +1,457 @@
+"""
+Config-driven training pipeline
+One entry point for every model this project ships. A JSON config
+(src/models/configs/*.json) drives seven stages:
+
+    load -> split -> search -> fit -> calibrate -> evaluate -> export
+
+The output of each stage is cached under config.TRAINING_CACHE_DIR. The cache key
+hashes the stage's own config section together with the key of the stage before
+it. So a run where only the "evaluate" section changed reuses the fitted model,
+and a new split reruns everything from split on but not load.
+
+With a "calibration" section ({"method": "isotonic" | "sigmoid"}) the calibrate
+stage fits a monotone lookup table on out-of-fold predictions of the training
+split. It is exported as calibration.json and applied when serving, so the
+evaluated and served probabilities are calibrated (see calibration.py).
+
+The top-level "schema" names the feature schema the model is trained on
+(src/models/schemas/<name>.json, or an inline schema object). Load selects
+exactly those columns, and the schema is exported with the model so the
+serving endpoints validate requests against it (see feature_schema.py).
+
+Export adds the artifacts to the content-addressed model store as
+models/<hash>/ (see model_store.py). With export.publish the new version is
+promoted to the models/current.<name> channel, and with export.default also to
+models/current, which is what the apps serve when a request names no model.
+
+    python -m src.models.pipeline                     # random forest (the served model)
+    python -m src.models.pipeline --config src/models/configs/logistic_regression.json
+    python -m src.models.pipeline --config src/models/configs/heart_risk_extended.json
+    python -m src.models.pipeline --force fit         # rerun fit and every later stage
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.metrics import brier_score_loss
+from sklearn.model_selection import cross_val_predict, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+import config
+
+try:
+    from .calibration import CALIBRATION_FILE, expected_calibration_error, fit_calibration
+    from .feature_schema import SCHEMA_FILE, FeatureSchema, builtin_schema
+    from .forest_arrays import export_forest_arrays, supports
+    from .model_store import ModelStore, file_sha256
+    from .training import make_cv_splits, search_logistic_regression, search_random_forest
+except ImportError:  # run from inside src/models
+    from calibration import CALIBRATION_FILE, expected_calibration_error, fit_calibration
+    from feature_schema import SCHEMA_FILE, FeatureSchema, builtin_schema
+    from forest_arrays import export_forest_arrays, supports
+    from model_store import ModelStore, file_sha256
+    from training import make_cv_splits, search_logistic_regression, search_random_forest
+
+STAGES = ("load", "split", "search", "fit", "calibrate", "evaluate", "export")
+
+MODELS = {
+    "logistic_regression": LogisticRegression,
+    "random_forest": RandomForestClassifier,
+}
+
+METRICS = {
+    "roc_auc": lambda y, y_pred, y_prob: roc_auc_score(y, y_prob),
+    "accuracy": lambda y, y_pred, y_prob: accuracy_score(y, y_pred),
+    "precision": lambda y, y_pred, y_prob: precision_score(y, y_pred, zero_division=0),
+    "recall": lambda y, y_pred, y_prob: recall_score(y, y_pred, zero_division=0),
+    "f1": lambda y, y_pred, y_prob: f1_score(y, y_pred, zero_division=0),
+}
+# Names the apps already read from model_metrics.json
+METRIC_KEYS = {"accuracy": "test_accuracy"}
+
+# Search settings that change speed, not results, so they stay out of the cache key
+_RUNTIME_SEARCH_KEYS = ("n_jobs", "backend")
+
+
+def load_config(path=None):
+    """Read a pipeline config (default config.TRAINING_CONFIG_PATH)"""
+    with open(path or config.TRAINING_CONFIG_PATH, "r") as f:
+        return json.load(f)
+
+
+def resolve_schema(cfg):
+    """FeatureSchema for a config: a built-in schema name, an inline schema, or None (all columns)"""
+    schema = cfg.get("schema")
+    if schema is None:
+        return None
+    if isinstance(schema, str):
+        return builtin_schema(schema)
+    return FeatureSchema.from_dict(schema)
+
+
+def stage_key(*parts):
+    """Stable short hash of JSON-serializable parts"""
+    blob = json.dumps(parts, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def resolve_grid(grid, prefix=""):
+    """JSON grid -> sklearn grid; {"logspace": [start, stop, num]} expands to np.logspace"""
+    resolved = {}
+    for name, values in grid.items():
+        if isinstance(values, dict) and "logspace" in values:
+            values = list(np.logspace(*values["logspace"]))
+        resolved[prefix + name] = values
+    return resolved
+
+
+def build_estimator(model_cfg, params=None):
+    """Model from its config section, wrapped in a scaler Pipeline when model.scale is set"""
+    model = MODELS[model_cfg["type"]](**(model_cfg.get("params", {}) if params is None else params))
+    if model_cfg.get("scale"):
+        return Pipeline([("scaler", StandardScaler()), ("model", model)])
+    return model
+
+
+def _python_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class StageCache:
+    """One joblib file per (stage, key) in a directory"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def path(self, stage, key):
+        return self.directory / f"{stage}-{key}.joblib"
+
+    def get(self, stage, key):
+        path = self.path(stage, key)
+        return joblib.load(path) if path.exists() else None
+
+    def put(self, stage, key, value):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(stage, key)
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        joblib.dump(value, tmp)
+        os.replace(tmp, path)
+
+
+class TrainingPipeline:
+    """
+    Run the stages of one pipeline config, reusing cached stage outputs
+
+    Parameters:
+    -----------
+    cfg : dict
+        Parsed config (see load_config)
+    cache_dir : Path, optional
+        Stage cache (default config.TRAINING_CACHE_DIR)
+    store_dir : Path, optional
+        Model store root (default config.MODEL_STORE_DIR)
+    force : str, optional
+        Rerun this stage and every later one even if cached
+    publish : bool, optional
+        Override export.publish (promote the new version to its channel, and to current with export.default)
+    verbose : bool
+        Print progress
+    """
+
+    def __init__(self, cfg, cache_dir=None, store_dir=None, force=None, publish=None, verbose=True):
+        if force is not None and force not in STAGES:
+            raise ValueError(f"Unknown stage '{force}', expected one of {', '.join(STAGES)}")
+        self.cfg = cfg
+        self.name = cfg.get("name", cfg["model"]["type"])
+        self.schema = resolve_schema(cfg)
+        self.cache = StageCache(cache_dir or config.TRAINING_CACHE_DIR)
+        self.store = ModelStore(store_dir)
+        self.forced = set(STAGES[STAGES.index(force):]) if force else set()
+        self.publish = cfg.get("export", {}).get("publish", False) if publish is None else publish
+        self.verbose = verbose
+        self.status = {}
+        self.keys = {}
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    def _stage(self, name, key, run):
+        self.keys[name] = key
+        result = None if name in self.forced else self.cache.get(name, key)
+        if result is not None:
+            self.status[name] = "cached"
+            self.log(f"[{name}] cached ({key})")
+            return result
+        self.log(f"[{name}] running ({key})")
+        result = run()
+        self.cache.put(name, key, result)
+        self.status[name] = "ran"
+        return result
+
+    def run(self):
+        """
+        Run all stages
+
+        Returns:
+        --------
+        summary : dict
+            hash, version, artifact_dir, metrics, published and per-stage status
+        """
+        cfg = self.cfg
+        data_path = Path(cfg["data"]["path"])
+        if not data_path.is_absolute():
+            data_path = config.BASE_DIR / data_path
+
+        schema = self.schema.to_dict() if self.schema else None
+        load_key = stage_key("load", cfg["data"], schema, file_sha256(data_path))
+        data = self._stage("load", load_key, lambda: self.load(data_path))
+
+        split_key = stage_key("split", load_key, cfg["split"])
+        split = self._stage("split", split_key, lambda: self.split(data))
+
+        search_cfg = {k: v for k, v in cfg.get("search", {}).items() if k not in _RUNTIME_SEARCH_KEYS}
+        search_key = stage_key("search", split_key, cfg["model"], search_cfg)
+        params = self._stage("search", search_key, lambda: self.search(split))
+
+        fit_key = stage_key("fit", search_key)
+        model = self._stage("fit", fit_key, lambda: self.fit(split, params))
+
+        calibrate_key = stage_key("calibrate", fit_key, cfg.get("calibration"))
+        calibration = self._stage("calibrate", calibrate_key, lambda: self.calibrate(split, params))
+
+        evaluate_key = stage_key("evaluate", calibrate_key, cfg["evaluate"])
+        evaluation = self._stage("evaluate", evaluate_key, lambda: self.evaluate(split, model, calibration))
+
+        # Export always runs: it is cheap and every run gets its own version directory
+        self.keys["export"] = evaluate_key
+        summary = self.export(model, params, evaluation, evaluate_key, calibration)
+        self.status["export"] = "ran"
+        summary["stages"] = dict(self.status)
+        return summary
+
+    # Stages ----------------------------------------------------------------
+
+    def load(self, data_path):
+        df = pd.read_csv(data_path)
+        target = self.cfg["data"].get("target") or self.schema.target
+        if self.schema is None:
+            return {"X": df.drop(target, axis=1), "y": df[target]}
+        missing = [name for name in self.schema.names if name not in df.columns]
+        if missing:
+            raise ValueError(f"{data_path.name} is missing schema columns: {', '.join(missing)}")
+        X = df[self.schema.names]
+        for name, (low, high) in self.schema.ranges.items():
+            outside = int(((low is not None) & (X[name] < low)).sum() + ((high is not None) & (X[name] > high)).sum())
+            if outside:
+                self.log(f"   warning: {outside} rows have {name} outside [{low}, {high}]")
+        return {"X": X, "y": df[target]}
+
+    def split(self, data):
+        split_cfg = self.cfg["split"]
+        X_train, X_test, y_train, y_test = train_test_split(
+            data["X"], data["y"],
+            test_size=split_cfg["test_size"],
+            stratify=data["y"] if split_cfg.get("stratify") else None,
+            random_state=split_cfg.get("random_state"))
+        return {"X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test}
+
+    def search(self, split):
+        """Tuned model params (the configured params unchanged when search is disabled)"""
+        model_cfg = self.cfg["model"]
+        params = dict(model_cfg.get("params", {}))
+        search_cfg = self.cfg.get("search", {})
+        if not search_cfg.get("enabled"):
+            return params
+
+        prefix = "model__" if model_cfg.get("scale") else ""
+        # Parallelism is across candidates and folds, not inside each model
+        estimator = build_estimator(model_cfg, {**params, "n_jobs": 1} if "n_jobs" in params else params)
+        grid = resolve_grid(search_cfg["param_grid"], prefix)
+        cv = make_cv_splits(split["X_train"], split["y_train"], n_splits=search_cfg.get("cv_folds", 5),
+                            random_state=self.cfg["split"].get("random_state"))
+        options = dict(cv=cv, n_jobs=search_cfg.get("n_jobs"), backend=search_cfg.get("backend"),
+                       param_grid=grid, estimator=estimator, verbose=self.verbose)
+        if model_cfg["type"] == "random_forest":
+            result = search_random_forest(split["X_train"], split["y_train"],
+                                          resource=prefix + "n_estimators", **options)
+        else:
+            result = search_logistic_regression(split["X_train"], split["y_train"], **options)
+
+        for name, value in result.best_params_.items():
+            params[name[len(prefix):]] = _python_value(value)
+        self.log(f"   Best parameters: {params}")
+        return params
+
+    def fit(self, split, params):
+        model = build_estimator(self.cfg["model"], params)
+        model.fit(split["X_train"], split["y_train"])
+        return model
+
+    def calibrate(self, split, params):
+        """Lookup table fitted on out-of-fold training predictions ({"table": None} when not configured)"""
+        calibration_cfg = self.cfg.get("calibration") or {}
+        method = calibration_cfg.get("method")
+        if not method or method == "none":
+            return {"table": None}
+        model_cfg = self.cfg["model"]
+        # Same parallelism rule as search: across folds, not inside each model
+        estimator = build_estimator(model_cfg, {**params, "n_jobs": 1} if "n_jobs" in params else params)
+        cv = make_cv_splits(split["X_train"], split["y_train"], n_splits=calibration_cfg.get("cv_folds", 5),
+                            random_state=self.cfg["split"].get("random_state"))
+        raw = cross_val_predict(estimator, split["X_train"], split["y_train"], cv=cv, method="predict_proba",
+                                n_jobs=calibration_cfg.get("n_jobs"))[:, 1]
+        table = fit_calibration(split["y_train"], raw, method)
+        self.log(f"   {method} calibration: {len(table.x)} knots")
+        return {"table": table}
+
+    def evaluate(self, split, model, calibration=None):
+        eval_cfg = self.cfg["evaluate"]
+        X_test, y_test = split["X_test"], split["y_test"]
+        raw_prob = model.predict_proba(X_test)[:, 1]
+        table = (calibration or {}).get("table")
+        y_prob = table(raw_prob) if table is not None else raw_prob
+        y_pred = (y_prob >= eval_cfg.get("threshold", 0.5)).astype(int)
+
+        metrics = {}
+        for name in eval_cfg.get("metrics", ["roc_auc", "accuracy"]):
+            metrics[METRIC_KEYS.get(name, name)] = float(METRICS[name](y_test, y_pred, y_prob))
+        metrics.update({
+            "threshold": eval_cfg.get("threshold", 0.5),
+            "confusion_matrix": confusion_matrix(y_test, y_pred).tolist(),
+            "brier_score": float(brier_score_loss(y_test, y_prob)),
+            "calibration_error": expected_calibration_error(y_test, y_prob),
+            "calibration": table.method if table is not None else None,
+            "brier_score_uncalibrated": float(brier_score_loss(y_test, raw_prob)),
+            "n_features": int(X_test.shape[1]),
+            "n_train_samples": int(len(split["X_train"])),
+            "n_test_samples": int(len(X_test)),
+        })
+
+        estimator = model.named_steps["model"] if isinstance(model, Pipeline) else model
+        if hasattr(estimator, "feature_importances_"):
+            importances = estimator.feature_importances_
+        else:
+            # Linear models: share of the absolute coefficient mass
+            importances = np.abs(estimator.coef_[0])
+            importances = importances / importances.sum()
+        feature_names = list(X_test.columns)
+        indices = np.argsort(importances)[::-1]
+
+        for name, value in metrics.items():
+            if isinstance(value, float):
+                self.log(f"   {name:15s}: {value:.4f}")
+        return {
+            "metrics": metrics,
+            "feature_importances": {
+                "feature_names": feature_names,
+                "importances": importances.tolist(),
+                "sorted_indices": indices.tolist(),
+            },
+        }
+
+    def export(self, model, params, evaluation, key, calibration=None):
+        """Add the artifacts to the model store and optionally promote them"""
+        name = self.name
+        export_cfg = self.cfg.get("export", {})
+        version = f"{datetime.now():%Y%m%d-%H%M%S}-{key[:8]}"
+        importances = evaluation["feature_importances"]
+
+        self.store.root.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.store.root, prefix=".export-") as staging:
+            staging = Path(staging)
+            joblib.dump(model, staging / config.MODEL_PATH.name)
+            if supports(model):
+                # Read-only array layout served through a memory map
+                export_forest_arrays(model, staging)
+            _write_json(staging / config.FEATURE_NAMES_PATH.name, importances["feature_names"])
+            if self.schema is not None:
+                self.schema.save(staging / SCHEMA_FILE)
+            if (calibration or {}).get("table") is not None:
+                calibration["table"].save(staging / CALIBRATION_FILE)
+            _write_json(staging / config.FEATURE_IMPORTANCES_PATH.name, importances)
+            _write_json(staging / config.MODEL_METRICS_PATH.name, evaluation["metrics"])
+            _write_json(staging / "training_config.json", self.cfg)
+            _write_json(staging / "pipeline.json", {"params": params, "stage_keys": self.keys})
+            if export_cfg.get("plot_importances"):
+                _plot_importances(importances, staging / "feature_importance.png")
+
+            files = {path.name: path for path in staging.iterdir()}
+            model_hash = self.store.put(files, {"name": name, "version": version,
+                                                "metrics": evaluation["metrics"]})
+
+        artifact_dir = self.store.path(model_hash)
+        self.log(f"[export] {artifact_dir}")
+        if self.publish:
+            self.store.promote(model_hash, channel=name)
+            self.log(f"[export] promoted {model_hash} to channel {name}")
+            if export_cfg.get("default"):
+                self.store.promote(model_hash)
+                self.log(f"[export] promoted {model_hash} to current")
+
+        return {
+            "hash": model_hash,
+            "version": version,
+            "artifact_dir": str(artifact_dir),
+            "metrics": evaluation["metrics"],
+            "published": bool(self.publish),
+            "channel": name if self.publish else None,
+        }
+
+
+def _write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def _plot_importances(importances, path, top_n=10):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    names = importances["feature_names"]
+    values = importances["importances"]
+    order = importances["sorted_indices"][:top_n]
+    plt.figure(figsize=(12, 8))
+    plt.barh(range(len(order)), [values[i] for i in order][::-1])
+    plt.yticks(range(len(order)), [names[i] for i in order][::-1])
+    plt.xlabel("Feature Importance")
+    plt.title(f"Top {len(order)} Feature Importances")
+    plt.tight_layout()
+    plt.savefig(path, dpi=150, bbox_inches="tight")
+    plt.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train, evaluate and export a model from a pipeline config")
+    parser.add_argument("--config", default=str(config.TRAINING_CONFIG_PATH), help="pipeline config (JSON)")
+    parser.add_argument("--force", choices=STAGES, help="rerun this stage and every later one")
+    parser.add_argument("--no-publish", action="store_true", help="store the new version without promoting it")
+    parser.add_argument("--store-dir", help=f"model store (default {config.MODEL_STORE_DIR})")
+    parser.add_argument("--cache-dir", help=f"stage cache (default {config.TRAINING_CACHE_DIR})")
+    args = parser.parse_args()
+
+    pipeline = TrainingPipeline(load_config(args.config),
+                                cache_dir=args.cache_dir,
+                                store_dir=args.store_dir,
+                                force=args.force,
+                                publish=False if args.no_publish else None)
+    summary = pipeline.run()
+    print(f"\nVersion {summary['version']} ({summary['hash']}): " +
+          ", ".join(f"{stage} {status}" for stage, status in summary["stages"].items()))
+
+
+if __name__ == "__main__":
+    main()
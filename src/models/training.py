@@ -0,0 +1,156 @@
+"""
+Hyperparameter search shared by the training scripts
+- One set of stratified CV splits is computed up front and reused by every
+  search, so all candidates are scored on identical folds.
+- Candidate fits run on a configurable joblib backend ("loky" process pool by
+  default) with TRAINING_N_JOBS workers (-1 = all cores).
+- The RandomForest grid is searched with successive halving on n_estimators:
+  100 sampled (max_depth, min_samples_split, min_samples_leaf) combinations
+  get a cheap 10-tree forest, and only the best third survives to each next
+  round (10 -> 30 -> 90 -> 270 -> 810 trees). That is 5x the candidates of the
+  old 20-iteration RandomizedSearchCV for ~60% of the trees.
+"""
+import os
+import time
+
+import numpy as np
+from joblib import parallel_backend
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV, HalvingRandomSearchCV, StratifiedKFold
+
+TRAINING_N_JOBS = int(os.getenv("TRAINING_N_JOBS", "-1"))
+TRAINING_BACKEND = os.getenv("TRAINING_BACKEND", "loky")  # loky (processes), threading, multiprocessing
+
+CV_FOLDS = 5
+RANDOM_STATE = 42
+
+LOG_REG_GRID = {"C": np.logspace(-4, 4, 20),
+                "solver": ["liblinear"]}
+
+# n_estimators is the halving resource, so it is not part of the grid
+RF_GRID = {"max_depth": [None, 3, 5, 10],
+           "min_samples_split": list(np.arange(2, 20, 2)),
+           "min_samples_leaf": list(np.arange(1, 20, 2))}
+RF_MIN_ESTIMATORS = 10
+RF_MAX_ESTIMATORS = 1000
+HALVING_FACTOR = 3
+
+
+def make_cv_splits(X, y, n_splits=CV_FOLDS, random_state=RANDOM_STATE):
+    """
+    Precompute stratified train/validation index pairs
+
+    Parameters:
+    -----------
+    X : array-like
+        Training features
+    y : array-like
+        Training labels
+    n_splits : int
+        Number of folds
+    random_state : int
+        Shuffle seed
+
+    Returns:
+    --------
+    splits : list of (train_idx, val_idx)
+        Pass as cv= to any search so they all share the same folds
+    """
+    folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    return list(folds.split(X, y))
+
+
+def run_search(search, X, y, n_jobs=None, backend=None, verbose=True):
+    """Fit a search on the configured joblib backend and report wall-clock time"""
+    n_jobs = TRAINING_N_JOBS if n_jobs is None else n_jobs
+    backend = backend or TRAINING_BACKEND
+    start = time.perf_counter()
+    with parallel_backend(backend, n_jobs=n_jobs):
+        search.fit(X, y)
+    if verbose:
+        print(f"{type(search).__name__}({type(search.estimator).__name__}): "
+              f"{time.perf_counter() - start:.1f}s on {backend} (n_jobs={n_jobs}), "
+              f"best CV score {search.best_score_:.4f}")
+    return search
+
+
+def search_logistic_regression(X, y, cv=None, n_jobs=None, backend=None, param_grid=None,
+                               estimator=None, verbose=True):
+    """
+    Exhaustive grid search over LogisticRegression C values
+
+    Parameters:
+    -----------
+    X, y : array-like
+        Training data
+    cv : list of (train_idx, val_idx), optional
+        Shared splits from make_cv_splits (computed here if omitted)
+    n_jobs : int, optional
+        Parallel workers (default TRAINING_N_JOBS)
+    backend : str, optional
+        joblib backend (default TRAINING_BACKEND)
+    param_grid : dict, optional
+        Grid to search (default LOG_REG_GRID)
+    estimator : estimator, optional
+        LogisticRegression or a Pipeline ending in one (grid keys then need the
+        step prefix, e.g. model__C)
+
+    Returns:
+    --------
+    search : GridSearchCV
+        Fitted search; best_estimator_ is refit on all of X
+    """
+    cv = make_cv_splits(X, y) if cv is None else cv
+    search = GridSearchCV(estimator if estimator is not None else LogisticRegression(),
+                          param_grid=param_grid or LOG_REG_GRID,
+                          cv=cv,
+                          n_jobs=n_jobs if n_jobs is not None else TRAINING_N_JOBS)
+    return run_search(search, X, y, n_jobs=n_jobs, backend=backend, verbose=verbose)
+
+
+def search_random_forest(X, y, cv=None, n_jobs=None, backend=None, param_grid=None,
+                         random_state=RANDOM_STATE, estimator=None, resource="n_estimators", verbose=True):
+    """
+    Successive-halving search over the RandomForest grid
+
+    Parameters:
+    -----------
+    X, y : array-like
+        Training data
+    cv : list of (train_idx, val_idx), optional
+        Shared splits from make_cv_splits (computed here if omitted)
+    n_jobs : int, optional
+        Parallel workers (default TRAINING_N_JOBS)
+    backend : str, optional
+        joblib backend (default TRAINING_BACKEND)
+    param_grid : dict, optional
+        Grid without n_estimators (default RF_GRID)
+    random_state : int
+        Seed for the forests
+    estimator : estimator, optional
+        RandomForestClassifier or a Pipeline ending in one
+    resource : str
+        Halving parameter; model__n_estimators when estimator is a Pipeline
+
+    Returns:
+    --------
+    search : HalvingRandomSearchCV
+        Fitted search; best_params_ includes the n_estimators of the final round
+    """
+    cv = make_cv_splits(X, y) if cv is None else cv
+    # Forests stay single-threaded: the parallelism is across candidates and folds
+    if estimator is None:
+        estimator = RandomForestClassifier(n_jobs=1, random_state=random_state)
+    search = HalvingRandomSearchCV(estimator,
+                                   param_distributions=param_grid or RF_GRID,
+                                   n_candidates="exhaust",
+                                   resource=resource,
+                                   min_resources=RF_MIN_ESTIMATORS,
+                                   max_resources=RF_MAX_ESTIMATORS,
+                                   factor=HALVING_FACTOR,
+                                   cv=cv,
+                                   random_state=random_state,
+                                   n_jobs=n_jobs if n_jobs is not None else TRAINING_N_JOBS)
+    return run_search(search, X, y, n_jobs=n_jobs, backend=backend, verbose=verbose)
@@ -14,7 +14,8 @@ from sklearn.ensemble import RandomForestClassifier
 
 ## Model evaluation tools
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.model_selection import RandomizedSearchCV, GridSearchCV
+from sklearn.model_selection import RandomizedSearchCV
+from models.training import make_cv_splits, search_logistic_regression, search_random_forest
 from sklearn.metrics import confusion_matrix, classification_report
 from sklearn.metrics import precision_score, recall_score, f1_score
 # Note: In Scikit-Learn 1.2+, "plot_roc_curve" was changed to "RocCurveDisplay"
@@ -287,11 +288,14 @@ log_reg_grid = {"C": np.logspace(-4, 4, 20),
                 "solver": ["liblinear"]}
 
 # Different RandomForestClassifier hyperparameters
-rf_grid = {"n_estimators": np.arange(10, 1000, 50),
-           "max_depth": [None, 3, 5, 10],
+# (n_estimators is the successive-halving budget: 10 -> 810 trees, see models/training.py)
+rf_grid = {"max_depth": [None, 3, 5, 10],
            "min_samples_split": np.arange(2, 20, 2),
            "min_samples_leaf": np.arange(1, 20, 2)}
 
+# One set of stratified folds shared by every search below
+cv_splits = make_cv_splits(X_train, y_train)
+
 # ===== CELL SEPARATOR =====
 
 # Setup random seed
@@ -300,8 +304,9 @@ np.random.seed(42)
 # Setup random hyperparameter search for LogisticRegression
 rs_log_reg = RandomizedSearchCV(LogisticRegression(),
                                 param_distributions=log_reg_grid,
-                                cv=5,
+                                cv=cv_splits,
                                 n_iter=20,
+                                n_jobs=-1,
                                 verbose=True)
 
 # Fit random hyperparameter search model
@@ -321,15 +326,8 @@ rs_log_reg.score(X_test, y_test)
 # Setup random seed
 np.random.seed(42)
 
-# Setup random hyperparameter search for RandomForestClassifier
-rs_rf = RandomizedSearchCV(RandomForestClassifier(),
-                           param_distributions=rf_grid,
-                           cv=5,
-                           n_iter=20,
-                           verbose=True)
-
-# Fit random hyperparameter search model
-rs_rf.fit(X_train, y_train);
+# Successive-halving search for RandomForestClassifier, candidates fitted in parallel
+rs_rf = search_random_forest(X_train, y_train, cv=cv_splits, param_grid=rf_grid)
 
 # ===== CELL SEPARATOR =====
 
@@ -347,14 +345,8 @@ rs_rf.score(X_test, y_test)
 log_reg_grid = {"C": np.logspace(-4, 4, 20),
                 "solver": ["liblinear"]}
 
-# Setup grid hyperparameter search for LogisticRegression
-gs_log_reg = GridSearchCV(LogisticRegression(),
-                          param_grid=log_reg_grid,
-                          cv=5,
-                          verbose=True)
-
-# Fit grid hyperparameter search model
-gs_log_reg.fit(X_train, y_train);
+# Grid hyperparameter search for LogisticRegression, candidates fitted in parallel
+gs_log_reg = search_logistic_regression(X_train, y_train, cv=cv_splits, param_grid=log_reg_grid)
 
 # ===== CELL SEPARATOR =====
 
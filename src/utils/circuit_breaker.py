@@ -0,0 +1,93 @@
+"""
+Circuit Breaker for external services (Ollama)
+Keeps a cached health flag so callers can skip a dead service without I/O
+"""
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker with exponential probe backoff
+
+    - CLOSED: calls go through; `failure_threshold` consecutive failures open it
+      (3 by default, so a single slow or dropped request doesn't take Ollama
+      out of service for a whole backoff period)
+    - OPEN: calls are refused until the next probe time
+    - HALF_OPEN: a single probe call is let through; success closes the circuit,
+      failure re-opens it with the backoff doubled (up to `max_backoff`)
+    """
+
+    def __init__(self, name, failure_threshold=3, base_backoff=5.0, max_backoff=300.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.backoff = base_backoff
+        self.next_probe_at = 0.0
+        self.last_success_at = None
+        self.transitions = {}
+        self.rejected_calls = 0
+
+    @property
+    def is_healthy(self):
+        """Cached health flag - no I/O"""
+        return self.state == CLOSED
+
+    def _transition(self, new_state):
+        if new_state == self.state:
+            return
+        key = f"{self.state}->{new_state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self.state = new_state
+
+    def allow_request(self):
+        """Return True if a call (or probe) may be made right now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self._clock() >= self.next_probe_at:
+                self._transition(HALF_OPEN)
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.backoff = self.base_backoff
+            self.last_success_at = self._clock()
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+            elif self.state == CLOSED and self.consecutive_failures < self.failure_threshold:
+                return
+            self.next_probe_at = self._clock() + self.backoff
+            self._transition(OPEN)
+
+    def metrics(self):
+        """Snapshot of the breaker state and transition counters"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "healthy": self.state == CLOSED,
+                "consecutive_failures": self.consecutive_failures,
+                "backoff_seconds": self.backoff,
+                "next_probe_in_seconds": max(0.0, self.next_probe_at - self._clock()) if self.state == OPEN else 0.0,
+                "rejected_calls": self.rejected_calls,
+                "transitions": dict(self.transitions),
+            }
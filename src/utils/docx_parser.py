@@ -3,8 +3,123 @@ DOCX Parser for Patient Data Extraction
 Parses uploaded DOCX files to extract patient information
 """
 from docx import Document
+from functools import lru_cache
 import re
 import json
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Bump whenever extraction rules change; cached parse results are keyed on it
+PARSER_VERSION = "3"
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P, _W_R, _W_T, _W_TBL = W_NS + "p", W_NS + "r", W_NS + "t", W_NS + "tbl"
+_RUN_BREAKS = {W_NS + "tab": "\t", W_NS + "br": "\n", W_NS + "cr": "\n"}
+
+
+class _NeedsFullParse(Exception):
+    """The document uses layout the streaming extractor does not reproduce"""
+
+
+def _paragraph_text(p):
+    # Same rules as python-docx Paragraph.text: direct runs only
+    parts = []
+    for r in p.iterfind(_W_R):
+        for child in r:
+            if child.tag == _W_T:
+                parts.append(child.text or "")
+            elif child.tag in _RUN_BREAKS:
+                parts.append(_RUN_BREAKS[child.tag])
+    return "".join(parts)
+
+
+def _table_cell_texts(tbl):
+    columns = len(tbl.findall(f"{W_NS}tblGrid/{W_NS}gridCol"))
+    texts = []
+    for tr in tbl.iterfind(W_NS + "tr"):
+        cells = tr.findall(W_NS + "tc")
+        # Merged or ragged rows: python-docx repeats cells along the layout grid
+        if len(cells) != columns or tr.find(f"{W_NS}tc/{W_NS}tcPr/{W_NS}gridSpan") is not None \
+                or tr.find(f"{W_NS}tc/{W_NS}tcPr/{W_NS}vMerge") is not None:
+            raise _NeedsFullParse("merged table cells")
+        for tc in cells:
+            texts.append("\n".join(_paragraph_text(p) for p in tc.iterfind(_W_P)))
+    return texts
+
+
+def extract_docx_text(docx_file):
+    """
+    Plain text of a DOCX file, streamed from word/document.xml
+    
+    Gives the same text as PatientDataParser._extract_text on a python-docx
+    Document (body paragraphs, then table cells) without building the
+    document object model. Raises _NeedsFullParse for merged table cells.
+    """
+    paragraphs, cells = [], []
+    with zipfile.ZipFile(docx_file) as archive, archive.open("word/document.xml") as xml:
+        depth = 0
+        body = None
+        for event, elem in ET.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 2:
+                    body = elem
+                continue
+            # depth 3: direct children of <w:body>
+            if depth == 3:
+                if elem.tag == _W_P:
+                    paragraphs.append(_paragraph_text(elem))
+                elif elem.tag == _W_TBL:
+                    cells.extend(_table_cell_texts(elem))
+                body.clear()
+            depth -= 1
+    return "\n".join(paragraphs + cells)
+
+
+# Words a form may use instead of a code, checked in order against the text after
+# "<label>:" on the same line (more specific phrases first: "female" before "male")
+CATEGORY_CODES = {
+    'sex': [('female', 0), ('f', 0), ('male', 1), ('m', 1)],
+    'cp': [('atypical', 1), ('non-anginal', 2), ('non anginal', 2), ('asymptomatic', 3), ('typical', 0)],
+    'fbs': [('yes', 1), ('true', 1), ('>120', 1), ('> 120', 1), ('no', 0), ('false', 0), ('≤120', 0), ('<=120', 0)],
+    'restecg': [('normal', 0), ('st-t', 1), ('st t', 1), ('abnormality', 1), ('hypertrophy', 2),
+                ('left ventricular', 2)],
+    'exang': [('yes', 1), ('true', 1), ('no', 0), ('false', 0)],
+    'slope': [('upsloping', 0), ('up sloping', 0), ('flat', 1), ('downsloping', 2), ('down sloping', 2)],
+    'thal': [('normal', 1), ('fixed', 2), ('reversible', 3)],
+}
+
+
+@lru_cache(maxsize=None)
+def _keyword_patterns(keyword):
+    """Compiled value patterns for a keyword, in priority order"""
+    keyword = re.escape(keyword)
+    # Separators are spaces and tabs only, so a label never takes the number on the next line
+    return [
+        # Look for patterns like "age: 50" or "age 50" or "age=50"
+        re.compile(rf'(?<![a-z]){keyword}[ \t]*[:=][ \t]*(\d+\.?\d*)', re.IGNORECASE),
+        re.compile(rf'(?<![a-z]){keyword}[ \t]+(\d+\.?\d*)', re.IGNORECASE),
+        re.compile(rf'(\d+\.?\d*)[ \t]+{keyword}(?![a-z])', re.IGNORECASE),
+    ]
+
+
+@lru_cache(maxsize=None)
+def _label_pattern(keyword):
+    """The rest of the line after "<keyword>:" (categorical answers like "Sex: Male")"""
+    return re.compile(rf'(?<![a-z]){re.escape(keyword)}[ \t]*[:=][ \t]*([^\n]+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _phrase_pattern(phrase):
+    return re.compile(rf'(?<![a-z0-9]){re.escape(phrase)}(?![a-z0-9])', re.IGNORECASE)
+
+
+def category_code(field, answer):
+    """Code for a categorical answer ("Male" -> 1 for sex), or None if the words are not recognised"""
+    for phrase, code in CATEGORY_CODES.get(field, []):
+        if _phrase_pattern(phrase).search(answer):
+            return code
+    return None
 
 class PatientDataParser:
     """Parse patient data from DOCX documents"""
@@ -38,6 +153,10 @@ class PatientDataParser:
             # Thalassemia
             'thal': ['thal', 'thalassemia', 'thalassemia type', 'thallium']
         }
+        # Compile every keyword pattern once instead of on each lookup
+        for keywords in self.field_mappings.values():
+            for keyword in keywords:
+                _keyword_patterns(keyword)
     
     def parse_docx(self, docx_file):
         """
@@ -56,8 +175,7 @@ class PatientDataParser:
             List of parsing errors/warnings
         """
         try:
-            doc = Document(docx_file)
-            text_content = self._extract_text(doc)
+            text_content = self._read_text(docx_file)
             patient_data = {}
             errors = []
             
@@ -77,6 +195,15 @@ class PatientDataParser:
         except Exception as e:
             return {}, [f"Error parsing document: {str(e)}"]
     
+    def _read_text(self, docx_file):
+        """Stream the text out of the zip, using python-docx only when needed"""
+        try:
+            return extract_docx_text(docx_file)
+        except (_NeedsFullParse, ET.ParseError, KeyError):
+            if hasattr(docx_file, "seek"):
+                docx_file.seek(0)
+            return self._extract_text(Document(docx_file))
+    
     def _extract_text(self, doc):
         """Extract all text from document"""
         text_parts = []
@@ -90,72 +217,28 @@ class PatientDataParser:
     
     def _extract_field(self, text, field, keywords):
         """Extract a specific field value from text"""
+        lowered = text.lower()
         for keyword in keywords:
-            # Look for patterns like "age: 50" or "age 50" or "age=50"
-            patterns = [
-                rf'{keyword}\s*[:=]\s*(\d+\.?\d*)',
-                rf'{keyword}\s+(\d+\.?\d*)',
-                rf'(\d+\.?\d*)\s+{keyword}',
-            ]
+            # Every pattern contains the keyword literally, so skip the regex
+            # scans when it does not occur at all
+            if keyword not in lowered:
+                continue
             
-            for pattern in patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
+            for pattern in _keyword_patterns(keyword):
+                match = pattern.search(text)
                 if match:
                     value = float(match.group(1))
                     return self._convert_value(field, value)
         
-        # Special handling for categorical fields
-        if field == 'sex':
-            if 'male' in text or 'm' in text:
-                return 1
-            elif 'female' in text or 'f' in text:
-                return 0
-        
-        if field == 'cp':
-            if 'typical angina' in text or 'typical' in text:
-                return 0
-            elif 'atypical angina' in text or 'atypical' in text:
-                return 1
-            elif 'non-anginal' in text or 'non anginal' in text:
-                return 2
-            elif 'asymptomatic' in text:
-                return 3
-        
-        if field == 'fbs':
-            if 'yes' in text or '>120' in text or '> 120' in text:
-                return 1
-            elif 'no' in text or '≤120' in text or '<=120' in text:
-                return 0
-        
-        if field == 'restecg':
-            if 'normal' in text:
-                return 0
-            elif 'st-t' in text or 'st t' in text or 'abnormality' in text:
-                return 1
-            elif 'hypertrophy' in text or 'left ventricular' in text:
-                return 2
-        
-        if field == 'exang':
-            if 'yes' in text:
-                return 1
-            elif 'no' in text:
-                return 0
-        
-        if field == 'slope':
-            if 'upsloping' in text or 'up sloping' in text:
-                return 0
-            elif 'flat' in text:
-                return 1
-            elif 'downsloping' in text or 'down sloping' in text:
-                return 2
-        
-        if field == 'thal':
-            if 'normal' in text:
-                return 1
-            elif 'fixed defect' in text or 'fixed' in text:
-                return 2
-            elif 'reversible defect' in text or 'reversible' in text:
-                return 3
+        # Categorical answers written as words, read from the labelled line only
+        if field in CATEGORY_CODES:
+            for keyword in keywords:
+                if keyword not in lowered:
+                    continue
+                for match in _label_pattern(keyword).finditer(text):
+                    code = category_code(field, match.group(1))
+                    if code is not None:
+                        return code
         
         return None
     
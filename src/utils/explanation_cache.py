@@ -0,0 +1,221 @@
+"""
+Persistent cache for LLM clinical explanations
+An assistant with a cache prompts Ollama with the risk bucket and the
+identified factor set only (no raw values, no exact risk percentage), so an
+explanation can be shown to every patient with the same bucket and factors.
+They are stored in SQLite keyed on (model, prompt template, risk bucket,
+sorted factors) with LRU eviction and an optional TTL.
+
+Pre-warm from the prediction history:
+    python -m src.utils.explanation_cache --prewarm --db hospital.db --top 50
+Show hit rate:
+    python -m src.utils.explanation_cache --stats
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+DEFAULT_CACHE_PATH = os.getenv("EXPLANATION_CACHE_PATH", "explanations.db")
+DEFAULT_MAX_ENTRIES = int(os.getenv("EXPLANATION_CACHE_MAX_ENTRIES", "5000"))
+DEFAULT_TTL_SECONDS = float(os.getenv("EXPLANATION_CACHE_TTL", "0")) or None
+
+
+class ExplanationCache:
+    """
+    SQLite-backed LRU cache of explanation texts
+
+    Parameters:
+    -----------
+    path : str
+        SQLite file holding the cache
+    max_entries : int
+        Least recently used entries beyond this size are evicted
+    ttl_seconds : float, optional
+        Entries older than this are treated as misses and removed
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS explanations (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_explanations_lru ON explanations (last_access)")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO cache_stats (name, value) VALUES ('hits', 0), ('misses', 0)")
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(model, template_hash, risk_bucket, factors):
+        """Stable key: the factor list is de-duplicated and sorted"""
+        raw = json.dumps([model, template_hash, risk_bucket, sorted(set(factors))], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached text or None, counting the hit/miss"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT text, created_at FROM explanations WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM explanations WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                conn.execute("UPDATE cache_stats SET value = value + 1 WHERE name = 'misses'")
+                conn.commit()
+                return None
+            conn.execute("UPDATE explanations SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            conn.execute("UPDATE cache_stats SET value = value + 1 WHERE name = 'hits'")
+            conn.commit()
+            return row[0]
+        finally:
+            conn.close()
+
+    def has(self, key):
+        """Membership test that does not count towards the hit rate"""
+        conn = self._connect()
+        row = conn.execute("SELECT created_at FROM explanations WHERE key = ?", (key,)).fetchone()
+        conn.close()
+        return row is not None and not (self.ttl_seconds and time.time() - row[0] > self.ttl_seconds)
+
+    def set(self, key, text):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("INSERT OR REPLACE INTO explanations (key, text, created_at, last_access) VALUES (?, ?, ?, ?)",
+                         (key, text, now, now))
+            conn.execute("""
+                DELETE FROM explanations WHERE key IN (
+                    SELECT key FROM explanations ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        counters = dict(conn.execute("SELECT name, value FROM cache_stats").fetchall())
+        entries = conn.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+        conn.close()
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM explanations")
+        conn.execute("UPDATE cache_stats SET value = 0")
+        conn.commit()
+        conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_explanation_cache():
+    """Process-wide cache at EXPLANATION_CACHE_PATH"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ExplanationCache()
+        return _default_cache
+
+
+def prewarm(db_path="hospital.db", top=50, cache=None, assistant=None):
+    """
+    Generate explanations for the most common (risk bucket, factor set)
+    combinations found in the predictions table
+    """
+    try:
+        from .ollama_integration_improved import OllamaClinicalAssistant
+    except ImportError:
+        from ollama_integration_improved import OllamaClinicalAssistant
+
+    cache = cache or get_explanation_cache()
+    assistant = assistant or OllamaClinicalAssistant(cache=cache)
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT patient_data, prediction_result, confidence_score FROM predictions").fetchall()
+    conn.close()
+
+    combos = Counter()
+    examples = {}
+    for patient_json, prediction, confidence in rows:
+        try:
+            patient_data = json.loads(patient_json)
+        except (TypeError, ValueError):
+            continue
+        prediction = int(prediction)
+        risk_score = confidence if prediction == 1 else 1 - confidence
+        key = assistant.cache_key(patient_data, risk_score, prediction)
+        combos[key] += 1
+        examples.setdefault(key, (patient_data, risk_score, prediction))
+
+    generated = 0
+    for key, _count in combos.most_common(top):
+        if cache.has(key):
+            continue
+        if not assistant.check_ollama_available():
+            print("Ollama is not available - stopping pre-warm")
+            break
+        assistant.generate_explanation(*examples[key])
+        # Fallback texts are not cached, so only count real LLM output
+        if cache.has(key):
+            generated += 1
+
+    return {"predictions": len(rows), "combinations": len(combos), "generated": generated}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explanation cache maintenance")
+    parser.add_argument("--prewarm", action="store_true", help="generate explanations for common factor sets")
+    parser.add_argument("--db", default="hospital.db", help="database with the predictions table")
+    parser.add_argument("--top", type=int, default=50, help="number of combinations to pre-warm")
+    parser.add_argument("--stats", action="store_true", help="print cache size and hit rate")
+    parser.add_argument("--clear", action="store_true", help="empty the cache")
+    args = parser.parse_args()
+
+    cache = get_explanation_cache()
+    if args.clear:
+        cache.clear()
+    if args.prewarm:
+        result = prewarm(args.db, args.top, cache)
+        print(f"Scanned {result['predictions']} predictions, {result['combinations']} factor combinations, "
+              f"generated {result['generated']} explanations")
+    if args.stats or not (args.prewarm or args.clear):
+        stats = cache.stats()
+        print(f"Entries: {stats['entries']}/{stats['max_entries']}")
+        print(f"Hits: {stats['hits']}  Misses: {stats['misses']}  Hit rate: {stats['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Static 3D heart viewer embedding
+The Three.js viewer lives in static/heart3d/ and never changes per
+prediction; only a small JSON parameter payload (see get_heart_params in the
+visualization_3d_* modules) is sent to it.
+
+- Streamlit: heart3d_viewer(params) renders it as a custom component, served
+  by Streamlit from static/heart3d. Reruns only post the new parameters.
+- Flask pages: viewer_embed_html(params) returns an <iframe> pointing at
+  /static/heart3d/index.html with the parameters in the URL fragment.
+"""
+import json
+import os
+from pathlib import Path
+from urllib.parse import quote
+
+VIEWER_DIR = Path(__file__).resolve().parents[2] / "static" / "heart3d"
+VIEWER_URL = os.getenv("HEART3D_VIEWER_URL", "/static/heart3d/index.html")
+
+# Extended-schema fields (heart_risk_extended) measured directly -> viewer parameter
+MEASURED_PARAMS = {
+    "ldl": "ldl",
+    "calcium_score": "calciumScore",
+    "ejection_fraction": "ejectionFraction",
+    "st_depression": "stDepression",
+    "hrv_sdnn": "hrv",
+    "troponin": "troponin",
+    "crp": "crp",
+    "bnp": "bnp",
+    "smoking": "smoking",
+    "wall_motion_abnormality": "wallMotionAbnormality",
+}
+
+_component = None
+
+
+def apply_measured(viewer_data, patient_data):
+    """Replace estimated viewer parameters with the patient's measured values where present"""
+    for field, param in MEASURED_PARAMS.items():
+        if param in viewer_data and patient_data.get(field) is not None:
+            value = patient_data[field]
+            viewer_data[param] = bool(value) if isinstance(viewer_data[param], bool) else float(value)
+    return viewer_data
+
+
+def viewer_embed_html(params, height=600):
+    """Small <iframe> snippet for the static viewer; the fragment carries the parameters"""
+    fragment = quote(json.dumps(params, separators=(",", ":")))
+    return (f'<iframe src="{VIEWER_URL}#{fragment}" width="100%" height="{height}" '
+            f'style="border:0" title="3D Heart Visualization"></iframe>')
+
+
+def heart3d_viewer(params, height=600, key="heart3d"):
+    """Render the static viewer in Streamlit, passing only the parameters"""
+    global _component
+    if _component is None:
+        import streamlit.components.v1 as components
+        _component = components.declare_component("heart3d", path=str(VIEWER_DIR))
+    return _component(params=params, key=key, default=None, height=height)
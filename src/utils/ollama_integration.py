@@ -5,6 +5,11 @@ Provides safe, field-aware explanations
 import requests
 import json
 
+try:
+    from .risk_bands import risk_level as band_of
+except ImportError:  # loaded as a top-level module (run_enhanced.py adds src/utils to sys.path)
+    from risk_bands import risk_level as band_of
+
 class OllamaClinicalAssistant:
     """
     Clinical decision-support assistant using Ollama
@@ -55,7 +60,7 @@ Use clear, non-alarming language.
 Keep responses concise (3-4 paragraphs maximum)."""
         
         # User prompt (dynamic)
-        risk_level = "LOW" if risk_score < 0.3 else "MODERATE" if risk_score < 0.6 else "HIGH"
+        risk_level = band_of(risk_score)
         
         user_prompt = f"""Patient Profile:
 Age: {patient_data.get('age', 'N/A')}
@@ -105,7 +110,7 @@ Explain:
     
     def _fallback_explanation(self, patient_data, risk_score, prediction):
         """Fallback explanation when Ollama is not available"""
-        risk_level = "LOW" if risk_score < 0.3 else "MODERATE" if risk_score < 0.6 else "HIGH"
+        risk_level = band_of(risk_score)
         
         explanation = f"""**Risk Assessment: {risk_level.upper()} RISK ({risk_score:.1%})**
 
@@ -2,8 +2,111 @@
 Improved Ollama Integration for Clinical Decision Support
 Intelligently analyzes patient data to match risk scores
 """
+import asyncio
 import requests
+import hashlib
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+try:
+    from .circuit_breaker import CircuitBreaker, CLOSED
+    from .risk_bands import risk_level
+except ImportError:  # loaded as a top-level module (run_enhanced.py adds src/utils to sys.path)
+    from circuit_breaker import CircuitBreaker, CLOSED
+    from risk_bands import risk_level
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+
+SYSTEM_PROMPT = """You are a clinical decision-support assistant.
+You do NOT diagnose diseases.
+You explain cardiovascular risk using structured clinical data.
+Always include disclaimers.
+Use clear, non-alarming language.
+Be specific about risk factors identified.
+Keep responses concise (4-5 paragraphs maximum)."""
+
+USER_PROMPT_TEMPLATE = """Patient Profile:
+Age: {age} years
+Sex: {sex}
+Resting BP: {trestbps} mm Hg
+Cholesterol: {chol} mg/dL
+Max Heart Rate: {thalach} bpm
+ST Depression: {oldpeak} mm
+Chest Pain Type: {cp}
+Exercise Angina: {exang}
+Major Vessels: {ca}
+Thalassemia: {thal}
+
+Risk Score: {risk_score:.1%} ({risk_level} risk)
+Prediction: {prediction}
+
+Identified Risk Factors:
+{factors_text}
+
+Explain:
+1. Overall cardiovascular risk assessment matching the {risk_level} risk score
+2. How the identified risk factors contribute to this risk level
+3. What the 3D heart visualization represents for this patient
+4. Specific lifestyle or follow-up recommendations based on the risk factors
+5. Clear medical disclaimer"""
+
+# Prompt for explanations that go into the explanation cache. Cached text is
+# shared by every patient with the same risk bucket and factor set, so it is
+# written from those alone: no raw values and no exact risk percentage that
+# would be quoted back to the next patient.
+CACHEABLE_PROMPT_TEMPLATE = """Risk Level: {risk_level}
+Prediction: {prediction}
+
+Identified Risk Factors:
+{factors_text}
+
+Explain:
+1. Overall cardiovascular risk assessment for a {risk_level} risk level
+2. How the identified risk factors contribute to this risk level
+3. What the 3D heart visualization represents at this risk level
+4. Specific lifestyle or follow-up recommendations based on the risk factors
+5. Clear medical disclaimer
+
+Do not mention specific measurements, ages or percentages."""
+
+# Identifies the prompt wording in explanation cache keys
+PROMPT_TEMPLATE_HASH = hashlib.sha256(f"{SYSTEM_PROMPT}\n\n{CACHEABLE_PROMPT_TEMPLATE}".encode("utf-8")).hexdigest()[:16]
+
+# Batch explanations: parallel Ollama calls and per-request deadline (seconds).
+# Keep the concurrency within the shared session pool (10 connections).
+DEFAULT_BATCH_CONCURRENCY = 4
+DEFAULT_BATCH_TIMEOUT = 30.0
+
+MEDICAL_DISCLAIMER = "\n\n**⚠️ MEDICAL DISCLAIMER:** This is a decision-support tool for educational purposes only. Always consult qualified healthcare professionals for medical decisions."
+
+# One breaker and one pooled HTTP session per Ollama endpoint, shared by
+# every assistant instance in the process
+_breakers = {}
+_sessions = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(base_url=DEFAULT_BASE_URL):
+    """Return the shared circuit breaker for an Ollama endpoint"""
+    with _breakers_lock:
+        if base_url not in _breakers:
+            _breakers[base_url] = CircuitBreaker(f"ollama:{base_url}")
+        return _breakers[base_url]
+
+
+def get_session(base_url=DEFAULT_BASE_URL, pool_size=10):
+    """Return the shared keep-alive requests.Session for an Ollama endpoint"""
+    with _breakers_lock:
+        if base_url not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[base_url] = session
+        return _sessions[base_url]
+
 
 class OllamaClinicalAssistant:
     """
@@ -11,17 +114,50 @@ class OllamaClinicalAssistant:
     Provides intelligent explanations that match risk scores
     """
     
-    def __init__(self, base_url="http://localhost:11434"):
+    def __init__(self, base_url=DEFAULT_BASE_URL, cache=None):
         self.base_url = base_url
         self.model = "llama3"  # Default model, can be changed
+        self.breaker = get_breaker(base_url)
+        self.session = get_session(base_url)
+        # Optional ExplanationCache (see explanation_cache.py) for LLM output
+        self.cache = cache
+    
+    @property
+    def is_available(self):
+        """Cached Ollama health flag (no I/O)"""
+        return self.breaker.is_healthy
     
     def check_ollama_available(self):
-        """Check if Ollama is running"""
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=2)
-            return response.status_code == 200
-        except:
+        """
+        Check if Ollama is running
+        
+        While the circuit is closed this answers from the cached flag. When it
+        is open, GET /api/tags is only probed once the backoff has elapsed.
+        """
+        if self.breaker.state == CLOSED:
+            return True
+        if not self.breaker.allow_request():
             return False
+        try:
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=2)
+            available = response.status_code == 200
+        except Exception:
+            available = False
+        if available:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return available
+    
+    @staticmethod
+    def _risk_level(risk_score):
+        return risk_level(risk_score)
+    
+    def cache_key(self, patient_data, risk_score, prediction):
+        """Explanation cache key: model, prompt template, risk bucket and factor set"""
+        factors, _ = self._analyze_risk_factors(patient_data, risk_score)
+        risk_bucket = f"{self._risk_level(risk_score)}:{int(prediction)}"
+        return self.cache.make_key(self.model, PROMPT_TEMPLATE_HASH, risk_bucket, factors)
     
     def _analyze_risk_factors(self, patient_data, risk_score):
         """
@@ -157,7 +293,7 @@ class OllamaClinicalAssistant:
             severity_notes.append("moderate")
         
         # If risk is high but no obvious factors, look for combinations
-        if risk_score > 0.6 and len(factors) < 3:
+        if risk_level(risk_score) == "HIGH" and len(factors) < 3:
             # Check for subtle combinations
             if cp in [0, 1] and oldpeak > 0.5:
                 factors.append("Combination of chest pain pattern and ST changes")
@@ -170,7 +306,7 @@ class OllamaClinicalAssistant:
                 severity_notes.append("moderate")
         
         # If still no factors but high risk, explain model-based assessment
-        if risk_score > 0.6 and len(factors) == 0:
+        if risk_level(risk_score) == "HIGH" and len(factors) == 0:
             factors.append("Model-identified risk pattern (multiple subtle factors)")
             severity_notes.append("moderate")
         
@@ -194,79 +330,239 @@ class OllamaClinicalAssistant:
         
         # Always analyze risk factors first
         factors, severity_notes = self._analyze_risk_factors(patient_data, risk_score)
-        risk_level = "LOW" if risk_score < 0.3 else "MODERATE" if risk_score < 0.6 else "HIGH"
+        risk_level = self._risk_level(risk_score)
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache_key(patient_data, risk_score, prediction)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
         
         # Check if Ollama is available
         if self.check_ollama_available():
-            return self._ollama_explanation(patient_data, risk_score, prediction, factors, risk_level)
-        else:
+            explanation = self._ollama_generate(patient_data, risk_score, prediction, factors, risk_level,
+                                                cacheable=cache_key is not None)
+            if explanation is not None:
+                if cache_key is not None:
+                    self.cache.set(cache_key, explanation)
+                return explanation
+        return self._intelligent_fallback(patient_data, risk_score, prediction, factors, severity_notes, risk_level)
+    
+    def generate_explanations_batch(self, cases, concurrency=DEFAULT_BATCH_CONCURRENCY, timeout=DEFAULT_BATCH_TIMEOUT):
+        """
+        Generate explanations for many patients concurrently
+        
+        Synchronous wrapper around generate_explanations_async for scripts and
+        job handlers; must not be called from inside a running event loop.
+        """
+        return asyncio.run(self.generate_explanations_async(cases, concurrency, timeout))
+    
+    async def generate_explanations_async(self, cases, concurrency=DEFAULT_BATCH_CONCURRENCY, timeout=DEFAULT_BATCH_TIMEOUT):
+        """
+        Generate explanations for many patients, fanning out to Ollama
+        
+        Parameters:
+        -----------
+        cases : iterable of (patient_data, risk_score, prediction)
+            One tuple per patient
+        concurrency : int
+            Maximum number of Ollama requests in flight
+        timeout : float
+            Deadline in seconds for each Ollama request, counted from when it
+            is sent; a request that fails or misses it gets the intelligent
+            fallback instead
+        
+        Returns:
+        --------
+        list of str
+            Explanations in the same order as cases
+        """
+        cases = list(cases)
+        if not cases:
+            return []
+        semaphore = asyncio.Semaphore(concurrency)
+        loop = asyncio.get_running_loop()
+        # Own executor so the concurrency is not capped by the loop default
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ollama-batch")
+        try:
+            return await asyncio.gather(*[
+                self._explain_async(loop, executor, semaphore, timeout, *case) for case in cases
+            ])
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def _explain_async(self, loop, executor, semaphore, timeout, patient_data, risk_score, prediction):
+        factors, severity_notes = self._analyze_risk_factors(patient_data, risk_score)
+        risk_level = self._risk_level(risk_score)
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache_key(patient_data, risk_score, prediction)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        explanation = None
+        async with semaphore:
+            # Re-checked per request: once the breaker opens the rest of the
+            # batch falls back without waiting on Ollama
+            if self.check_ollama_available():
+                # The deadline is the request's own read timeout, so it starts
+                # when a worker sends it and a late answer fails that request
+                # (and the breaker) once, instead of leaving an abandoned call
+                # running in the pool
+                explanation = await loop.run_in_executor(
+                    executor, self._ollama_generate, patient_data, risk_score, prediction, factors, risk_level,
+                    (min(2, timeout), timeout), cache_key is not None
+                )
+        
+        if explanation is None:
             return self._intelligent_fallback(patient_data, risk_score, prediction, factors, severity_notes, risk_level)
+        if cache_key is not None:
+            self.cache.set(cache_key, explanation)
+        return explanation
     
-    def _ollama_explanation(self, patient_data, risk_score, prediction, factors, risk_level):
-        """Generate explanation using Ollama"""
-        system_prompt = """You are a clinical decision-support assistant.
-You do NOT diagnose diseases.
-You explain cardiovascular risk using structured clinical data.
-Always include disclaimers.
-Use clear, non-alarming language.
-Be specific about risk factors identified.
-Keep responses concise (4-5 paragraphs maximum)."""
+    def stream_explanation(self, patient_data, risk_score, prediction, feature_importances=None):
+        """
+        Generate the clinical explanation as a stream of text chunks
+        
+        Yields Ollama tokens as they arrive (stream=True), so callers can render
+        incrementally. When Ollama is unavailable the intelligent fallback is
+        yielded as a single chunk.
+        """
+        factors, severity_notes = self._analyze_risk_factors(patient_data, risk_score)
+        risk_level = self._risk_level(risk_score)
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache_key(patient_data, risk_score, prediction)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        if not self.check_ollama_available():
+            yield self._intelligent_fallback(patient_data, risk_score, prediction, factors, severity_notes, risk_level)
+            return
+        
+        text = []
+        try:
+            with self.session.post(
+                f"{self.base_url}/api/generate",
+                json=self._generate_request(patient_data, risk_score, prediction, factors, risk_level, stream=True,
+                                            cacheable=cache_key is not None),
+                timeout=(2, 30),
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    raise requests.HTTPError(f"Ollama returned HTTP {response.status_code}")
+                # chunk_size=None: hand over each HTTP chunk as soon as it arrives
+                for line in response.iter_lines(chunk_size=None):
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    token = chunk.get("response", "")
+                    if token:
+                        text.append(token)
+                        yield token
+                    if chunk.get("done"):
+                        break
+            self.breaker.record_success()
+        except Exception as e:
+            print(f"Ollama error: {e}")
+            self.breaker.record_failure()
+            if not text:
+                yield self._intelligent_fallback(patient_data, risk_score, prediction, factors, severity_notes, risk_level)
+                return
+            # Partial output: finish it with the disclaimer but don't cache it
+            cache_key = None
+        
+        # Add disclaimer if not present
+        if "disclaimer" not in "".join(text).lower():
+            text.append(MEDICAL_DISCLAIMER)
+            yield MEDICAL_DISCLAIMER
+        if cache_key is not None:
+            self.cache.set(cache_key, "".join(text))
+    
+    def _generate_request(self, patient_data, risk_score, prediction, factors, risk_level, stream=False,
+                          cacheable=False):
+        """
+        Build the /api/generate request body
         
+        With cacheable=True the prompt only carries the risk level, prediction
+        and factor labels (CACHEABLE_PROMPT_TEMPLATE), so the answer can be
+        shown to any patient with the same cache key.
+        """
         factors_text = "\n".join([f"- {f}" for f in factors]) if factors else "- Multiple subtle risk factors identified by the model"
+        prediction_text = 'Heart disease detected' if prediction == 1 else 'No heart disease detected'
         
-        user_prompt = f"""Patient Profile:
-Age: {patient_data.get('age', 'N/A')} years
-Sex: {'Male' if patient_data.get('sex', 0) == 1 else 'Female'}
-Resting BP: {patient_data.get('trestbps', 'N/A')} mm Hg
-Cholesterol: {patient_data.get('chol', 'N/A')} mg/dL
-Max Heart Rate: {patient_data.get('thalach', 'N/A')} bpm
-ST Depression: {patient_data.get('oldpeak', 'N/A')} mm
-Chest Pain Type: {patient_data.get('cp', 'N/A')}
-Exercise Angina: {'Yes' if patient_data.get('exang', 0) == 1 else 'No'}
-Major Vessels: {patient_data.get('ca', 'N/A')}
-Thalassemia: {patient_data.get('thal', 'N/A')}
-
-Risk Score: {risk_score:.1%} ({risk_level} risk)
-Prediction: {'Heart disease detected' if prediction == 1 else 'No heart disease detected'}
-
-Identified Risk Factors:
-{factors_text}
-
-Explain:
-1. Overall cardiovascular risk assessment matching the {risk_level} risk score
-2. How the identified risk factors contribute to this risk level
-3. What the 3D heart visualization represents for this patient
-4. Specific lifestyle or follow-up recommendations based on the risk factors
-5. Clear medical disclaimer"""
+        if cacheable:
+            user_prompt = CACHEABLE_PROMPT_TEMPLATE.format(
+                risk_level=risk_level, prediction=prediction_text, factors_text=factors_text
+            )
+        else:
+            user_prompt = USER_PROMPT_TEMPLATE.format(
+                age=patient_data.get('age', 'N/A'),
+                sex='Male' if patient_data.get('sex', 0) == 1 else 'Female',
+                trestbps=patient_data.get('trestbps', 'N/A'),
+                chol=patient_data.get('chol', 'N/A'),
+                thalach=patient_data.get('thalach', 'N/A'),
+                oldpeak=patient_data.get('oldpeak', 'N/A'),
+                cp=patient_data.get('cp', 'N/A'),
+                exang='Yes' if patient_data.get('exang', 0) == 1 else 'No',
+                ca=patient_data.get('ca', 'N/A'),
+                thal=patient_data.get('thal', 'N/A'),
+                risk_score=risk_score,
+                risk_level=risk_level,
+                prediction=prediction_text,
+                factors_text=factors_text
+            )
         
+        return {
+            "model": self.model,
+            "prompt": f"{SYSTEM_PROMPT}\n\n{user_prompt}",
+            "stream": stream,
+            "options": {
+                "temperature": 0.7,
+                "top_p": 0.9
+            }
+        }
+    
+    def _ollama_generate(self, patient_data, risk_score, prediction, factors, risk_level, timeout=(2, 30),
+                         cacheable=False):
+        """Generate explanation using Ollama; returns None if the call fails"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": f"{system_prompt}\n\n{user_prompt}",
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.9
-                    }
-                },
-                timeout=30
+                json=self._generate_request(patient_data, risk_score, prediction, factors, risk_level,
+                                            cacheable=cacheable),
+                timeout=timeout
             )
             
             if response.status_code == 200:
+                self.breaker.record_success()
                 result = response.json()
                 explanation = result.get("response", "")
                 # Add disclaimer if not present
                 if "disclaimer" not in explanation.lower():
-                    explanation += "\n\n**⚠️ MEDICAL DISCLAIMER:** This is a decision-support tool for educational purposes only. Always consult qualified healthcare professionals for medical decisions."
+                    explanation += MEDICAL_DISCLAIMER
                 return explanation
             else:
-                return self._intelligent_fallback(patient_data, risk_score, prediction, factors, [], risk_level)
+                self.breaker.record_failure()
+                return None
                 
         except Exception as e:
             print(f"Ollama error: {e}")
+            self.breaker.record_failure()
+            return None
+    
+    def _ollama_explanation(self, patient_data, risk_score, prediction, factors, risk_level):
+        """Generate explanation using Ollama"""
+        explanation = self._ollama_generate(patient_data, risk_score, prediction, factors, risk_level)
+        if explanation is None:
             return self._intelligent_fallback(patient_data, risk_score, prediction, factors, [], risk_level)
+        return explanation
     
     def _intelligent_fallback(self, patient_data, risk_score, prediction, factors, severity_notes, risk_level):
         """Intelligent fallback explanation that matches risk scores"""
@@ -0,0 +1,145 @@
+"""
+Content-addressed cache for parsed DOCX uploads
+The same file is often uploaded again (Streamlit reruns, retries), so parse
+results are keyed on the SHA-256 of the document bytes plus PARSER_VERSION.
+An in-memory LRU answers repeats in the same process; an optional SQLite
+store (PARSE_CACHE_PATH) keeps results across restarts and processes.
+"""
+import copy
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from .docx_parser import PatientDataParser, PARSER_VERSION
+except ImportError:  # loaded as a top-level module (run_enhanced.py adds src/utils to sys.path)
+    from docx_parser import PatientDataParser, PARSER_VERSION
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "256"))
+DEFAULT_DISK_PATH = os.getenv("PARSE_CACHE_PATH") or None
+
+
+class ParseCache:
+    """
+    LRU of (patient_data, errors) parse results in front of an optional disk store
+
+    Parameters:
+    -----------
+    max_entries : int
+        Size of the in-memory LRU
+    path : str, optional
+        SQLite file for results that outlive the process; memory only if None
+    parser : PatientDataParser, optional
+        Parser used on a miss
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, path=DEFAULT_DISK_PATH, parser=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.parser = parser or PatientDataParser()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.path:
+            self._init_db()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS parse_results (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(data):
+        """SHA-256 of the parser version and the document bytes"""
+        digest = hashlib.sha256(PARSER_VERSION.encode("utf-8") + b"\0")
+        digest.update(data)
+        return digest.hexdigest()
+
+    def parse(self, data):
+        """
+        Parse DOCX bytes, returning a cached result for identical documents
+
+        Returns the same (patient_data, errors) tuple as
+        PatientDataParser.parse_docx; callers get their own copy.
+        """
+        key = self.make_key(data)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+
+        result = self._load(key)
+        if result is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            result = self.parser.parse_docx(io.BytesIO(data))
+            self._store(key, result)
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return copy.deepcopy(result)
+
+    def _load(self, key):
+        if not self.path:
+            return None
+        conn = sqlite3.connect(self.path, timeout=30)
+        row = conn.execute("SELECT result FROM parse_results WHERE key = ?", (key,)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        patient_data, errors = json.loads(row[0])
+        return patient_data, errors
+
+    def _store(self, key, result):
+        if not self.path:
+            return
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("INSERT OR REPLACE INTO parse_results (key, result, created_at) VALUES (?, ?, ?)",
+                     (key, json.dumps(result), time.time()))
+        conn.commit()
+        conn.close()
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    """Process-wide cache; survives Streamlit script reruns since modules stay imported"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ParseCache()
+        return _default_cache
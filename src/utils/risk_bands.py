@@ -0,0 +1,25 @@
+"""
+Risk bands
+The one definition of LOW / MODERATE / HIGH risk. Every place that turns a
+probability of heart disease into a level goes through here: the API
+responses, the explanations, the 3D viewer parameters and the batch risk
+factors. Served probabilities are calibrated (src/models/calibration.py), so a
+band boundary is an observed rate of heart disease rather than a share of
+forest votes.
+"""
+from bisect import bisect_right
+
+RISK_THRESHOLDS = (0.3, 0.6)  # lower bounds of MODERATE and HIGH
+RISK_LEVELS = ("LOW", "MODERATE", "HIGH")
+
+
+def risk_level(probability):
+    """Band of one probability: LOW below 0.3, MODERATE below 0.6, HIGH from 0.6"""
+    return RISK_LEVELS[bisect_right(RISK_THRESHOLDS, float(probability))]
+
+
+def risk_levels(probabilities):
+    """Vectorized risk_level for an array of probabilities"""
+    import numpy as np
+
+    return np.asarray(RISK_LEVELS)[np.searchsorted(RISK_THRESHOLDS, probabilities, side="right")]
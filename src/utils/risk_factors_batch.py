@@ -0,0 +1,171 @@
+"""
+Vectorized Risk-Factor Analysis for Cohorts
+Evaluates the same clinical thresholds as
+OllamaClinicalAssistant._analyze_risk_factors, but as NumPy boolean masks
+over a whole feature matrix. Each row gets a factor bitmask (bit i set means
+FACTOR_RULES[i] fired) plus high/moderate/low severity counts.
+"""
+import numpy as np
+
+try:
+    from .risk_bands import risk_levels
+except ImportError:  # loaded as a top-level module (run_enhanced.py adds src/utils to sys.path)
+    from risk_bands import risk_levels
+
+FEATURE_ORDER = ['age', 'sex', 'cp', 'trestbps', 'chol', 'fbs', 'restecg',
+                 'thalach', 'exang', 'oldpeak', 'slope', 'ca', 'thal']
+
+# (factor text, severity) in the order the scalar analysis appends them.
+# "{ca}" is filled in per patient when decoding.
+FACTOR_RULES = [
+    ("Advanced age (≥65 years)", "high"),
+    ("Age-related risk (55-64 years)", "moderate"),
+    ("Age factor (45-54 years)", "low"),
+    ("Male gender with age-related risk", "moderate"),
+    ("Typical angina (classic chest pain pattern)", "high"),
+    ("Atypical angina pattern", "moderate"),
+    ("Asymptomatic presentation despite elevated risk", "moderate"),
+    ("Stage 2 hypertension (≥160 mm Hg)", "high"),
+    ("Stage 1 hypertension (140-159 mm Hg)", "moderate"),
+    ("Elevated blood pressure (130-139 mm Hg)", "low"),
+    ("High cholesterol (≥240 mg/dL)", "high"),
+    ("Borderline high cholesterol (200-239 mg/dL)", "moderate"),
+    ("Elevated cholesterol (180-199 mg/dL)", "low"),
+    ("Elevated fasting blood sugar (>120 mg/dL)", "moderate"),
+    ("ST-T wave abnormality on resting ECG", "moderate"),
+    ("Left ventricular hypertrophy on ECG", "high"),
+    ("Low maximum heart rate (<120 bpm)", "high"),
+    ("Reduced maximum heart rate (120-139 bpm)", "moderate"),
+    ("Exercise-induced angina", "high"),
+    ("Significant ST depression (≥2.0 mm)", "high"),
+    ("ST depression (1.0-1.9 mm)", "moderate"),
+    ("Mild ST depression (<1.0 mm)", "low"),
+    ("Downsloping ST segment (concerning pattern)", "high"),
+    ("Flat ST segment", "moderate"),
+    ("Multiple major vessel involvement ({ca} vessels)", "high"),
+    ("Single major vessel involvement", "moderate"),
+    ("Fixed defect on thallium scan", "high"),
+    ("Reversible defect on thallium scan", "moderate"),
+    ("Combination of chest pain pattern and ST changes", "moderate"),
+    ("Combined cholesterol and blood pressure elevation", "moderate"),
+    ("Age-related cardiovascular changes with reduced exercise capacity", "moderate"),
+    ("Model-identified risk pattern (multiple subtle factors)", "moderate"),
+]
+
+SEVERITIES = ["high", "moderate", "low"]
+_SEVERITY_INDEX = np.array([SEVERITIES.index(severity) for _, severity in FACTOR_RULES])
+_CA_RULE = 24
+
+
+def records_to_matrix(records):
+    """Stack patient dicts into an (n, 13) float matrix; missing fields become 0 like dict.get(..., 0)"""
+    rows = [[record.get(name, 0) for name in FEATURE_ORDER] for record in records]
+    return np.array(rows, dtype=float).reshape(len(rows), len(FEATURE_ORDER))
+
+
+def analyze_risk_factors_batch(X, risk_scores):
+    """
+    Evaluate the clinical threshold rules for every row at once
+
+    Parameters:
+    -----------
+    X : array-like, shape (n, 13)
+        Feature matrix with columns in FEATURE_ORDER
+    risk_scores : array-like, shape (n,)
+        Risk score (0-1) per row
+
+    Returns:
+    --------
+    bitmasks : ndarray of uint64, shape (n,)
+        Bit i is set when FACTOR_RULES[i] applies
+    severity_counts : ndarray of int, shape (n, 3)
+        Number of high / moderate / low factors per row
+    """
+    X = np.asarray(X, dtype=float)
+    risk = np.asarray(risk_scores, dtype=float)
+    age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal = X.T
+
+    masks = [
+        age >= 65,
+        (age >= 55) & (age < 65),
+        (age >= 45) & (age < 55),
+        (sex == 1) & (age > 45),
+        cp == 0,
+        cp == 1,
+        (cp == 3) & (risk > 0.5),
+        trestbps >= 160,
+        (trestbps >= 140) & (trestbps < 160),
+        (trestbps >= 130) & (trestbps < 140),
+        chol >= 240,
+        (chol >= 200) & (chol < 240),
+        (chol >= 180) & (chol < 200),
+        fbs == 1,
+        restecg == 1,
+        restecg == 2,
+        thalach < 120,
+        (thalach >= 120) & (thalach < 140),
+        exang == 1,
+        oldpeak >= 2.0,
+        (oldpeak >= 1.0) & (oldpeak < 2.0),
+        (oldpeak > 0) & (oldpeak < 1.0),
+        slope == 2,
+        slope == 1,
+        ca >= 2,
+        ca == 1,
+        thal == 2,
+        thal == 3,
+    ]
+    base = np.column_stack(masks)
+
+    # Combination rules only kick in for high risk with few obvious factors
+    high_risk = risk_levels(risk) == "HIGH"
+    needs_combinations = high_risk & (base.sum(axis=1) < 3)
+    combinations = np.column_stack([
+        needs_combinations & ((cp == 0) | (cp == 1)) & (oldpeak > 0.5),
+        needs_combinations & (chol > 180) & (trestbps > 120),
+        needs_combinations & (age > 50) & (thalach < 150),
+    ])
+    fired = np.column_stack([base, combinations])
+    model_identified = high_risk & (fired.sum(axis=1) == 0)
+    fired = np.column_stack([fired, model_identified])
+
+    weights = np.left_shift(np.uint64(1), np.arange(len(FACTOR_RULES), dtype=np.uint64))
+    bitmasks = (fired.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+
+    severity_counts = np.zeros((len(X), len(SEVERITIES)), dtype=int)
+    for severity in range(len(SEVERITIES)):
+        severity_counts[:, severity] = fired[:, _SEVERITY_INDEX == severity].sum(axis=1)
+
+    return bitmasks, severity_counts
+
+
+def decode_factors(bitmask, ca=None):
+    """
+    Turn a row bitmask back into the (factors, severity_notes) lists of the scalar analysis
+
+    `ca` is the patient's own value (record.get('ca', 0)), not the float matrix
+    entry, so the vessel count reads the same as in the scalar text ("2.0" stays "2.0").
+    """
+    factors, severity_notes = [], []
+    bitmask = int(bitmask)
+    for i, (text, severity) in enumerate(FACTOR_RULES):
+        if bitmask >> i & 1:
+            if i == _CA_RULE:
+                text = text.format(ca=ca)
+            factors.append(text)
+            severity_notes.append(severity)
+    return factors, severity_notes
+
+
+def fallback_explanations_batch(assistant, records, risk_scores, predictions):
+    """Intelligent fallback texts for a cohort, with factors computed in one vectorized pass"""
+    X = records_to_matrix(records)
+    bitmasks, _ = analyze_risk_factors_batch(X, risk_scores)
+    explanations = []
+    for record, bitmask, risk_score, prediction in zip(records, bitmasks, risk_scores, predictions):
+        factors, severity_notes = decode_factors(bitmask, record.get('ca', 0))
+        risk_level = assistant._risk_level(risk_score)
+        explanations.append(assistant._intelligent_fallback(
+            record, risk_score, prediction, factors, severity_notes, risk_level
+        ))
+    return explanations
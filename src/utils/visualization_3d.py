@@ -5,6 +5,11 @@ Uses Plotly for interactive 3D visualization
 import plotly.graph_objects as go
 import numpy as np
 
+try:
+    from .risk_bands import risk_level as band_of
+except ImportError:  # loaded as a top-level module (run_enhanced.py adds src/utils to sys.path)
+    from risk_bands import risk_level as band_of
+
 def create_3d_heart_visualization(risk_score, patient_data=None):
     """
     Create a 3D heart visualization based on risk score
@@ -23,18 +28,16 @@ def create_3d_heart_visualization(risk_score, patient_data=None):
     """
     
     # Determine risk level
-    if risk_score < 0.3:
-        risk_level = "LOW"
+    risk_level = band_of(risk_score)
+    if risk_level == "LOW":
         heart_color = "rgb(255, 192, 203)"  # Pink
         artery_color = "rgb(200, 200, 200)"  # Gray
         glow_intensity = 0.1
-    elif risk_score < 0.6:
-        risk_level = "MODERATE"
+    elif risk_level == "MODERATE":
         heart_color = "rgb(255, 255, 0)"  # Yellow
         artery_color = "rgb(255, 200, 0)"  # Yellow-orange
         glow_intensity = 0.3
     else:
-        risk_level = "HIGH"
         heart_color = "rgb(255, 0, 0)"  # Red
         artery_color = "rgb(139, 0, 0)"  # Dark red
         glow_intensity = 0.6
@@ -162,10 +165,5 @@ def create_3d_heart_visualization(risk_score, patient_data=None):
     return fig, risk_level
 
 def get_risk_level(risk_score):
-    """Convert risk score to risk level"""
-    if risk_score < 0.3:
-        return "LOW"
-    elif risk_score < 0.6:
-        return "MODERATE"
-    else:
-        return "HIGH"
+    """Convert risk score to risk level (bands from risk_bands.py)"""
+    return band_of(risk_score)
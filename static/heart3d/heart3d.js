@@ -0,0 +1,245 @@
+/**
+ * 3D heart viewer (Three.js)
+ *
+ * Heart3D.mount(container, params) builds the scene once and returns
+ * { update(params) }, which only recolors it for a new prediction.
+ *
+ * params (see get_heart_params in src/utils/visualization_3d_*.py):
+ *   variant      'simple' (visualization_3d_fixed) or 'realistic'
+ *   riskScore    0-1
+ *   riskLevel    'LOW' | 'MODERATE' | 'HIGH' (bands from src/utils/risk_bands.py; all styling keys off it)
+ *   patientData  { ldl, calciumScore, ejectionFraction, stDepression, hrv, troponin, crp, bnp, ... }
+ */
+(function () {
+    'use strict';
+
+    const CHAMBER_COLORS = { LOW: 0xc62828, MODERATE: 0xd32f2f, HIGH: 0xb71c1c };
+    const EMISSIVE_INTENSITY = { LOW: 0, MODERATE: 0.1, HIGH: 0.3 };
+
+    function chamberColor(riskLevel) {
+        return CHAMBER_COLORS[riskLevel] || CHAMBER_COLORS.LOW;
+    }
+
+    function addChambers(group, material) {
+        const chambers = {};
+
+        chambers.leftVentricle = new THREE.Mesh(new THREE.SphereGeometry(2.5, 32, 32), material.clone());
+        chambers.leftVentricle.scale.set(1, 1.3, 0.9);
+        chambers.leftVentricle.position.set(-1, -1.5, 0);
+
+        chambers.rightVentricle = new THREE.Mesh(new THREE.SphereGeometry(2, 32, 32), material.clone());
+        chambers.rightVentricle.scale.set(1, 1.2, 0.85);
+        chambers.rightVentricle.position.set(1.2, -1.3, 0.3);
+
+        chambers.leftAtrium = new THREE.Mesh(new THREE.SphereGeometry(1.5, 32, 32), material.clone());
+        chambers.leftAtrium.position.set(-1.5, 1, -0.5);
+
+        chambers.rightAtrium = new THREE.Mesh(new THREE.SphereGeometry(1.3, 32, 32), material.clone());
+        chambers.rightAtrium.position.set(1.5, 1, 0);
+
+        Object.values(chambers).forEach(chamber => group.add(chamber));
+        return chambers;
+    }
+
+    function addAorta(group) {
+        const aorta = new THREE.Mesh(
+            new THREE.CylinderGeometry(0.6, 0.5, 4, 16),
+            new THREE.MeshPhongMaterial({ color: 0xff4444, shininess: 50 })
+        );
+        aorta.position.set(-1, 2.5, -0.3);
+        aorta.rotation.z = 0.3;
+        group.add(aorta);
+    }
+
+    function tube(points, segments, radius, material) {
+        const path = new THREE.CatmullRomCurve3(points.map(p => new THREE.Vector3(p[0], p[1], p[2])));
+        return new THREE.Mesh(new THREE.TubeGeometry(path, segments, radius, 8, false), material);
+    }
+
+    function addCoronaries(group, material, withCircumflex) {
+        const coronaries = {
+            // Left Anterior Descending (LAD)
+            lad: tube([[-1, 1, 1], [-2, 0, 1.5], [-2.5, -1, 1], [-2, -2, 0.5]], 20, 0.15, material.clone()),
+            // Right Coronary Artery (RCA)
+            rca: tube([[1, 1, 1], [2, 0, 1.2], [2.3, -1, 0.8], [1.5, -2, 0.3]], 20, 0.15, material.clone())
+        };
+        if (withCircumflex) {
+            coronaries.circ = tube([[-1.5, 0.5, 0], [-2.5, 0, 0], [-3, -0.5, 0], [-2.5, -1, 0]], 16, 0.12, material.clone());
+        }
+        Object.values(coronaries).forEach(artery => group.add(artery));
+        return coronaries;
+    }
+
+    function addElectricalSystem(group) {
+        const material = new THREE.MeshPhongMaterial({ color: 0x4fc3f7, emissive: 0x004444, transparent: true, opacity: 0.8 });
+        const electrical = {
+            saNode: new THREE.Mesh(new THREE.SphereGeometry(0.15, 16, 16), material.clone()),
+            avNode: new THREE.Mesh(new THREE.SphereGeometry(0.12, 16, 16), material.clone()),
+            bundle: tube([[0, 0, 0.5], [0, -1, 0.5], [0, -2, 0.3]], 12, 0.08, material.clone())
+        };
+        electrical.saNode.position.set(0, 2, 0);
+        electrical.avNode.position.set(0, 0, 0.5);
+        Object.values(electrical).forEach(component => group.add(component));
+        return electrical;
+    }
+
+    // visualization_3d_fixed: chambers, aorta and two coronaries
+    const simple = {
+        build(scene, heart) {
+            const material = new THREE.MeshPhongMaterial({ color: 0xc62828, shininess: 30, transparent: true, opacity: 0.9 });
+            addAorta(heart);
+            return {
+                chambers: addChambers(heart, material),
+                coronaries: addCoronaries(heart, new THREE.MeshPhongMaterial({ color: 0xff5252 }), false)
+            };
+        },
+        update(parts, params) {
+            const color = chamberColor(params.riskLevel);
+            const emissive = params.riskLevel === 'HIGH' ? 0x330000 : 0x000000;
+            Object.values(parts.chambers).forEach(chamber => {
+                chamber.material.color.setHex(color);
+                chamber.material.emissive.setHex(emissive);
+            });
+            const coronaryColor = params.patientData.ldl > 130 ? 0xff9800 : 0xff5252;
+            Object.values(parts.coronaries).forEach(artery => artery.material.color.setHex(coronaryColor));
+        }
+    };
+
+    // visualization_3d_realistic: adds the circumflex artery, conduction system and markers
+    const realistic = {
+        build(scene, heart) {
+            const pointLight = new THREE.PointLight(0x4fc3f7, 1, 100);
+            pointLight.position.set(-5, 5, 5);
+            scene.add(pointLight);
+
+            const material = new THREE.MeshPhongMaterial({ color: 0xc62828, shininess: 30, transparent: true, opacity: 0.9 });
+            const troponinMarker = new THREE.Mesh(
+                new THREE.SphereGeometry(0.15, 8, 8),
+                new THREE.MeshBasicMaterial({ color: 0xff0000 })
+            );
+            troponinMarker.position.set(-1, -2, 1);
+            scene.add(troponinMarker);
+
+            addAorta(heart);
+            return {
+                chambers: addChambers(heart, material),
+                coronaries: addCoronaries(heart, new THREE.MeshPhongMaterial({ color: 0xff5252, shininess: 50 }), true),
+                electrical: addElectricalSystem(heart),
+                troponinMarker: troponinMarker
+            };
+        },
+        update(parts, params) {
+            const pd = params.patientData;
+
+            // Global risk state
+            const emissiveIntensity = EMISSIVE_INTENSITY[params.riskLevel] || 0;
+            Object.values(parts.chambers).forEach(chamber => {
+                chamber.material.color.setHex(chamberColor(params.riskLevel));
+                chamber.material.emissive.setRGB(emissiveIntensity, 0, 0);
+                chamber.material.opacity = 0.9;
+            });
+
+            // Coronary arteries
+            let coronaryColor = 0xff5252, coronaryEmissive = 0;
+            if (pd.ldl > 160 || pd.calciumScore > 100) {
+                coronaryColor = 0xff5722;
+                coronaryEmissive = 0.4;
+            } else if (pd.ldl > 130 || pd.calciumScore > 50) {
+                coronaryColor = 0xff9800;
+                coronaryEmissive = 0.2;
+            }
+            Object.values(parts.coronaries).forEach(artery => {
+                artery.material.color.setHex(coronaryColor);
+                artery.material.emissive.setRGB(coronaryEmissive * 0.5, 0, 0);
+            });
+
+            // Electrical system: purple when ST depression or low HRV
+            const electricalColor = pd.stDepression > 1 || pd.hrv < 20 ? 0xbb86fc : 0x4fc3f7;
+            Object.values(parts.electrical).forEach(component => component.material.color.setHex(electricalColor));
+
+            // Chamber function (ejection fraction)
+            if (pd.ejectionFraction < 45) {
+                parts.chambers.leftVentricle.material.opacity = 0.6;
+                parts.chambers.leftVentricle.material.emissive.setRGB(0.2, 0, 0);
+            }
+
+            // Biochemical markers
+            parts.troponinMarker.visible = pd.troponin > 0.04;
+        }
+    };
+
+    const variants = { simple: simple, realistic: realistic };
+
+    function mount(container, params) {
+        const width = container.offsetWidth || container.clientWidth || 800;
+        const height = container.offsetHeight || container.clientHeight || 600;
+
+        const scene = new THREE.Scene();
+        scene.background = new THREE.Color(0x0c0c2e);
+
+        const camera = new THREE.PerspectiveCamera(60, width / height, 0.1, 1000);
+        camera.position.set(0, 0, 12);
+
+        const renderer = new THREE.WebGLRenderer({ antialias: true });
+        renderer.setSize(width, height);
+        renderer.setPixelRatio(Math.min(window.devicePixelRatio, 2));
+        container.appendChild(renderer.domElement);
+
+        // Lighting
+        scene.add(new THREE.AmbientLight(0x404040, 0.6));
+        const directionalLight = new THREE.DirectionalLight(0xffffff, 0.8);
+        directionalLight.position.set(5, 5, 5);
+        scene.add(directionalLight);
+
+        const variant = variants[params.variant] || realistic;
+        const heart = new THREE.Group();
+        const parts = variant.build(scene, heart);
+        scene.add(heart);
+        variant.update(parts, params);
+
+        // Heartbeat and slow rotation
+        let phase = 0;
+        let isDragging = false;
+        let previousMouse = { x: 0, y: 0 };
+
+        function animate() {
+            requestAnimationFrame(animate);
+            phase += 0.05;
+            const pulse = 1 + Math.sin(phase) * 0.05;
+            heart.scale.set(pulse, pulse, pulse);
+            if (!isDragging) heart.rotation.y += 0.002;
+            renderer.render(scene, camera);
+        }
+        animate();
+
+        // Mouse controls
+        container.addEventListener('mousedown', (e) => {
+            isDragging = true;
+            previousMouse = { x: e.clientX, y: e.clientY };
+        });
+        container.addEventListener('mousemove', (e) => {
+            if (isDragging) {
+                heart.rotation.y += (e.clientX - previousMouse.x) * 0.01;
+                heart.rotation.x += (e.clientY - previousMouse.y) * 0.01;
+                previousMouse = { x: e.clientX, y: e.clientY };
+            }
+        });
+        container.addEventListener('mouseup', () => { isDragging = false; });
+
+        window.addEventListener('resize', () => {
+            const w = container.offsetWidth || 800;
+            const h = container.offsetHeight || 600;
+            camera.aspect = w / h;
+            camera.updateProjectionMatrix();
+            renderer.setSize(w, h);
+        });
+
+        return {
+            update(newParams) {
+                variant.update(parts, newParams);
+            }
+        };
+    }
+
+    window.Heart3D = { mount: mount };
+})();
@@ -112,6 +112,12 @@ class ApiClient {
         });
     }
 
+    async getJob(jobId) {
+        return this.request(`/user/jobs/${jobId}`, {
+            method: 'GET'
+        });
+    }
+
     async getPredictionHistory() {
         return this.request('/user/predictions/history', {
             method: 'GET'
@@ -234,9 +234,9 @@ class UserDashboard {
             riskClass = 'result-high-risk';
             riskText = 'High Risk';
             icon = '🚨';
-        } else if (result.risk_level === 'Medium') {
+        } else if (result.risk_level === 'Moderate') {
             riskClass = 'result-medium-risk';
-            riskText = 'Medium Risk';
+            riskText = 'Moderate Risk';
             icon = '⚠️';
         } else {
             riskClass = 'result-low-risk';
@@ -299,7 +299,7 @@ class UserDashboard {
                 <li>Consider lifestyle changes and medication</li>
                 <li>Monitor blood pressure and cholesterol regularly</li>
             `;
-        } else if (result.risk_level === 'Medium') {
+        } else if (result.risk_level === 'Moderate') {
             recommendations += `
                 <li>Schedule a follow-up with your primary care physician</li>
                 <li>Consider additional screening tests</li>
@@ -3,22 +3,18 @@ Helper script to run Streamlit with proper error handling
 """
 import subprocess
 import sys
-import os
+
+from src.models.model_store import get_store
 
 print("=" * 60)
 print("Starting Heart Disease Prediction Web App")
 print("=" * 60)
 print()
 
-# Check if model exists
-if not os.path.exists("heart_disease_model.pkl"):
-    print("ERROR: Model file not found!")
-    print("Please run: python train_and_save_model.py")
-    sys.exit(1)
-
-if not os.path.exists("feature_names.json"):
-    print("ERROR: Feature names file not found!")
-    print("Please run: python train_and_save_model.py")
+# Check if a model has been promoted (or legacy model files can be imported)
+if not get_store().available():
+    print("ERROR: Model files not found!")
+    print("Please run: python -m src.models.pipeline")
     sys.exit(1)
 
 print("Model files found. Starting Streamlit...")
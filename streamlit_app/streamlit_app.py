@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import json
-import os
+import sys
 from pathlib import Path
 
+# The model comes from the project's model store (models/current), the same
+# version the Flask and other Streamlit apps serve
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.models.model_store import load_current
+
 # Page configuration
 st.set_page_config(
     page_title="Heart Disease Prediction",
@@ -20,49 +23,14 @@ This application uses a machine learning model to predict the presence of heart
 **Please enter the patient's information below to get a prediction.**
 """)
 
-# Define the path to the data directory
-@st.cache_resource
 def load_model():
-    """Load the trained model"""
+    """Load the promoted model (cached by version; a rerun only rereads the pointer)"""
     try:
-        # Look for model files in both root and data directories
-        model_path = None
-        feature_names_path = None
-        
-        possible_model_paths = [
-            "heart_disease_model.pkl",
-            "./heart_disease_model.pkl",
-            "../heart_disease_model.pkl",
-            "./data/heart_disease_model.pkl",
-            "../data/heart_disease_model.pkl"
-        ]
-        
-        possible_feature_paths = [
-            "feature_names.json",
-            "./feature_names.json",
-            "../feature_names.json",
-            "./data/feature_names.json",
-            "../data/feature_names.json"
-        ]
-        
-        for path in possible_model_paths:
-            if os.path.exists(path):
-                model_path = path
-                break
-                
-        for path in possible_feature_paths:
-            if os.path.exists(path):
-                feature_names_path = path
-                break
-        
-        if model_path is None or feature_names_path is None:
-            st.error("⚠️ Model files not found! Please ensure 'heart_disease_model.pkl' and 'feature_names.json' are in the project directory.")
-            st.stop()
-        
-        model = joblib.load(model_path)
-        with open(feature_names_path, "r") as f:
-            feature_names = json.load(f)
-        return model, feature_names
+        loaded = load_current()
+        return loaded.model, loaded.feature_names
+    except FileNotFoundError:
+        st.error("⚠️ Model files not found! Please run 'python -m src.models.pipeline' from the project root.")
+        st.stop()
     except Exception as e:
         st.error(f"⚠️ Error loading model: {str(e)}")
         st.stop()
@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+import pytest
+from sklearn.isotonic import IsotonicRegression
+
+import config
+from src.models.calibration import CalibratedModel, CalibrationTable, fit_calibration
+from src.models.model_store import ModelStore
+from src.models.pipeline import TrainingPipeline, load_config
+from src.utils.risk_bands import RISK_LEVELS, risk_level, risk_levels
+
+
+def _noisy_scores(n=500, seed=0):
+    rng = np.random.RandomState(seed)
+    raw = rng.uniform(size=n)
+    y = (rng.uniform(size=n) < raw ** 2).astype(int)  # raw scores overestimate the rate
+    return raw, y
+
+
+def test_isotonic_table_matches_sklearn():
+    raw, y = _noisy_scores()
+    table = fit_calibration(y, raw, "isotonic")
+    iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(raw, y)
+    grid = np.linspace(-0.1, 1.1, 1001)
+    np.testing.assert_allclose(table(grid), iso.predict(grid), atol=1e-12)
+    assert table.x[0] == 0.0 and table.x[-1] == 1.0
+
+
+def test_sigmoid_table_is_monotone_and_round_trips(tmp_path):
+    raw, y = _noisy_scores()
+    table = fit_calibration(y, raw, "sigmoid")
+    calibrated = table(np.linspace(0, 1, 500))
+    assert np.all(np.diff(calibrated) >= 0)
+    # Calibration pulls the overestimated middle down towards the observed rate
+    assert table(np.array([0.5]))[0] < 0.5
+
+    table.save(tmp_path / "calibration.json")
+    loaded = CalibrationTable.load(tmp_path / "calibration.json")
+    np.testing.assert_array_equal(loaded(raw), table(raw))
+    with pytest.raises(ValueError):
+        CalibrationTable([0.0, 0.5, 0.4], [0.0, 0.1, 0.2])
+    with pytest.raises(ValueError):
+        fit_calibration(y, raw, "beta")
+
+
+def test_risk_bands_are_one_definition():
+    probabilities = np.array([0.0, 0.29, 0.3, 0.59, 0.6, 1.0])
+    assert risk_levels(probabilities).tolist() == [risk_level(p) for p in probabilities]
+    assert [risk_level(p) for p in probabilities] == ["LOW", "LOW", "MODERATE", "MODERATE", "HIGH", "HIGH"]
+    assert set(risk_levels(np.random.RandomState(0).uniform(size=1000))) == set(RISK_LEVELS)
+
+
+def test_pipeline_exports_and_store_serves_calibrated_probabilities(tmp_path):
+    cfg = load_config(config.TRAINING_CONFIG_PATH)
+    cfg["model"]["params"].update(n_estimators=20, n_jobs=1)
+    cfg["export"]["plot_importances"] = False
+    summary = TrainingPipeline(cfg, cache_dir=tmp_path / "cache", store_dir=tmp_path / "models",
+                               verbose=False).run()
+    metrics = summary["metrics"]
+    assert metrics["calibration"] == "isotonic"
+    assert {"brier_score", "brier_score_uncalibrated", "calibration_error"} <= set(metrics)
+
+    loaded = ModelStore(tmp_path / "models").load()
+    assert isinstance(loaded.model, CalibratedModel)
+    table = CalibrationTable.from_dict(json.loads((tmp_path / "models" / summary["hash"] /
+                                                   "calibration.json").read_text()))
+    X = np.random.RandomState(0).uniform(0, 1, size=(50, 13)) * 100
+    raw = loaded.model.model.predict_proba(X)[:, 1]
+    proba = loaded.model.predict_proba(X)
+    np.testing.assert_allclose(proba[:, 1], table(raw))
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+    np.testing.assert_array_equal(loaded.model.predict(X), (proba[:, 1] >= 0.5).astype(int))
+    assert loaded.model.n_features_in_ == 13
@@ -0,0 +1,82 @@
+import pytest
+
+from src.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("ollama:test", base_backoff=5.0, max_backoff=20.0, clock=clock)
+
+
+def test_opens_after_consecutive_failures_only(breaker):
+    assert breaker.failure_threshold == 3
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow_request()
+    # A success in between resets the count
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.is_healthy
+
+
+def test_closed_open_half_open_closed(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.metrics()["next_probe_in_seconds"] == 5.0
+
+    clock.advance(4.9)
+    assert not breaker.allow_request()
+    assert breaker.metrics()["rejected_calls"] == 1
+
+    clock.advance(0.1)
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    # Only the probe goes through while it is in flight
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.is_healthy
+    assert breaker.last_success_at == clock.now
+    assert breaker.metrics()["transitions"] == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+
+
+def test_failed_probes_double_the_backoff_up_to_the_cap(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+
+    for expected in (10.0, 20.0, 20.0):
+        clock.advance(breaker.next_probe_at - clock.now)
+        assert breaker.allow_request() and breaker.state == HALF_OPEN
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.backoff == expected
+        assert breaker.next_probe_at == clock.now + expected
+
+    # A successful probe resets the backoff for the next outage
+    clock.advance(20.0)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert (breaker.backoff, breaker.consecutive_failures) == (5.0, 0)
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.next_probe_at == clock.now + 5.0
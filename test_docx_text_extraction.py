@@ -0,0 +1,46 @@
+import io
+from pathlib import Path
+
+import pytest
+from docx import Document
+
+from src.utils.docx_parser import PatientDataParser, _NeedsFullParse, extract_docx_text
+
+TESTING_DATA = sorted(Path("testing_data").glob("*.docx"))
+parser = PatientDataParser()
+
+
+def _save(doc):
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("path", TESTING_DATA, ids=lambda p: p.name)
+def test_streamed_text_matches_python_docx(path):
+    assert extract_docx_text(path) == parser._extract_text(Document(path))
+    assert parser.parse_docx(io.BytesIO(path.read_bytes())) == parser.parse_docx(path)
+
+
+def test_tables_tabs_and_breaks():
+    doc = Document()
+    doc.add_paragraph("Age: 61\tSex: Female")
+    doc.add_paragraph().add_run("Cholesterol").add_break()
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = "Resting BP"
+    table.cell(0, 1).text = "150"
+    table.cell(1, 0).add_paragraph("second paragraph")
+    data = _save(doc)
+
+    assert extract_docx_text(io.BytesIO(data)) == parser._extract_text(Document(io.BytesIO(data)))
+
+
+def test_merged_cells_fall_back_to_python_docx():
+    doc = Document()
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).merge(table.cell(0, 1)).text = "Max Heart Rate: 140"
+    data = _save(doc)
+
+    with pytest.raises(_NeedsFullParse):
+        extract_docx_text(io.BytesIO(data))
+    assert parser._read_text(io.BytesIO(data)) == parser._extract_text(Document(io.BytesIO(data)))
@@ -0,0 +1,89 @@
+import pytest
+
+import config
+import main_app
+from backend.model_registry import ModelRegistry
+from src.models import model_store
+from src.models.feature_schema import SchemaValidationError, builtin_schema, schema_for_feature_names
+from src.models.model_store import ModelStore, UnknownModelError
+from src.models.pipeline import TrainingPipeline, load_config
+
+UCI_PATIENT = {"age": 63, "sex": 1, "cp": 3, "trestbps": 145, "chol": 233, "fbs": 1, "restecg": 0,
+               "thalach": 150, "exang": 0, "oldpeak": 2.3, "slope": 0, "ca": 0, "thal": 1}
+
+
+def _fast_config(name):
+    cfg = load_config(config.SRC_DIR / "models" / "configs" / f"{name}.json")
+    cfg["model"]["params"].update(n_estimators=20, n_jobs=1)
+    cfg["export"]["plot_importances"] = False
+    return cfg
+
+
+def test_builtin_schemas_match_config_and_data():
+    uci = builtin_schema("uci_13")
+    assert uci.names == config.FEATURE_NAMES
+    assert uci.ranges == {name: tuple(bounds) for name, bounds in config.FEATURE_RANGES.items()}
+    assert schema_for_feature_names(config.FEATURE_NAMES).name == "uci_13"
+    assert schema_for_feature_names(["a", "b"]).name == "inferred"
+
+    extended = builtin_schema("heart_risk_extended")
+    assert "risk_score" not in extended.names and extended.target == "heart_disease"
+    with pytest.raises(ValueError):
+        builtin_schema("missing")
+
+
+def test_validation_collects_every_error():
+    schema = builtin_schema("uci_13")
+    X = schema.vectorize([UCI_PATIENT, dict(UCI_PATIENT, oldpeak="1.5")])
+    assert X.shape == (2, 13) and X[1, schema.names.index("oldpeak")] == 1.5
+
+    bad = dict(UCI_PATIENT, age=300, cp=1.5, chol="high")
+    del bad["thal"]
+    with pytest.raises(SchemaValidationError) as excinfo:
+        schema.frame([bad])
+    errors = excinfo.value.errors
+    assert len(errors) == 4
+    assert any(error.startswith("age=300 is outside") for error in errors)
+    assert "Missing required field: thal" in errors
+
+
+def test_extended_model_is_served_next_to_uci(tmp_path, monkeypatch):
+    store_dir, cache_dir = tmp_path / "models", tmp_path / "cache"
+    default = TrainingPipeline(_fast_config("random_forest"), cache_dir=cache_dir, store_dir=store_dir,
+                               verbose=False).run()
+    extended = TrainingPipeline(_fast_config("heart_risk_extended"), cache_dir=cache_dir, store_dir=store_dir,
+                                verbose=False).run()
+    store = ModelStore(store_dir)
+    assert store.current_hash() == default["hash"]
+    assert store.channels() == {"random_forest": default["hash"], "heart_risk_extended": extended["hash"]}
+    loaded = store.load(channel="heart_risk_extended")
+    assert loaded.schema.name == "heart_risk_extended" and loaded.feature_names == loaded.schema.names
+    with pytest.raises(UnknownModelError):
+        store.load(channel="nope")
+
+    monkeypatch.setattr(model_store, "_store", store)
+    monkeypatch.setattr(main_app, "registry", ModelRegistry())
+    client = main_app.app.test_client()
+
+    response = client.post("/predict", json=UCI_PATIENT)
+    assert response.status_code == 200
+    assert response.get_json()["data"]["model"]["hash"] == default["hash"]
+
+    response = client.post("/predict", json=dict(UCI_PATIENT, trestbps=20))
+    assert response.status_code == 400
+    assert response.get_json()["data"]["errors"] == ["trestbps=20 is outside the valid range [50, 250]"]
+
+    # The UCI payload is not valid for the extended schema: it lacks its columns
+    response = client.post("/predict", json=dict(UCI_PATIENT, model="heart_risk_extended"))
+    assert response.status_code == 400
+
+    patient = {name: (low + high) / 2 if spec["dtype"] == "float" else int(low)
+               for spec in loaded.schema.features for name, low, high in [(spec["name"], spec["min"], spec["max"])]}
+    response = client.post("/predict", json=dict(patient, model="heart_risk_extended"))
+    assert response.status_code == 200
+    assert response.get_json()["data"]["model"]["name"] == "heart_risk_extended"
+
+    assert client.post("/predict", json=dict(UCI_PATIENT, model="nope")).status_code == 404
+    assert client.get("/api/features?model=heart_risk_extended").get_json()["data"]["features"] == loaded.schema.names
+    models = client.get("/api/models").get_json()["data"]["models"]
+    assert [(m["name"], m["default"]) for m in models] == [("random_forest", True), ("heart_risk_extended", False)]
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from src.models.forest_arrays import FALLBACK_ROWS, FOREST_FILES, MappedForest, export_forest_arrays
+from src.models.model_store import ModelStore
+
+df = pd.read_csv("data/heart-disease-UCI.csv")
+X = df.drop("target", axis=1)
+y = df.target.values
+
+
+def test_mapped_forest_matches_sklearn(tmp_path):
+    store = ModelStore(tmp_path / "store")
+    model = store.load(mmap=False).model
+    export_forest_arrays(model, tmp_path)
+    mapped = MappedForest(tmp_path)
+    assert isinstance(mapped.threshold, np.memmap) and not mapped.threshold.flags.writeable
+
+    rng = np.random.default_rng(0)
+    noisy = pd.concat([X, X + rng.normal(0, 5, X.shape)], ignore_index=True)
+    np.testing.assert_allclose(mapped.predict_proba(noisy), model.predict_proba(noisy), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(mapped.predict(noisy), model.predict(noisy))
+    # Column order comes from the feature names, like the fitted pipeline
+    np.testing.assert_allclose(mapped.predict_proba(noisy[noisy.columns[::-1]]), mapped.predict_proba(noisy))
+
+
+def test_bare_forest_without_scaler(tmp_path):
+    forest = RandomForestClassifier(n_estimators=15, max_depth=None, random_state=0).fit(X.values, y)
+    export_forest_arrays(forest, tmp_path)
+    mapped = MappedForest(tmp_path, mmap_mode=None)
+    np.testing.assert_allclose(mapped.predict_proba(X.values), forest.predict_proba(X.values), rtol=0, atol=1e-12)
+
+
+def test_store_serves_forests_from_memory_map(tmp_path):
+    store = ModelStore(tmp_path / "store")
+    loaded = store.load(mmap=True)
+    assert set(FOREST_FILES) <= set(loaded.manifest["files"])
+    assert isinstance(loaded.model, MappedForest)
+    assert loaded.model.predict_proba(X.iloc[:3]).shape == (3, 2)
+    assert not isinstance(store.load(mmap=False).model, MappedForest)
+
+
+def test_large_batches_are_scored_by_the_pickle(tmp_path):
+    store = ModelStore(tmp_path / "store")
+    loaded = store.load(mmap=True)
+    # Served models stay on the arrays at any batch size
+    assert loaded.model.fallback_path is None
+    mapped = loaded.batch_model()
+    assert mapped is not loaded.model
+    assert mapped.fallback_path == store.path(loaded.hash) / "heart_disease_model.pkl"
+    reference = store.load(mmap=False).model
+
+    small = X.iloc[:FALLBACK_ROWS]
+    np.testing.assert_allclose(mapped.predict_proba(small), reference.predict_proba(small), rtol=0, atol=1e-12)
+    assert mapped._fallback is None
+
+    large = X.iloc[:FALLBACK_ROWS + 1]
+    np.testing.assert_allclose(mapped.predict_proba(large), reference.predict_proba(large), rtol=0, atol=1e-12)
+    assert mapped._fallback is not None
+    assert store.load(mmap=False).batch_model() is store.load(mmap=False).model
@@ -0,0 +1,196 @@
+import io
+import json
+import sqlite3
+import time
+import zipfile
+from pathlib import Path
+
+import joblib
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+import config
+from backend import jobs, model_registry
+from backend.ingest import ingest, iter_documents, run_ingest_job, spool_upload, write_csv
+from backend.jobs import JobQueue
+from backend.model_registry import ModelRegistry
+from main_app import app, init_db
+from src.models import model_store
+from src.models.feature_schema import SCHEMA_FILE, FeatureSchema, builtin_schema
+from src.models.model_store import ModelStore
+from src.utils.docx_parser import PatientDataParser, category_code
+
+TESTING_DATA = Path(__file__).resolve().parent / "testing_data"
+
+
+@pytest.fixture(scope="module")
+def model():
+    df = pd.read_csv(config.DATASET_PATH)
+    return LogisticRegression(solver="liblinear").fit(df[config.FEATURE_NAMES], df["target"])
+
+
+@pytest.fixture
+def served(tmp_path, monkeypatch):
+    """A fresh registry over a throwaway store (the legacy model, served from its arrays)"""
+    monkeypatch.setattr(model_store, "_store", ModelStore(tmp_path / "store"))
+    registry = ModelRegistry()
+    monkeypatch.setattr(model_registry, "registry", registry)
+    return registry
+
+
+def test_testing_data_forms_are_all_scored(model):
+    results, errors, timings = ingest(TESTING_DATA, model, builtin_schema("uci_13"), workers=1)
+    assert errors == []
+    assert timings["scored"] == timings["documents"] == len(list(TESTING_DATA.glob("*.docx")))
+    row = next(r for r in results if r["file"] == "sample_patient_2.docx")
+    # Age: 60 / Sex: Female / Chest Pain Type: Atypical Angina / Fasting Blood Sugar: Yes / Thalassemia: Fixed defect
+    assert (row["age"], row["sex"], row["cp"], row["fbs"], row["thal"]) == (60, 0, 1, 1, 2)
+
+
+def test_values_are_read_from_their_own_line():
+    parser = PatientDataParser()
+    text = "age: 58\nsex: male\nresting bp: 140\nfasting blood sugar: no\nexercise angina: yes\nmajor vessels: 1.0"
+    fields = {field: parser._extract_field(text, field, keywords) for field, keywords in parser.field_mappings.items()}
+    assert fields["age"] == 58 and fields["trestbps"] == 140
+    assert (fields["sex"], fields["fbs"], fields["exang"], fields["ca"]) == (1, 0, 1, 1)
+    # "Age: 58" on the line above must not be read as the sex
+    assert parser._extract_field("age: 58\nsex: unknown", "sex", parser.field_mappings["sex"]) is None
+
+
+def test_category_words():
+    assert category_code("sex", "Female") == 0 and category_code("sex", "Male") == 1
+    assert category_code("cp", "Atypical Angina") == 1 and category_code("cp", "Typical Angina") == 0
+    assert category_code("restecg", "ST-T wave abnormality") == 1
+    assert category_code("fbs", "> 120 mg/dl") == 1
+    assert category_code("slope", "sideways") is None
+
+
+def test_admin_upload_is_ingested_by_the_job_queue(served, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    init_db()
+    monkeypatch.setattr(config, "INGEST_UPLOAD_DIR", tmp_path / "uploads")
+    queue = JobQueue(db_path=str(tmp_path / "jobs.db"), workers=1)
+    queue.register("ingest", jobs._ingest_job)
+    monkeypatch.setattr(jobs, "_queue", queue)
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for name, data in iter_documents(TESTING_DATA):
+            zf.writestr(name, data)
+    archive.seek(0)
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=1, role="admin")
+    try:
+        response = client.post("/api/admin/ingest", data={"file": (archive, "forms.zip")},
+                               content_type="multipart/form-data")
+        assert response.status_code == 202
+        job_id = response.get_json()["data"]["job_id"]
+        deadline = time.time() + 30
+        while queue.get(job_id)["status"] not in ("done", "dead") and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        queue.stop()
+
+    job = queue.get(job_id)
+    assert job["status"] == "done", job["error"]
+    assert job["result"]["timings"]["scored"] == 9
+    assert list((tmp_path / "uploads").iterdir()) == []
+
+    response = client.post("/api/admin/ingest", data={"file": (io.BytesIO(b"not a zip"), "forms.zip")},
+                           content_type="multipart/form-data")
+    assert response.status_code == 400
+
+
+def _spool_testing_data(upload_dir):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for name, data in iter_documents(TESTING_DATA):
+            zf.writestr(name, data)
+    archive.seek(0)
+    return spool_upload(archive, upload_dir)
+
+
+def test_retried_ingest_job_writes_its_rows_once(served, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    init_db()
+    path = _spool_testing_data(tmp_path / "uploads")
+    payload = {'path': str(path), 'source': "forms.zip", 'user_id': 1}
+    spooled = path.read_bytes()
+
+    def predictions():
+        conn = sqlite3.connect("hospital.db")
+        count = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        conn.close()
+        return count
+
+    before = predictions()
+    first = run_ingest_job(payload)
+    assert predictions() - before == 9 and not first['already_written'] and not path.exists()
+
+    # The worker lost its lease before finishing: the retry finds the batch written
+    assert run_ingest_job(payload)['timings']['scored'] == 9
+    path.write_bytes(spooled)
+    assert run_ingest_job(payload)['already_written']
+    assert predictions() - before == 9 and not path.exists()
+
+
+def test_dead_ingest_job_removes_its_upload(served, tmp_path, monkeypatch):
+    def broken(name=None):
+        raise FileNotFoundError("no model")
+
+    monkeypatch.setattr(served, "get_served", broken)
+    queue = JobQueue(db_path=str(tmp_path / "jobs.db"), workers=1, max_attempts=2, retry_backoff=0.01)
+    queue.start = lambda: None
+    queue.register("ingest", jobs._ingest_job, on_dead=jobs._ingest_dead)
+    path = _spool_testing_data(tmp_path / "uploads")
+    job_id = queue.submit("ingest", {'path': str(path), 'source': "forms.zip", 'user_id': 1})
+
+    assert queue.run_once()
+    assert path.exists()  # kept for the retry
+    time.sleep(0.02)
+    assert queue.run_once()
+    assert queue.get(job_id)["status"] == "dead"
+    assert not path.exists()
+
+
+def test_ingest_scores_with_a_batch_model_not_the_served_one(served, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    init_db()
+    path = _spool_testing_data(tmp_path / "uploads")
+    run_ingest_job({'path': str(path), 'source': "forms.zip", 'user_id': 1})
+    # The web workers' model never gets the pickle attached
+    assert served.get_served().model.fallback_path is None
+
+
+def test_ingest_follows_the_schema_of_the_promoted_model(served, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    init_db()
+    # A model on four of the UCI columns, only valid for patients up to 55
+    columns = ["age", "sex", "chol", "thalach"]
+    schema = FeatureSchema("young_adults", [{"name": name, "dtype": "int", "min": 0, "max": 600} for name in columns])
+    schema.features[0]["max"] = 55
+    df = pd.read_csv(config.DATASET_PATH)
+    version = tmp_path / "version"
+    version.mkdir()
+    joblib.dump(LogisticRegression(solver="liblinear").fit(df[columns], df["target"]), version / config.MODEL_PATH.name)
+    (version / config.FEATURE_NAMES_PATH.name).write_text(json.dumps(columns))
+    schema.save(version / SCHEMA_FILE)
+    store = model_store.get_store()
+    store.promote(store.put({path.name: path for path in version.iterdir()}, {"name": "young_adults"}))
+
+    path = _spool_testing_data(tmp_path / "uploads")
+    job = run_ingest_job({'path': str(path), 'source': "forms.zip", 'user_id': 1})
+    assert job['results'] and job['errors']
+    assert all(row['age'] <= 55 for row in job['results'])
+    assert all("age=" in error['error'] for error in job['errors'])
+
+    conn = sqlite3.connect("hospital.db")
+    written = [json.loads(row[0]) for row in conn.execute("SELECT patient_data FROM predictions WHERE user_id = 1")]
+    conn.close()
+    assert written and all(list(patient) == columns for patient in written)
+
+    results_path, _ = write_csv(job['results'], job['errors'], tmp_path / "results.csv", schema)
+    assert results_path.read_text().splitlines()[0] == "file,age,sex,chol,thalach,prediction,confidence,risk_score"
@@ -0,0 +1,151 @@
+import threading
+import time
+
+import pytest
+
+from backend.jobs import JobQueue, QueueFullError
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(db_path=str(tmp_path / "jobs.db"), workers=1, max_attempts=3, retry_backoff=0.05,
+                     max_queued=10, lease_seconds=60)
+    # Jobs are driven by hand with run_once(); keep submit() from starting worker threads
+    queue.start = lambda: None
+    return queue
+
+
+def test_failed_job_is_retried_with_backoff(queue):
+    calls = []
+
+    def flaky(payload):
+        calls.append(time.time())
+        if len(calls) < 3:
+            raise RuntimeError("ollama timed out")
+        return {"answer": payload["x"] * 2}
+
+    queue.register("flaky", flaky)
+    job_id = queue.submit("flaky", {"x": 21})
+
+    assert queue.run_once()
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"], job["error"]) == ("queued", 1, "RuntimeError: ollama timed out")
+    # Not available again until the backoff has passed
+    assert not queue.run_once()
+
+    for attempt, delay in ((2, 0.05), (3, 0.1)):
+        time.sleep(queue.get(job_id)["available_at"] - time.time() + 0.01)
+        assert queue.run_once()
+        assert queue.get(job_id)["attempts"] == attempt
+        assert calls[-1] - calls[-2] >= delay
+
+    job = queue.get(job_id)
+    assert (job["status"], job["result"], job["error"]) == ("done", {"answer": 42}, None)
+
+
+def test_job_is_dead_lettered_after_max_attempts(queue):
+    queue.register("broken", lambda payload: 1 / 0)
+    job_id = queue.submit("broken", {})
+    for _ in range(3):
+        time.sleep(max(0.0, queue.get(job_id)["available_at"] - time.time()) + 0.01)
+        assert queue.run_once()
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"]) == ("dead", 3)
+    assert job["error"].startswith("ZeroDivisionError")
+    assert queue.metrics()["dead"] == 1
+    assert not queue.run_once()
+
+
+def test_expired_lease_is_reclaimed_until_attempts_run_out(queue):
+    dead = []
+    queue.register("crashes", lambda payload: None, on_dead=dead.append)
+    job_id = queue.submit("crashes", {"upload": "a.zip"})
+    queue.lease_seconds = 0.05
+
+    # A worker claims the job and dies without finishing it
+    for attempt in (1, 2, 3):
+        job = queue._claim()
+        assert (job["id"], job["attempts"]) == (job_id, attempt)
+        assert queue._claim() is None  # the lease is still held
+        time.sleep(0.06)
+
+    assert queue._claim() is None
+    job = queue.get(job_id)
+    assert (job["status"], job["error"]) == ("dead", "Lease expired")
+    assert dead == [{"upload": "a.zip"}]
+
+
+def test_unserializable_result_fails_the_attempt(queue):
+    queue.register("bad_result", lambda payload: {"value": object()})
+    job_id = queue.submit("bad_result", {})
+    assert queue.run_once()
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"]) == ("queued", 1)
+    assert job["error"].startswith("TypeError")
+
+
+def test_worker_thread_survives_unexpected_errors(tmp_path):
+    queue = JobQueue(db_path=str(tmp_path / "jobs.db"), workers=1, retry_backoff=0.05)
+    done = threading.Event()
+    queue.register("ok", lambda payload: done.set() or "ok")
+    original, failures = queue.run_once, []
+
+    def run_once():
+        if not failures:
+            failures.append(1)
+            raise RuntimeError("disk I/O error")
+        return original()
+
+    queue.run_once = run_once
+    try:
+        queue.submit("ok", {})
+        assert done.wait(5)
+        assert failures and all(thread.is_alive() for thread in queue._threads)
+    finally:
+        queue.stop()
+
+
+def test_submit_rejects_unknown_kinds_and_full_queues(queue):
+    with pytest.raises(ValueError):
+        queue.submit("nope", {})
+    queue.register("ok", lambda payload: "ok")
+    for _ in range(10):
+        queue.submit("ok", {})
+    with pytest.raises(QueueFullError):
+        queue.submit("ok", {})
+
+
+def test_running_job_renews_its_lease(queue):
+    queue.lease_seconds = 0.15
+    second_claims = []
+
+    def slow(payload):
+        # Three lease periods: without renewal another worker would reclaim the job
+        for _ in range(5):
+            time.sleep(0.1)
+            second_claims.append(queue._claim())
+        return "ok"
+
+    queue.register("slow", slow)
+    job_id = queue.submit("slow", {})
+    assert queue.run_once()
+    assert second_claims == [None] * 5
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"], job["result"]) == ("done", 1, "ok")
+
+
+def test_attempt_that_lost_its_lease_cannot_finish_the_job(queue):
+    queue.register("ok", lambda payload: "ok")
+    job_id = queue.submit("ok", {})
+    queue.lease_seconds = 0.05
+    stale = queue._claim()
+    time.sleep(0.06)
+    current = queue._claim()
+    assert (current["id"], current["attempts"]) == (job_id, 2)
+
+    assert not queue._finish(stale, error="RuntimeError: late failure")
+    assert not queue._renew(stale)
+    assert queue.get(job_id)["status"] == "running"
+    assert queue._finish(current, result_json='"ok"')
+    job = queue.get(job_id)
+    assert (job["status"], job["result"], job["error"]) == ("done", "ok", None)
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from backend.model_registry import registry
+from benchmarks.load_test import HISTOGRAM_BUCKETS_MS, ROUTES, parse_mix, run_load_test, train_model
+from src.models.model_store import ModelStore
+
+
+def test_parse_mix():
+    assert parse_mix("predict=2, chat_poll") == {"predict": 2.0, "chat_poll": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("upload=1")
+    with pytest.raises(ValueError):
+        parse_mix("predict=0")
+
+
+def test_load_test_drives_every_route_against_a_throwaway_database(monkeypatch):
+    # The harness reloads the process-wide registry; put the suite's state back afterwards
+    for name, value in vars(registry).items():
+        monkeypatch.setattr(registry, name, value)
+    cwd = os.getcwd()
+    repo_db = os.path.getmtime("hospital.db") if os.path.exists("hospital.db") else None
+
+    report = run_load_test(clients=3, duration=1.5, users=4, doctors=2, messages=20, trees=5)
+
+    assert os.getcwd() == cwd
+    assert (os.path.getmtime("hospital.db") if os.path.exists("hospital.db") else None) == repo_db
+    assert set(report["routes"]) <= set(ROUTES.values())
+    assert ROUTES["chat_poll"] in report["routes"]
+    assert report["total"]["requests"] == sum(r["requests"] for r in report["routes"].values())
+    for route, result in report["routes"].items():
+        assert result["errors"] == 0, (route, result["statuses"])
+        assert sum(result["histogram"]) == result["requests"]
+        assert len(result["histogram"]) == len(HISTOGRAM_BUCKETS_MS) + 1
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"] <= result["max_ms"]
+
+
+def test_relative_model_store_is_resolved_from_the_callers_directory(tmp_path, monkeypatch):
+    for name, value in vars(registry).items():
+        monkeypatch.setattr(registry, name, value)
+    train_model(tmp_path / "store", trees=5)
+    trained = ModelStore(tmp_path / "store").current_hash()
+    monkeypatch.chdir(tmp_path)
+
+    report = run_load_test(clients=1, duration=0.3, users=1, doctors=1, messages=1, mix={"predict": 1},
+                           model_store="store")
+
+    assert report["model"]["hash"] == trained
+    assert report["routes"][ROUTES["predict"]]["errors"] == 0
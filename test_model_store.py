@@ -0,0 +1,84 @@
+import json
+
+import joblib
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+import config
+from backend.model_registry import ModelRegistry
+from src.models import model_store
+from src.models.model_store import ArtifactIntegrityError, ModelStore
+
+
+def _artifacts(directory, C=1.0):
+    directory.mkdir(parents=True, exist_ok=True)
+    model = LogisticRegression(C=C).fit([[0, 0], [1, 1], [0, 1], [1, 0]], [0, 1, 1, 0])
+    joblib.dump(model, directory / config.MODEL_PATH.name)
+    (directory / config.FEATURE_NAMES_PATH.name).write_text(json.dumps(["a", "b"]))
+    (directory / config.MODEL_METRICS_PATH.name).write_text(json.dumps({"roc_auc": C}))
+    return {path.name: path for path in directory.iterdir()}
+
+
+def test_put_is_content_addressed_and_promotion_is_atomic(tmp_path):
+    store = ModelStore(tmp_path / "store")
+    files = _artifacts(tmp_path / "v1")
+    first = store.put(files, {"name": "test"})
+    assert store.put(files, {"name": "again"}) == first
+    assert store.current_hash() is None
+
+    second = store.put(_artifacts(tmp_path / "v2", C=0.5))
+    assert second != first
+    store.promote(first)
+    assert store.load().hash == first
+    store.promote(second)
+    loaded = store.load()
+    assert loaded.hash == second
+    assert loaded.feature_names == ["a", "b"]
+    assert loaded.metrics == {"roc_auc": 0.5}
+    assert loaded.feature_importances is None
+    # Cached by hash: the same object until current moves
+    assert store.load() is loaded
+    assert [m["hash"] for m in store.versions()] == [first, second]
+    assert not [p for p in (tmp_path / "store").iterdir() if p.name.startswith(".")]
+
+
+def test_corrupted_version_is_rejected(tmp_path):
+    store = ModelStore(tmp_path / "store")
+    model_hash = store.put(_artifacts(tmp_path / "v1"))
+    (store.path(model_hash) / config.MODEL_PATH.name).write_bytes(b"truncated")
+    with pytest.raises(ArtifactIntegrityError):
+        store.promote(model_hash)
+    with pytest.raises(ArtifactIntegrityError):
+        store.load(model_hash)
+    assert store.current_hash() is None
+
+
+def test_empty_store_imports_legacy_files(tmp_path):
+    store = ModelStore(tmp_path / "store")
+    assert store.available()
+    loaded = store.load()
+    assert store.current_hash() == loaded.hash
+    assert loaded.manifest["name"] == "legacy"
+    assert loaded.feature_names == config.FEATURE_NAMES
+    assert loaded.model.predict_proba([[0] * len(config.FEATURE_NAMES)]).shape == (1, 2)
+
+
+def test_registry_follows_the_pointer_without_a_reload(tmp_path, monkeypatch):
+    store = ModelStore(tmp_path / "store")
+    monkeypatch.setattr(model_store, "_store", store)
+    first = store.promote(store.put(_artifacts(tmp_path / "v1"), {"name": "default"}))
+    store.promote(first, channel="candidate")
+    registry = ModelRegistry()
+    served = registry.get_served()
+    assert (registry.model_hash, registry.model) == (first, served.model)
+    assert registry.get_served() is served
+    assert registry.get_served("candidate").hash == first
+
+    second = store.promote(store.put(_artifacts(tmp_path / "v2", C=0.5), {"name": "default"}))
+    store.promote(second, channel="candidate")
+    assert registry.get_served().hash == second
+    assert registry.get_served("candidate").hash == second
+    # model, feature names and hash all come from the one swapped reference
+    assert registry.served.hash == registry.model_hash == second
+    assert registry.get() == (registry.served.model, registry.served.feature_names)
+    assert registry.metrics == {"roc_auc": 0.5}
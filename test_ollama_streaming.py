@@ -0,0 +1,173 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.utils.ollama_integration_improved import OllamaClinicalAssistant
+
+TOKENS = ["Overall ", "risk ", "is ", "moderate. ", "Medical disclaimer: consult a doctor."]
+TOKEN_DELAY = 0.2
+
+PATIENT = {'age': 58, 'sex': 1, 'cp': 0, 'trestbps': 145, 'chol': 250, 'fbs': 0, 'restecg': 1,
+           'thalach': 130, 'exang': 1, 'oldpeak': 1.5, 'slope': 1, 'ca': 1, 'thal': 3}
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    client_ports = set()
+    prompts = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json({"models": [{"name": "llama3"}]})
+
+    def do_POST(self):
+        StubOllama.client_ports.add(self.client_address[1])
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        StubOllama.prompts.append(request["prompt"])
+        if not request["stream"]:
+            self._send_json({"response": "".join(TOKENS), "done": True})
+            return
+        # Like Ollama: one NDJSON object per HTTP chunk
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in TOKENS:
+            self._write_chunk({"response": token, "done": False})
+            time.sleep(TOKEN_DELAY)
+        self._write_chunk({"response": "", "done": True})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, payload):
+        data = (json.dumps(payload) + "\n").encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+@pytest.fixture
+def stub_url():
+    StubOllama.client_ports = set()
+    StubOllama.prompts = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_stream_yields_tokens_before_completion(stub_url):
+    assistant = OllamaClinicalAssistant(base_url=stub_url)
+    start = time.perf_counter()
+    stream = assistant.stream_explanation(PATIENT, 0.55, 1)
+    first = next(stream)
+    time_to_first_token = time.perf_counter() - start
+    rest = list(stream)
+
+    assert first == TOKENS[0]
+    assert [first] + rest == TOKENS
+    assert time_to_first_token < TOKEN_DELAY * len(TOKENS) / 2
+
+
+def test_session_keeps_connection_alive(stub_url):
+    assistant = OllamaClinicalAssistant(base_url=stub_url)
+    for _ in range(3):
+        assert assistant.generate_explanation(PATIENT, 0.55, 1).startswith("Overall risk")
+    assert len(StubOllama.client_ports) == 1
+
+
+def test_stream_falls_back_when_ollama_is_down():
+    assistant = OllamaClinicalAssistant(base_url="http://127.0.0.1:9")
+    for _ in range(assistant.breaker.failure_threshold):
+        assert assistant.is_available
+        chunks = list(assistant.stream_explanation(PATIENT, 0.55, 1))
+        assert len(chunks) == 1
+        assert "Risk Assessment: MODERATE RISK" in chunks[0]
+    assert not assistant.is_available
+
+
+def test_explanation_cache_skips_repeat_calls(stub_url, tmp_path):
+    from src.utils.explanation_cache import ExplanationCache
+
+    cache = ExplanationCache(path=str(tmp_path / "explanations.db"), max_entries=10)
+    assistant = OllamaClinicalAssistant(base_url=stub_url, cache=cache)
+    first = assistant.generate_explanation(PATIENT, 0.55, 1)
+    # Same risk bucket and factor set, different raw values
+    second = assistant.generate_explanation(dict(PATIENT, age=59, trestbps=150), 0.58, 1)
+
+    assert first == second
+    assert len(StubOllama.client_ports) == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+    # The shared text was written without the first patient's values
+    assert len(StubOllama.prompts) == 1
+    prompt = StubOllama.prompts[0]
+    assert "MODERATE" in prompt and "Stage 1 hypertension (140-159 mm Hg)" in prompt
+    for value in ("Age:", "Sex:", "58", "145", "250", "130 bpm", "55.0%"):
+        assert value not in prompt
+
+    # Without a cache the prompt is about this patient
+    OllamaClinicalAssistant(base_url=stub_url).generate_explanation(PATIENT, 0.55, 1)
+    assert "Age: 58 years" in StubOllama.prompts[-1] and "55.0%" in StubOllama.prompts[-1]
+
+
+def test_batch_preserves_order_and_falls_back_on_timeout():
+    from benchmarks.ollama_batch import make_cases, start_mock_ollama
+
+    cases = make_cases(6)
+    slow_age = cases[2][0]['age']
+    server, base_url = start_mock_ollama(latency=0.05, hang=2.0, slow_ages=[slow_age])
+    try:
+        assistant = OllamaClinicalAssistant(base_url=base_url)
+        start = time.perf_counter()
+        results = assistant.generate_explanations_batch(cases, concurrency=len(cases), timeout=0.5)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert elapsed < 1.5
+    for (patient, risk_score, prediction), text in zip(cases, results):
+        if patient['age'] == slow_age:
+            assert "Risk Assessment:" in text
+        else:
+            assert text.startswith(f"Explanation for a {patient['age']}-year-old")
+
+
+def test_batch_deadline_runs_from_send_and_fails_the_breaker_once():
+    from benchmarks.ollama_batch import make_cases, start_mock_ollama
+
+    cases = make_cases(3)
+    slow_age = cases[0][0]['age']
+    server, base_url = start_mock_ollama(latency=0.05, hang=1.0, slow_ages=[slow_age])
+    try:
+        assistant = OllamaClinicalAssistant(base_url=base_url)
+        # One worker: the fast patients queue behind the slow one, and that wait
+        # must not count against their own deadline
+        results = assistant.generate_explanations_batch(cases, concurrency=1, timeout=0.5)
+        failures = assistant.breaker.metrics()["transitions"], assistant.breaker.consecutive_failures
+        # Past the point where the slow request would have answered
+        time.sleep(0.7)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert "Risk Assessment:" in results[0]
+    assert [text.startswith("Explanation for a") for text in results[1:]] == [True, True]
+    # The slow request failed once and the fast ones reset the count; nothing lands later
+    assert failures == ({}, 0)
+    assert (assistant.breaker.metrics()["transitions"], assistant.breaker.consecutive_failures) == ({}, 0)
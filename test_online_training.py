@@ -0,0 +1,62 @@
+import json
+import sqlite3
+
+import pandas as pd
+
+import config
+import main_app
+from src.models.model_store import ModelStore
+from src.models.online import OnlineTrainer
+
+
+def _seed_predictions(db_path, n):
+    """n UCI rows as predictions of user1, returned with their true labels"""
+    df = pd.read_csv(config.DATASET_PATH).sample(n, random_state=0)
+    conn = sqlite3.connect(db_path)
+    user_id = conn.execute("SELECT id FROM users WHERE username = 'user1'").fetchone()[0]
+    ids = []
+    for _, row in df.iterrows():
+        patient = {name: row[name].item() for name in config.FEATURE_NAMES}
+        cursor = conn.execute('INSERT INTO predictions (user_id, patient_data, prediction_result, confidence_score) '
+                              'VALUES (?, ?, ?, ?)', (user_id, json.dumps(patient), 0, 0.5))
+        ids.append(cursor.lastrowid)
+    conn.commit()
+    conn.close()
+    return list(zip(ids, df["target"].tolist()))
+
+
+def test_outcomes_are_learned_incrementally(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    main_app.init_db()
+    labelled = _seed_predictions("hospital.db", 30)
+
+    client = main_app.app.test_client()
+    client.post("/api/auth/login", json={"username": "doctor1", "password": "doctor123"})
+    for prediction_id, outcome in labelled[:20]:
+        response = client.post("/api/doctor/consultation/outcome",
+                               json={"prediction_id": prediction_id, "outcome": outcome})
+        assert response.status_code == 200
+    assert client.post("/api/doctor/consultation/outcome",
+                       json={"prediction_id": labelled[0][0], "outcome": 2}).status_code == 400
+
+    def trainer():
+        return OnlineTrainer(db_path="hospital.db", checkpoint_dir=tmp_path / "online",
+                             store_dir=tmp_path / "models", batch_size=8, verbose=False)
+
+    first = trainer().run(max_batches=2)
+    assert (first["learned"], first["batches"]) == (16, 2)
+    store = ModelStore(tmp_path / "models")
+    assert store.current_hash() is None
+    assert store.channels() == {config.ONLINE_CHANNEL: first["hash"]}
+    candidate = store.load(channel=config.ONLINE_CHANNEL)
+    assert candidate.schema.name == "uci_13"
+    assert candidate.manifest["outcome_cursor"] == first["cursor"]
+    assert candidate.model.predict_proba(pd.DataFrame([[0] * 13], columns=config.FEATURE_NAMES)).shape == (1, 2)
+
+    # The next run resumes after the checkpoint cursor, including newly confirmed rows
+    for prediction_id, outcome in labelled[20:]:
+        client.post("/api/doctor/consultation/outcome", json={"prediction_id": prediction_id, "outcome": outcome})
+    second = trainer().run(publish=False)
+    assert second["learned"] == 14
+    assert second["n_samples"] == first["n_samples"] + 14
+    assert trainer().run(publish=False)["learned"] == 0
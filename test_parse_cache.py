@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from src.utils import parse_cache
+from src.utils.docx_parser import PatientDataParser
+from src.utils.parse_cache import ParseCache
+
+SAMPLE_PATH = sorted(Path("testing_data").glob("*.docx"))[0]
+SAMPLE = SAMPLE_PATH.read_bytes()
+
+
+def test_repeat_upload_is_served_from_memory():
+    cache = ParseCache(max_entries=2)
+    first = cache.parse(SAMPLE)
+    first[0]["age"] = -1  # callers get their own copy
+    second = cache.parse(SAMPLE)
+
+    assert second == PatientDataParser().parse_docx(SAMPLE_PATH)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_disk_store_survives_a_new_process(tmp_path):
+    path = str(tmp_path / "parse_cache.db")
+    expected = ParseCache(path=path).parse(SAMPLE)
+
+    fresh = ParseCache(path=path)
+    assert fresh.parse(SAMPLE) == expected
+    assert (fresh.disk_hits, fresh.misses) == (1, 0)
+
+
+def test_parser_version_is_part_of_the_key(monkeypatch):
+    key = ParseCache.make_key(SAMPLE)
+    monkeypatch.setattr(parse_cache, "PARSER_VERSION", "next")
+    assert ParseCache.make_key(SAMPLE) != key
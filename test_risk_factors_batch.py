@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from src.utils.ollama_integration_improved import OllamaClinicalAssistant
+from src.utils.risk_factors_batch import (
+    FEATURE_ORDER, analyze_risk_factors_batch, decode_factors, fallback_explanations_batch, records_to_matrix
+)
+
+assistant = OllamaClinicalAssistant()
+
+
+def _random_cohort(n, seed=0):
+    rng = np.random.default_rng(seed)
+    records = []
+    for _ in range(n):
+        records.append({
+            'age': int(rng.integers(20, 90)),
+            'sex': int(rng.integers(0, 2)),
+            'cp': int(rng.integers(0, 4)),
+            'trestbps': int(rng.choice([110, 129, 130, 139, 140, 159, 160, 180, rng.integers(90, 200)])),
+            'chol': int(rng.choice([170, 180, 199, 200, 239, 240, rng.integers(120, 400)])),
+            'fbs': int(rng.integers(0, 2)),
+            'restecg': int(rng.integers(0, 3)),
+            'thalach': int(rng.choice([100, 119, 120, 139, 140, 149, 150, rng.integers(80, 200)])),
+            'exang': int(rng.integers(0, 2)),
+            'oldpeak': float(rng.choice([0.0, 0.3, 0.5, 0.6, 1.0, 1.9, 2.0, round(rng.uniform(0, 5), 1)])),
+            'slope': int(rng.integers(0, 3)),
+            'ca': int(rng.integers(0, 4)),
+            'thal': int(rng.integers(0, 4)),
+        })
+    risk_scores = rng.choice([0.2, 0.5, 0.51, 0.6, 0.61, 0.9], size=n)
+    return records, risk_scores
+
+
+def _assert_parity(records, risk_scores):
+    X = records_to_matrix(records)
+    bitmasks, severity_counts = analyze_risk_factors_batch(X, risk_scores)
+    for record, bitmask, counts, risk in zip(records, bitmasks, severity_counts, risk_scores):
+        expected = assistant._analyze_risk_factors(record, risk)
+        assert decode_factors(bitmask, record.get('ca', 0)) == expected
+        assert list(counts) == [expected[1].count(s) for s in ('high', 'moderate', 'low')]
+
+
+def test_parity_with_scalar_analysis_on_random_cohort():
+    _assert_parity(*_random_cohort(3000))
+
+
+def test_parity_on_uci_dataset():
+    df = pd.read_csv("data/heart-disease-UCI.csv", encoding="utf-8-sig")
+    records = df[FEATURE_ORDER].astype(object).to_dict("records")
+    _assert_parity(records, np.linspace(0, 1, len(records)))
+
+
+def test_missing_fields_default_to_zero():
+    _assert_parity([{'age': 70}, {}], np.array([0.9, 0.7]))
+
+
+def test_empty_cohort():
+    X = records_to_matrix([])
+    assert X.shape == (0, len(FEATURE_ORDER))
+    bitmasks, severity_counts = analyze_risk_factors_batch(X, [])
+    assert bitmasks.shape == (0,) and severity_counts.shape == (0, 3)
+    assert fallback_explanations_batch(assistant, [], [], []) == []
+
+
+def test_float_vessel_count_reads_like_the_scalar_text():
+    # Parsed forms and JSON payloads can carry ca as a float
+    records = [{'ca': 2.0}, {'ca': 3.0}, {'ca': 1.0}, {'ca': np.float64(2.0)}]
+    _assert_parity(records, np.full(len(records), 0.4))
+    bitmasks, _ = analyze_risk_factors_batch(records_to_matrix(records[:1]), [0.4])
+    assert "Multiple major vessel involvement (2.0 vessels)" in decode_factors(bitmasks[0], 2.0)[0]
+
+
+def test_bulk_fallback_matches_scalar_fallback():
+    records, risk_scores = _random_cohort(50, seed=1)
+    predictions = (risk_scores > 0.5).astype(int)
+    bulk = fallback_explanations_batch(assistant, records, risk_scores, predictions)
+    for record, risk, prediction, text in zip(records, risk_scores, predictions, bulk):
+        factors, notes = assistant._analyze_risk_factors(record, risk)
+        assert text == assistant._intelligent_fallback(record, risk, prediction, factors, notes, assistant._risk_level(risk))
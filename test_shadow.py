@@ -0,0 +1,92 @@
+import pandas as pd
+
+import config
+import main_app
+from backend import shadow as shadow_module
+from backend.model_registry import ModelRegistry
+from backend.shadow import ShadowScorer
+from src.models import model_store
+from src.models.model_store import ModelStore
+from src.models.pipeline import TrainingPipeline, load_config
+
+
+def _patients(n):
+    df = pd.read_csv(config.DATASET_PATH).head(n)
+    return [{name: row[name].item() for name in config.FEATURE_NAMES} for _, row in df.iterrows()]
+
+
+def _serve(tmp_path, monkeypatch, **options):
+    """Default random forest plus a differently seeded candidate channel behind a fresh registry"""
+    for name, seed, default in (("random_forest", 42, True), ("rf_candidate", 7, False)):
+        cfg = load_config(config.TRAINING_CONFIG_PATH)
+        cfg["name"] = name
+        cfg["model"]["params"].update(n_estimators=10, n_jobs=1, random_state=seed)
+        cfg["export"].update(plot_importances=False, default=default)
+        TrainingPipeline(cfg, cache_dir=tmp_path / "cache", store_dir=tmp_path / "models", verbose=False).run()
+    registry = ModelRegistry()
+    scorer = ShadowScorer(registry=registry, db_path=str(tmp_path / "shadow.db"), **options)
+    monkeypatch.setattr(model_store, "_store", ModelStore(tmp_path / "models"))
+    monkeypatch.setattr(main_app, "registry", registry)
+    monkeypatch.setattr(shadow_module, "_shadow", scorer)
+    return main_app.app.test_client(), scorer
+
+
+def test_shadow_scores_every_request_off_the_request_path(tmp_path, monkeypatch):
+    client, scorer = _serve(tmp_path, monkeypatch, shadows=["rf_candidate"], canary_percent=0)
+    patients = _patients(20)
+    for patient in patients:
+        response = client.post("/predict", json=patient)
+        assert response.get_json()["data"]["model"]["name"] == "random_forest"
+    # Explicitly requested models are not shadowed
+    client.post("/predict", json=dict(patients[0], model="rf_candidate"))
+    scorer.flush()
+
+    summary = scorer.summary()
+    assert len(summary["comparisons"]) == 1
+    comparison = summary["comparisons"][0]
+    assert (comparison["shadow_model"], comparison["primary_model"]) == ("rf_candidate", "random_forest")
+    assert comparison["scored"] == 20 and comparison["errors"] == 0
+    assert 0 < comparison["mean_abs_delta"] < 1
+    assert len(summary["recent_disagreements"]) == comparison["disagreements"]
+
+
+def test_canary_share_is_sticky_and_compared_both_ways(tmp_path, monkeypatch):
+    client, scorer = _serve(tmp_path, monkeypatch, shadows=[], canary="rf_candidate", canary_percent=100)
+    response = client.post("/predict", json=_patients(1)[0])
+    assert response.get_json()["data"]["model"]["name"] == "rf_candidate"
+    scorer.flush()
+    comparison = scorer.summary()["comparisons"][0]
+    assert (comparison["shadow_model"], comparison["primary_model"]) == ("random_forest", "rf_candidate")
+
+    scorer.canary_percent = 25
+    routed = [scorer.in_canary(user_id) for user_id in range(2000)]
+    assert 0.2 < sum(routed) / len(routed) < 0.3
+    assert routed == [scorer.in_canary(user_id) for user_id in range(2000)]
+    assert scorer.route(key=next(i for i, canary in enumerate(routed) if not canary)) == (None, ["rf_candidate"])
+    assert scorer.route(key=routed.index(True)) == ("rf_candidate", [None])
+
+    # A missing canary channel must not take the predict routes down
+    scorer.canary = "missing"
+    assert scorer.route(key=1) == (None, [])
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    _, scorer = _serve(tmp_path, monkeypatch, shadows=["rf_candidate"], max_queued=1)
+    monkeypatch.setattr(scorer, "start", lambda: None)
+    served = scorer.registry.get_served()
+    patient = _patients(1)[0]
+    assert scorer.submit(patient, served, 0.4, ["rf_candidate"])
+    assert not scorer.submit(patient, served, 0.4, ["rf_candidate"])
+    assert scorer.dropped == 1
+
+
+def test_canary_promoted_after_startup_is_picked_up(tmp_path, monkeypatch):
+    _, scorer = _serve(tmp_path, monkeypatch, shadows=[], canary="late_canary", canary_percent=100)
+    assert scorer.route(key=1) == (None, [])
+
+    store = model_store._store
+    store.promote(store.current_hash("rf_candidate"), channel="late_canary")
+    # Not looked up again until CANARY_RETRY has passed
+    assert scorer.route(key=1) == (None, [])
+    monkeypatch.setattr(scorer, "_canary_retry_at", 0.0)
+    assert scorer.route(key=1) == ("late_canary", [None])
@@ -0,0 +1,18 @@
+import os
+
+from benchmarks.startup import measure_cold_start
+
+# Cold start = import main_app + first auth and chat request (seconds)
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "1.0"))
+
+
+def test_cold_start_within_budget():
+    best = min((measure_cold_start() for _ in range(3)), key=lambda r: r['total_seconds'])
+    assert best['total_seconds'] < STARTUP_BUDGET_SECONDS, (
+        f"Cold start took {best['total_seconds']:.3f}s, budget is {STARTUP_BUDGET_SECONDS:.3f}s"
+    )
+
+
+def test_auth_and_chat_do_not_load_prediction_stack():
+    result = measure_cold_start()
+    assert result['heavy_modules'] == [], f"Loaded at startup: {', '.join(result['heavy_modules'])}"
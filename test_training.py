@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from src.models.training import make_cv_splits, search_logistic_regression, search_random_forest
+
+df = pd.read_csv("data/heart-disease-UCI.csv")
+X = df.drop("target", axis=1)
+y = df.target.values
+
+
+def test_cv_splits_are_shared_and_stratified():
+    first = make_cv_splits(X, y)
+    second = make_cv_splits(X, y)
+    assert len(first) == 5
+    for (train_a, val_a), (train_b, val_b) in zip(first, second):
+        np.testing.assert_array_equal(train_a, train_b)
+        np.testing.assert_array_equal(val_a, val_b)
+        assert abs(y[val_a].mean() - y.mean()) < 0.05
+    all_val = np.concatenate([val for _, val in first])
+    assert sorted(all_val) == list(range(len(y)))
+
+
+def test_searches_use_given_splits_and_parallel_backend():
+    cv = make_cv_splits(X, y, n_splits=3)
+    log_reg = search_logistic_regression(X, y, cv=cv, n_jobs=2, backend="threading", verbose=False,
+                                         param_grid={"C": [0.1, 1.0], "solver": ["liblinear"]})
+    assert log_reg.n_splits_ == 3
+    assert log_reg.best_params_["C"] in (0.1, 1.0)
+
+    rf = search_random_forest(X, y, cv=cv, n_jobs=2, backend="threading", verbose=False,
+                              param_grid={"max_depth": [3, 5], "min_samples_leaf": [1, 5]})
+    assert rf.n_splits_ == 3
+    # Successive halving: fewer candidates each round, more trees for the survivors
+    assert list(rf.n_candidates_) == sorted(rf.n_candidates_, reverse=True)
+    assert list(rf.n_resources_) == sorted(rf.n_resources_)
+    assert rf.best_params_["n_estimators"] == rf.n_resources_[-1]
+    assert rf.best_estimator_.predict_proba(X).shape == (len(y), 2)
@@ -0,0 +1,77 @@
+import copy
+import json
+
+import joblib
+
+import config
+from src.models.model_store import ModelStore
+from src.models.pipeline import TrainingPipeline, load_config
+
+
+def _fast_config():
+    cfg = load_config(config.SRC_DIR / "models" / "configs" / "random_forest.json")
+    cfg["model"]["params"].update(n_estimators=20, n_jobs=1)
+    cfg["export"]["plot_importances"] = False
+    return cfg
+
+
+def _run(cfg, tmp_path, **kwargs):
+    return TrainingPipeline(cfg, cache_dir=tmp_path / "cache", store_dir=tmp_path / "models",
+                            publish=False, verbose=False, **kwargs).run()
+
+
+def test_pipeline_writes_versioned_artifacts(tmp_path):
+    summary = _run(_fast_config(), tmp_path)
+    assert set(summary["stages"].values()) == {"ran"}
+    assert not summary["published"]
+    assert not (tmp_path / "models" / "current").exists()
+
+    artifact_dir = tmp_path / "models" / summary["hash"]
+    assert str(artifact_dir) == summary["artifact_dir"]
+    manifest = json.loads((artifact_dir / "manifest.json").read_text())
+    assert manifest["name"] == "random_forest"
+    assert manifest["version"] == summary["version"]
+    model = joblib.load(artifact_dir / config.MODEL_PATH.name)
+    feature_names = json.loads((artifact_dir / config.FEATURE_NAMES_PATH.name).read_text())
+    metrics = json.loads((artifact_dir / config.MODEL_METRICS_PATH.name).read_text())
+    assert feature_names == config.FEATURE_NAMES
+    assert {"roc_auc", "test_accuracy", "n_features", "n_train_samples", "n_test_samples"} <= set(metrics)
+    assert model.predict_proba([[0] * len(feature_names)]).shape == (1, 2)
+
+
+def test_metrics_only_change_reuses_fitted_model(tmp_path):
+    cfg = _fast_config()
+    _run(cfg, tmp_path)
+
+    changed = copy.deepcopy(cfg)
+    changed["evaluate"]["threshold"] = 0.6
+    changed["evaluate"]["metrics"] = ["roc_auc", "accuracy"]
+    summary = _run(changed, tmp_path)
+    assert summary["stages"] == {"load": "cached", "split": "cached", "search": "cached",
+                                 "fit": "cached", "calibrate": "cached", "evaluate": "ran", "export": "ran"}
+    assert summary["metrics"]["threshold"] == 0.6
+    assert "f1" not in summary["metrics"]
+
+    # A new split invalidates everything downstream of it, but not load
+    changed["split"]["random_state"] = 7
+    summary = _run(changed, tmp_path)
+    assert summary["stages"]["load"] == "cached"
+    assert summary["stages"]["fit"] == "ran"
+
+    summary = _run(changed, tmp_path, force="fit")
+    assert summary["stages"]["search"] == "cached"
+    assert summary["stages"]["fit"] == "ran"
+
+
+def test_baseline_config_does_not_replace_the_served_model(tmp_path):
+    served = TrainingPipeline(_fast_config(), cache_dir=tmp_path / "cache", store_dir=tmp_path / "models",
+                              verbose=False).run()
+    store = ModelStore(tmp_path / "models")
+    assert store.current_hash() == served["hash"]
+
+    baseline = load_config(config.SRC_DIR / "models" / "configs" / "logistic_regression.json")
+    summary = TrainingPipeline(baseline, cache_dir=tmp_path / "cache", store_dir=tmp_path / "models",
+                               verbose=False).run()
+    assert summary["published"]
+    assert store.current_hash() == served["hash"]
+    assert store.current_hash("logistic_regression") == summary["hash"]
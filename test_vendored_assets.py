@@ -0,0 +1,74 @@
+import hashlib
+import json
+import re
+import shutil
+
+import pytest
+
+from backend.assets import (
+    IMMUTABLE_CACHE_CONTROL, MANIFEST_NAME, VENDOR_ASSETS, VENDOR_DIR, VIEWER_DIR, check_pin, hashed_filename, vendor_asset
+)
+from main_app import app
+
+EXTERNAL_ORIGIN = re.compile(r'(?:src|href)\s*=\s*["\']?(?:https?:)?//|@import\s+url\(["\']?(?:https?:)?//', re.I)
+
+
+def test_vendor_asset_writes_hashed_copy_and_rewrites_viewer(tmp_path):
+    shutil.copy(VIEWER_DIR / "index.html", tmp_path / "index.html")
+
+    first = vendor_asset("three.min.js", b"var THREE = {};", viewer_dir=tmp_path)
+    assert first == hashed_filename("three.min.js", b"var THREE = {};")
+    assert f'src="vendor/{first}" data-vendor="three.min.js"' in (tmp_path / "index.html").read_text()
+
+    # A new version gets a new name; the old file and CDN URL are gone
+    second = vendor_asset("three.min.js", b"var THREE = {REVISION: '129'};", viewer_dir=tmp_path)
+    assert second != first
+    assert sorted(p.name for p in (tmp_path / "vendor").iterdir()) == sorted(["manifest.json", second])
+    manifest = json.loads((tmp_path / "vendor" / "manifest.json").read_text())
+    assert manifest["three.min.js"]["file"] == second
+    assert manifest["three.min.js"]["sha256"] == hashlib.sha256(b"var THREE = {REVISION: '129'};").hexdigest()
+    assert "cdnjs" not in (tmp_path / "index.html").read_text()
+
+
+def test_hashed_static_files_are_immutable(tmp_path, monkeypatch):
+    name = hashed_filename("three.min.js", b"var THREE = {};")
+    (tmp_path / name).write_bytes(b"var THREE = {};")
+    (tmp_path / "three.min.js").write_bytes(b"var THREE = {};")
+    monkeypatch.setattr(app, "static_folder", str(tmp_path))
+    client = app.test_client()
+
+    assert client.get(f"/static/{name}").headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert client.get("/static/three.min.js").headers.get("Cache-Control") != IMMUTABLE_CACHE_CONTROL
+
+
+def test_committed_vendor_files_match_their_hashes():
+    manifest = json.loads((VENDOR_DIR / MANIFEST_NAME).read_text())
+    assert "three.min.js" in manifest
+    for name, entry in manifest.items():
+        data = (VENDOR_DIR / entry["file"]).read_bytes()
+        assert hashlib.sha256(data).hexdigest() == entry["sha256"]
+        assert entry["file"] == hashed_filename(name, data)
+        # The committed file is the pinned build, not just some build of the library
+        assert check_pin(name, data) == VENDOR_ASSETS[name]["sha256"]
+        assert entry["revision"] == VENDOR_ASSETS[name]["revision"]
+    assert sorted(p.name for p in VENDOR_DIR.iterdir()) == sorted(
+        [MANIFEST_NAME] + [entry["file"] for entry in manifest.values()])
+
+
+def test_viewer_loads_nothing_from_external_origins():
+    manifest = json.loads((VENDOR_DIR / MANIFEST_NAME).read_text())
+    html = (VIEWER_DIR / "index.html").read_text()
+    assert not EXTERNAL_ORIGIN.search(html)
+    assert not EXTERNAL_ORIGIN.search((VIEWER_DIR / "heart3d.js").read_text())
+    assert f'src="vendor/{manifest["three.min.js"]["file"]}"' in html
+
+    client = app.test_client()
+    response = client.get(f'/static/heart3d/vendor/{manifest["three.min.js"]["file"]}')
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert hashlib.sha256(response.get_data()).hexdigest() == manifest["three.min.js"]["sha256"]
+
+
+def test_bytes_other_than_the_pinned_build_are_refused():
+    with pytest.raises(ValueError, match="129dev"):
+        check_pin("three.min.js", b'var THREE = {REVISION: "128"};')
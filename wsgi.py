@@ -0,0 +1,19 @@
+"""
+WSGI entry point for production servers (gunicorn, see gunicorn.conf.py).
+Everything expensive is loaded here, in the master process, so forked
+workers share the model and compiled templates copy-on-write.
+"""
+from main_app import app, init_db
+from backend.model_registry import registry
+
+
+def preload():
+    """Initialize the database, warm the model and compile all templates."""
+    init_db()
+    registry.warm()
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    return app
+
+
+preload()